@@ -0,0 +1,5 @@
+"""Python tooling for the FirstData source catalog."""
+
+from firstdata.loader import Catalog, SourceFile, load_catalog
+
+__all__ = ["Catalog", "SourceFile", "load_catalog"]
@@ -0,0 +1,110 @@
+"""Prefix completion (autocomplete.json) over tags, domains, ids and names.
+
+The index is the list of every distinct term with the number of sources
+using it, sorted by lowercased term. Loading it builds a sorted key
+array in which each term appears under its full lowercased form and
+under every word start after a hyphen, space, underscore or slash, so
+"growth" completes to "economic-growth" and "bank" to "World Bank". A
+completion is then a binary search for the prefix and a scan of the
+matching key range. Prefixes of one or two characters match a large
+part of the vocabulary, so their best completions are ranked once at
+load time instead.
+
+CJK terms have no separators and are matched by plain prefix ("世界" ->
+"世界银行").
+"""
+
+import heapq
+import json
+import re
+from bisect import bisect_left
+from pathlib import Path
+
+from firstdata.loader import INDEXES_DIR
+
+AUTOCOMPLETE_PATH = INDEXES_DIR / "autocomplete.json"
+
+MAX_LIMIT = 50
+SHORT_PREFIX = 2
+
+WORD_BREAK_RE = re.compile(r"[-\s_/(]+")
+
+
+def source_terms(source: dict) -> set[str]:
+    """Completable terms of a source: its id, en/zh names, tags and domains."""
+    terms = {source["id"], *source.get("tags", []), *source.get("domains", [])}
+    name = source.get("name") or {}
+    terms.update(name[lang] for lang in ("en", "zh") if name.get(lang))
+    return terms
+
+
+def build_autocomplete(sources: list[dict], now: str) -> dict:
+    weights: dict[str, int] = {}
+    for source in sources:
+        for term in source_terms(source):
+            weights[term] = weights.get(term, 0) + 1
+    terms = sorted(weights.items(), key=lambda item: (item[0].lower(), item[0]))
+    return {
+        "metadata": {
+            "generated_at": now,
+            "total_terms": len(terms),
+        },
+        "terms": [list(item) for item in terms],
+    }
+
+
+def term_keys(term: str) -> set[str]:
+    """The lowercased term and each of its suffixes starting at a word break."""
+    lower = term.lower()
+    keys = {lower}
+    keys.update(lower[m.end():] for m in WORD_BREAK_RE.finditer(lower) if m.end() < len(lower))
+    return keys
+
+
+class Autocomplete:
+    def __init__(self, terms: list[tuple[str, int]]) -> None:
+        self.terms = [(term, weight) for term, weight in terms]
+        entries = sorted((key, i) for i, (term, _) in enumerate(self.terms) for key in term_keys(term))
+        self._keys = [key for key, _ in entries]
+        self._targets = [i for _, i in entries]
+
+        short: dict[str, set[int]] = {}
+        for key, i in entries:
+            for n in range(1, SHORT_PREFIX + 1):
+                if len(key) >= n:
+                    short.setdefault(key[:n], set()).add(i)
+        self._short = {prefix: self._best(targets, MAX_LIMIT) for prefix, targets in short.items()}
+
+    def _rank(self, i: int) -> tuple:
+        term, weight = self.terms[i]
+        return (-weight, len(term), term.lower(), term)
+
+    def _best(self, targets, limit: int) -> list[int]:
+        return heapq.nsmallest(limit, set(targets), key=self._rank)
+
+    def complete(self, prefix: str, limit: int = 10) -> list[tuple[str, int]]:
+        """Up to `limit` (term, source count) completions of `prefix`, most used first."""
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}, got {limit}")
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        if len(prefix) <= SHORT_PREFIX:
+            best = self._short.get(prefix, [])[:limit]
+        else:
+            lo = bisect_left(self._keys, prefix)
+            hi = bisect_left(self._keys, prefix + "\U0010ffff", lo)
+            best = self._best(self._targets[lo:hi], limit)
+        return [self.terms[i] for i in best]
+
+
+_indexes: dict[Path, Autocomplete] = {}
+
+
+def load_autocomplete(path: Path = AUTOCOMPLETE_PATH) -> Autocomplete:
+    """Load autocomplete.json, once per process."""
+    path = Path(path).resolve()
+    if path not in _indexes:
+        with open(path, encoding="utf-8") as f:
+            _indexes[path] = Autocomplete([tuple(term) for term in json.load(f)["terms"]])
+    return _indexes[path]
@@ -0,0 +1,141 @@
+"""Memory-mapped binary catalog (sources.bin) for fast get-by-id.
+
+Layout, all integers little-endian:
+
+    header   magic (8 bytes), count (u32), reserved (u32)
+    slots    count x (id offset u32, id length u32, record offset u32, record length u32)
+    ids      UTF-8 ids, concatenated in sorted byte order
+    records  compact UTF-8 JSON of each index record, concatenated
+
+Offsets are from the start of the file and slot i describes the i-th
+smallest id, so a lookup is a binary search over the slots followed by
+a slice of the record area; only the records asked for are ever parsed.
+The file is opened with mmap, so processes reading it share one copy in
+the OS page cache.
+"""
+
+import json
+import mmap
+import struct
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from firstdata.loader import INDEXES_DIR
+
+BINARY_PATH = INDEXES_DIR / "sources.bin"
+MAGIC = b"FDSRC\x00\x00\x01"
+
+HEADER = struct.Struct("<8sII")
+SLOT = struct.Struct("<IIII")
+
+
+def build_binary(sources: list[dict]) -> bytes:
+    """Serialize index records into the sources.bin format."""
+    records = sorted(((s["id"].encode("utf-8"), s) for s in sources), key=lambda r: r[0])
+    for (a, _), (b, _) in zip(records, records[1:]):
+        if a == b:
+            raise ValueError(f"duplicate source id: {a.decode()}")
+
+    ids_start = HEADER.size + SLOT.size * len(records)
+    id_area = b"".join(key for key, _ in records)
+    blobs = [
+        json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        for _, record in records
+    ]
+
+    slots = []
+    id_offset, record_offset = ids_start, ids_start + len(id_area)
+    for (key, _), blob in zip(records, blobs):
+        slots.append(SLOT.pack(id_offset, len(key), record_offset, len(blob)))
+        id_offset += len(key)
+        record_offset += len(blob)
+
+    return b"".join([HEADER.pack(MAGIC, len(records), 0), *slots, id_area, *blobs])
+
+
+class RecordLookup:
+    """get_many() for any catalog with a get(source_id) returning a record or None."""
+
+    def get(self, source_id: str) -> dict | None:
+        raise NotImplementedError
+
+    def get_many(self, source_ids: Iterable[str]) -> dict[str, dict]:
+        """Records for every id in `source_ids` that exists, keyed by id."""
+        found = {}
+        for source_id in source_ids:
+            if source_id not in found:
+                record = self.get(source_id)
+                if record is not None:
+                    found[source_id] = record
+        return found
+
+
+class _Ids:
+    """Sequence view of the sorted id area, for bisect."""
+
+    def __init__(self, catalog: "BinaryCatalog") -> None:
+        self._catalog = catalog
+
+    def __len__(self) -> int:
+        return len(self._catalog)
+
+    def __getitem__(self, i: int) -> bytes:
+        id_offset, id_length, _, _ = self._catalog._slot(i)
+        return self._catalog._mmap[id_offset:id_offset + id_length]
+
+
+class BinaryCatalog(RecordLookup):
+    """Read-only view of a sources.bin file."""
+
+    def __init__(self, path: Path = BINARY_PATH) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a FirstData binary catalog")
+        self._ids = _Ids(self)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, source_id: str) -> bool:
+        return self._find(source_id) is not None
+
+    def __enter__(self) -> "BinaryCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def _slot(self, i: int) -> tuple[int, int, int, int]:
+        return SLOT.unpack_from(self._mmap, HEADER.size + SLOT.size * i)
+
+    def _find(self, source_id: str) -> int | None:
+        key = source_id.encode("utf-8")
+        i = bisect_left(self._ids, key)
+        if i < self._count and self._ids[i] == key:
+            return i
+        return None
+
+    def ids(self) -> Iterator[str]:
+        """All ids in sorted order."""
+        for i in range(self._count):
+            yield self._ids[i].decode("utf-8")
+
+    def get_raw(self, source_id: str) -> bytes | None:
+        """The serialized JSON record for `source_id`, without parsing it."""
+        i = self._find(source_id)
+        if i is None:
+            return None
+        _, _, record_offset, record_length = self._slot(i)
+        return self._mmap[record_offset:record_offset + record_length]
+
+    def get(self, source_id: str) -> dict | None:
+        """The index record for `source_id`, or None if there is no such source."""
+        raw = self.get_raw(source_id)
+        return None if raw is None else json.loads(raw)
@@ -0,0 +1,197 @@
+"""Result cache for MCP tool calls: an in-process LRU over an optional SQLite store.
+
+Keys are the tool name and its normalized arguments, so equivalent
+calls share an entry: search_source keywords are lowercased (matching
+is case-insensitive), deduplicated and sorted, the domain is lowercased
+and the default limit is filled in. get_source is cached per id by
+FirstDataClient, so overlapping id lists reuse each other's records.
+
+Every entry belongs to an index generation, the content hash the local
+server reports with each result. When a response reports a different
+generation the cache switches to it: the memory tier is cleared and the
+disk tier drops every entry of other generations. A generation that has
+been switched away from is retired: a late response still carrying it is
+not cached and does not switch back. A cache opened on an existing file
+resumes the generation of its newest entry. Without a known generation,
+entries live until their TTL. ask_agent and get_access_guide answers are
+not deterministic, so they get the shorter VOLATILE_TTL.
+
+Both tiers hold values as JSON text, so a caller modifying a returned
+value changes neither the cache nor what other callers get.
+
+stats() reports hits per tier, misses, evictions, the hit rate and the
+seconds saved, the sum of the original call durations of every hit.
+"""
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable
+
+MAX_ENTRIES = 1024
+TTL = 3600.0
+VOLATILE_TTL = 300.0
+VOLATILE_TOOLS = {"ask_agent", "get_access_guide"}
+DEFAULT_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    generation TEXT NOT NULL,
+    expires REAL NOT NULL,
+    cost REAL NOT NULL,
+    value TEXT NOT NULL
+)
+"""
+
+
+def cache_key(tool: str, arguments: dict) -> str:
+    """Canonical form of a call; equivalent calls get the same key."""
+    arguments = dict(arguments)
+    if tool == "search_source":
+        keywords = arguments.get("keywords") or []
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        arguments["keywords"] = sorted({k.lower() for k in keywords if k})
+        if arguments.get("domain"):
+            arguments["domain"] = arguments["domain"].lower()
+        else:
+            arguments.pop("domain", None)
+        arguments.setdefault("limit", DEFAULT_LIMIT)
+    elif tool == "get_source" and arguments.get("fields"):
+        arguments["fields"] = sorted(set(arguments["fields"]))
+    return json.dumps([tool, arguments], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+class QueryCache:
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        ttl: float = TTL,
+        volatile_ttl: float = VOLATILE_TTL,
+        path: Path | None = None,
+        generation: str = "",
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.volatile_ttl = volatile_ttl
+        self.generation = generation
+        self._retired: set[str] = set()
+        self._entries: OrderedDict[str, tuple[float, float, str]] = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute(SCHEMA)
+            self._db.commit()
+            if not generation:
+                row = self._db.execute("SELECT generation FROM entries ORDER BY rowid DESC LIMIT 1").fetchone()
+                self.generation = row[0] if row is not None else ""
+        self.counters = dict.fromkeys(
+            ["memory_hits", "disk_hits", "misses", "evictions", "expirations", "invalidations"], 0
+        )
+        self.saved_seconds = 0.0
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def ttl_for(self, tool: str) -> float:
+        return self.volatile_ttl if tool in VOLATILE_TOOLS else self.ttl
+
+    def set_generation(self, generation: str) -> bool:
+        """Switch to an index generation, dropping the entries of every other one.
+
+        False if `generation` is one the cache has already moved on from:
+        the response reporting it is stale and must not be cached.
+        """
+        if not generation or generation == self.generation:
+            return True
+        if generation in self._retired:
+            return False
+        if self.generation:
+            self.counters["invalidations"] += 1
+            self._retired.add(self.generation)
+        self.generation = generation
+        self._entries.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM entries WHERE generation != ?", (generation,))
+            self._db.commit()
+        return True
+
+    def get(self, key: str):
+        """The cached value of `key`, or None."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, cost, text = entry
+            if expires > now:
+                self._entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                self.saved_seconds += cost
+                return json.loads(text)
+            del self._entries[key]
+            self.counters["expirations"] += 1
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT expires, cost, value FROM entries WHERE key = ? AND generation = ?",
+                (key, self.generation),
+            ).fetchone()
+            if row is not None and row[0] > now:
+                expires, cost, text = row
+                self._remember(key, expires, cost, text)
+                self.counters["disk_hits"] += 1
+                self.saved_seconds += cost
+                return json.loads(text)
+
+        self.counters["misses"] += 1
+        return None
+
+    def put(self, key: str, value, ttl: float, cost: float = 0.0) -> None:
+        """Cache `value` for `ttl` seconds; `cost` is what computing it took, in seconds."""
+        self.put_many([(key, value, ttl, cost)])
+
+    def put_many(self, entries: Iterable[tuple[str, object, float, float]]) -> None:
+        """put() every (key, value, ttl, cost), writing them to disk in one transaction."""
+        now = time.time()
+        rows = []
+        for key, value, ttl, cost in entries:
+            text = json.dumps(value, ensure_ascii=False)
+            self._remember(key, now + ttl, cost, text)
+            rows.append((key, self.generation, now + ttl, cost, text))
+        if self._db is not None and rows:
+            self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def _remember(self, key: str, expires: float, cost: float, text: str) -> None:
+        self._entries[key] = (expires, cost, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def purge(self) -> int:
+        """Delete expired entries from both tiers; the number removed from disk."""
+        now = time.time()
+        for key in [k for k, (expires, _, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        if self._db is None:
+            return 0
+        removed = self._db.execute("DELETE FROM entries WHERE expires <= ?", (now,)).rowcount
+        self._db.commit()
+        return removed
+
+    def stats(self) -> dict:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "entries": len(self._entries),
+            "generation": self.generation,
+        }
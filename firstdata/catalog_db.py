@@ -0,0 +1,198 @@
+"""SQLite export of the catalog (catalog.sqlite).
+
+One `sources` row per source holds the scalar fields as columns and the
+full index record as JSON. Domains and tags live in join tables indexed
+by value, the facet columns have B-tree indexes, and `sources_fts` is an
+external-content FTS5 table over the en/zh name, description and
+data_content columns of `sources`. The FTS table uses the trigram
+tokenizer, so Chinese text, which has no word separators, is searchable
+by substring like English. Trigrams cannot match a term shorter than
+three characters (中国, EU, M2); search_text() answers those with LIKE
+over the same columns instead.
+
+Services open the file read-only with connect(): queries use the indexes
+instead of scanning all-sources.json, and the mmap'd pages are shared
+through the OS page cache by every process that opens the file.
+"""
+
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from firstdata.loader import INDEXES_DIR
+
+SQLITE_PATH = INDEXES_DIR / "catalog.sqlite"
+DB_VERSION = 1
+MMAP_SIZE = 64 * 1024 * 1024
+
+FACET_COLUMNS = ["authority_level", "country", "geographic_scope", "update_frequency", "has_api"]
+TEXT_COLUMNS = [
+    "name_en", "name_zh", "description_en", "description_zh", "data_content_en", "data_content_zh",
+]
+TRIGRAM = 3
+
+SCHEMA = """
+CREATE TABLE metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE sources (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name_en TEXT,
+    name_zh TEXT,
+    description_en TEXT,
+    description_zh TEXT,
+    data_content_en TEXT,
+    data_content_zh TEXT,
+    website TEXT,
+    data_url TEXT,
+    api_url TEXT,
+    authority_level TEXT,
+    country TEXT,
+    geographic_scope TEXT,
+    update_frequency TEXT,
+    has_api INTEGER NOT NULL,
+    file_path TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+
+CREATE TABLE source_domains (
+    domain TEXT NOT NULL,
+    source INTEGER NOT NULL REFERENCES sources (rowid),
+    PRIMARY KEY (domain, source)
+) WITHOUT ROWID;
+CREATE INDEX source_domains_source ON source_domains (source);
+
+CREATE TABLE source_tags (
+    tag TEXT NOT NULL,
+    source INTEGER NOT NULL REFERENCES sources (rowid),
+    PRIMARY KEY (tag, source)
+) WITHOUT ROWID;
+CREATE INDEX source_tags_source ON source_tags (source);
+
+CREATE VIRTUAL TABLE sources_fts USING fts5 (
+    """ + ", ".join(TEXT_COLUMNS) + """,
+    content = 'sources', content_rowid = 'rowid', tokenize = 'trigram'
+);
+""" + "".join(
+    f"CREATE INDEX sources_{column} ON sources ({column});\n" for column in FACET_COLUMNS
+)
+
+# Header bytes holding the version of the SQLite library that last wrote
+# the file; ignored when deciding whether a rebuilt database changed.
+_LIBRARY_VERSION_BYTES = slice(92, 100)
+
+
+def _text(value: dict | None, lang: str) -> str | None:
+    return (value or {}).get(lang)
+
+
+def _lines(value: dict | None, lang: str) -> str | None:
+    items = (value or {}).get(lang)
+    return "\n".join(items) if items else None
+
+
+def build_database(path: Path, sources: list[dict], metadata: dict) -> None:
+    """Create a fresh database at `path` from index records."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO metadata VALUES (?, ?)",
+            sorted({**metadata, "db_version": DB_VERSION}.items()),
+        )
+        for rowid, source in enumerate(sources, start=1):
+            name, description = source.get("name"), source.get("description")
+            content = source.get("data_content")
+            conn.execute(
+                "INSERT INTO sources VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    rowid, source["id"],
+                    _text(name, "en"), _text(name, "zh"),
+                    _text(description, "en"), _text(description, "zh"),
+                    _lines(content, "en"), _lines(content, "zh"),
+                    source.get("website"), source.get("data_url"), source.get("api_url"),
+                    source.get("authority_level"), source.get("country"),
+                    source.get("geographic_scope"), source.get("update_frequency"),
+                    int(source["has_api"]), source["file_path"],
+                    json.dumps(source, ensure_ascii=False, sort_keys=True),
+                ),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO source_domains VALUES (?, ?)",
+                [(domain, rowid) for domain in source.get("domains", [])],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO source_tags VALUES (?, ?)",
+                [(tag, rowid) for tag in source.get("tags", [])],
+            )
+        conn.execute("INSERT INTO sources_fts (sources_fts) VALUES ('rebuild')")
+        conn.commit()
+        conn.execute("INSERT INTO sources_fts (sources_fts) VALUES ('optimize')")
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def connect(path: Path = SQLITE_PATH) -> sqlite3.Connection:
+    """Open the catalog database read-only with memory-mapped I/O."""
+    conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro&immutable=1", uri=True)
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def search_text(conn: sqlite3.Connection, term: str) -> list[sqlite3.Row]:
+    """Sources whose name, description or data_content contains `term`, ignoring ASCII case.
+
+    Rows come in catalog order. Terms of three or more characters use the
+    FTS index; shorter ones are matched with LIKE, which scans `sources`.
+    """
+    if len(term) >= TRIGRAM:
+        return conn.execute(
+            "SELECT sources.* FROM sources_fts JOIN sources ON sources.rowid = sources_fts.rowid"
+            " WHERE sources_fts MATCH ? ORDER BY sources.rowid",
+            ('"' + term.replace('"', '""') + '"',),
+        ).fetchall()
+    pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    where = " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in TEXT_COLUMNS)
+    return conn.execute(
+        f"SELECT * FROM sources WHERE {where} ORDER BY rowid", [pattern] * len(TEXT_COLUMNS)
+    ).fetchall()
+
+
+def read_metadata(path: Path = SQLITE_PATH) -> dict[str, str] | None:
+    """The metadata table of an existing database, or None if it cannot be read."""
+    if not Path(path).exists():
+        return None
+    try:
+        conn = connect(path)
+        try:
+            return dict(conn.execute("SELECT key, value FROM metadata").fetchall())
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError:
+        return None
+
+
+def same_database(a: bytes, b: bytes) -> bool:
+    """True if two database images differ at most in the writer's library version."""
+    mask = bytes(_LIBRARY_VERSION_BYTES.stop - _LIBRARY_VERSION_BYTES.start)
+
+    def normalized(image: bytes) -> bytes:
+        return image[:_LIBRARY_VERSION_BYTES.start] + mask + image[_LIBRARY_VERSION_BYTES.stop:]
+
+    return len(a) == len(b) and normalized(a) == normalized(b)
+
+
+def render_database(sources: list[dict], metadata: dict) -> bytes:
+    """Build the database in a scratch directory and return the file's bytes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / SQLITE_PATH.name
+        build_database(path, sources, metadata)
+        return path.read_bytes()
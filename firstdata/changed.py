@@ -0,0 +1,195 @@
+"""Check only the source files a branch touches.
+
+Per-file rules run on the changed files alone. Cross-file rules (id
+uniqueness, domain case) compare the changed files against the last
+published index instead of re-reading the tree: all-sources.json gives
+the id and domains of every other file, and build-manifest.json records
+each file's git blob hash, so `git ls-files -s` tells us whether the
+index still describes the unchanged files. When it does not, callers
+fall back to a full scan.
+"""
+
+import json
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+from firstdata.checks import run_checks
+from firstdata.loader import (
+    INDEXES_DIR,
+    REPO_ROOT,
+    SOURCES_DIR,
+    Catalog,
+    load_catalog,
+    path_key,
+    relative_path,
+    source_domains,
+    source_id,
+)
+
+CHANGED_RULES = ["parse_errors", "schema", "duplicate_ids", "domain_case"]
+
+
+@dataclass
+class ChangeSet:
+    """Source files that differ from the merge base, relative to SOURCES_DIR."""
+
+    modified: list[str]
+    """Added or modified files that exist in the working tree."""
+    deleted: list[str]
+
+    @property
+    def touched(self) -> set[str]:
+        return set(self.modified) | set(self.deleted)
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=REPO_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def _source_path(repo_path: str) -> str | None:
+    path = REPO_ROOT / repo_path
+    if path.suffix != ".json" or SOURCES_DIR not in path.parents:
+        return None
+    return relative_path(path)
+
+
+def changed_sources(base: str) -> ChangeSet:
+    """Source files changed between the merge base with `base` and the working tree."""
+    merge_base = _git("merge-base", base, "HEAD").strip()
+    sources = str(SOURCES_DIR.relative_to(REPO_ROOT))
+    modified, deleted = set(), set()
+
+    fields = _git("diff", "--name-status", "--no-renames", "-z", merge_base, "--", sources).split("\0")
+    for status, repo_path in zip(fields[0::2], fields[1::2]):
+        file_path = _source_path(repo_path)
+        if file_path is not None:
+            (deleted if status == "D" else modified).add(file_path)
+
+    untracked = _git("ls-files", "--others", "--exclude-standard", "-z", "--", sources)
+    for repo_path in filter(None, untracked.split("\0")):
+        file_path = _source_path(repo_path)
+        if file_path is not None:
+            modified.add(file_path)
+
+    return ChangeSet(sorted(modified), sorted(deleted))
+
+
+def tracked_hashes() -> dict[str, str]:
+    """file_path -> git blob hash for every tracked source file, without reading any."""
+    sources = str(SOURCES_DIR.relative_to(REPO_ROOT))
+    hashes = {}
+    for entry in filter(None, _git("ls-files", "-s", "-z", "--", sources).split("\0")):
+        meta, repo_path = entry.split("\t", 1)
+        file_path = _source_path(repo_path)
+        if file_path is not None:
+            hashes[file_path] = meta.split()[1]
+    return hashes
+
+
+@dataclass
+class PublishedIndex:
+    manifest: dict[str, str]
+    """file_path -> git blob hash of the files the index was built from."""
+    records: dict[str, dict]
+    """file_path -> {"id", "domains"} for every indexed source."""
+
+
+def load_published_index(indexes_dir: Path = INDEXES_DIR) -> PublishedIndex | None:
+    """Read the committed index, or return None if it is missing or inconsistent."""
+    try:
+        with open(indexes_dir / "build-manifest.json", encoding="utf-8") as f:
+            manifest = json.load(f)["files"]
+        with open(indexes_dir / "all-sources.json", encoding="utf-8") as f:
+            sources = json.load(f)["sources"]
+    except (OSError, KeyError, json.JSONDecodeError):
+        return None
+
+    records = {s["file_path"]: {"id": s["id"], "domains": s.get("domains", [])} for s in sources}
+    if records.keys() != manifest.keys():
+        return None
+    return PublishedIndex(manifest, records)
+
+
+def index_is_fresh(index: PublishedIndex, changes: ChangeSet) -> bool:
+    """True when the index matches git for every source file outside the change set."""
+    touched = changes.touched
+    indexed = {p: h for p, h in index.manifest.items() if p not in touched}
+    tracked = {p: h for p, h in tracked_hashes().items() if p not in touched}
+    return indexed == tracked
+
+
+def _unchanged_records(index: PublishedIndex, changes: ChangeSet) -> list[tuple[str, dict]]:
+    touched = changes.touched
+    return [(p, r) for p, r in index.records.items() if p not in touched]
+
+
+def _duplicate_ids_against(index: PublishedIndex, changes: ChangeSet):
+    """duplicate_ids rule comparing changed files with the indexed ids of all others."""
+    def check(catalog: Catalog) -> list[dict]:
+        files_by_id: dict[str, list[str]] = defaultdict(list)
+        for file_path, record in _unchanged_records(index, changes):
+            files_by_id[record["id"]].append(file_path)
+        changed_ids = set()
+        for f in catalog.valid_files:
+            id_ = source_id(f.data)
+            if id_ is not None:
+                files_by_id[id_].append(f.file_path)
+                changed_ids.add(id_)
+
+        return [
+            {"id": id_, "files": sorted(files_by_id[id_], key=path_key)}
+            for id_ in sorted(changed_ids)
+            if len(files_by_id[id_]) > 1
+        ]
+
+    return check
+
+
+def _domain_case_against(index: PublishedIndex, changes: ChangeSet):
+    """domain_case rule comparing changed files with the indexed domains of all others."""
+    def check(catalog: Catalog) -> list[dict]:
+        variants: dict[str, dict[str, list[str]]] = defaultdict(lambda: defaultdict(list))
+        for file_path, record in _unchanged_records(index, changes):
+            for domain in record["domains"]:
+                variants[domain.lower()][domain].append(file_path)
+        changed_domains = set()
+        for f in catalog.valid_files:
+            for domain in source_domains(f.data):
+                variants[domain.lower()][domain].append(f.file_path)
+                changed_domains.add(domain.lower())
+
+        return [
+            {"normalized": normalized, "variants": dict(variants[normalized])}
+            for normalized in sorted(changed_domains)
+            if len(variants[normalized]) > 1
+        ]
+
+    return check
+
+
+def run_changed_checks(base: str) -> dict:
+    """Check the files changed since `base`; fall back to a full scan if the index is stale."""
+    changes = changed_sources(base)
+    index = load_published_index()
+    if index is None or not index_is_fresh(index, changes):
+        report = run_checks(load_catalog(), CHANGED_RULES)
+        report["mode"] = "full (index stale)"
+        return report
+
+    catalog = load_catalog(paths=[SOURCES_DIR / p for p in changes.modified])
+    report = run_checks(
+        catalog,
+        CHANGED_RULES,
+        overrides={
+            "duplicate_ids": _duplicate_ids_against(index, changes),
+            "domain_case": _domain_case_against(index, changes),
+        },
+    )
+    report["mode"] = "changed"
+    report["changed_files"] = changes.modified
+    report["deleted_files"] = changes.deleted
+    return report
@@ -0,0 +1,198 @@
+"""Rule engine running every catalog check over one shared parse.
+
+A rule is a function that takes a Catalog and returns a list of finding
+dicts. Register it with the @rule decorator; run_checks() runs the
+selected rules, times each one and assembles a single JSON report.
+Only blocking rules fail CI; the taxonomy rules are reported but do not
+block until the directory migration agreed in R4 is complete.
+"""
+
+import datetime
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable
+
+from firstdata.duplicates import find_near_duplicates
+from firstdata.loader import SCHEMA_PATH, Catalog, source_domains, source_id
+from firstdata.taxonomy import (
+    check_directory_underscores,
+    check_domain_format_conflicts,
+    check_duplicate_paths,
+    check_illegitimate_l1,
+    load_all_sources,
+)
+from firstdata.validator import UnsupportedSchemaError, load_validator
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    func: Callable[[Catalog], list[dict]]
+    severity: str
+    blocking: bool
+    description: str
+
+
+RULES: dict[str, Rule] = {}
+
+
+def rule(name: str, *, severity: str, blocking: bool):
+    """Register a check function under `name`; its docstring is the description."""
+    def register(func: Callable[[Catalog], list[dict]]) -> Callable[[Catalog], list[dict]]:
+        RULES[name] = Rule(name, func, severity, blocking, (func.__doc__ or "").strip())
+        return func
+    return register
+
+
+def find_duplicate_ids(catalog: Catalog) -> dict[str, list[str]]:
+    """Return id -> file paths for every id used by more than one file."""
+    files_by_id: dict[str, list[str]] = defaultdict(list)
+    for f in catalog.valid_files:
+        id_ = source_id(f.data)
+        if id_ is not None:
+            files_by_id[id_].append(f.file_path)
+    return {id_: paths for id_, paths in files_by_id.items() if len(paths) > 1}
+
+
+def find_domain_case_variants(catalog: Catalog) -> dict[str, dict[str, list[str]]]:
+    """Return lowercased domain -> {variant: file paths} where variants differ in case."""
+    domain_variants: dict[str, dict[str, list[str]]] = defaultdict(lambda: defaultdict(list))
+    for f in catalog.valid_files:
+        for domain in source_domains(f.data):
+            domain_variants[domain.lower()][domain].append(f.file_path)
+    return {
+        normalized: dict(variants)
+        for normalized, variants in sorted(domain_variants.items())
+        if len(variants) > 1
+    }
+
+
+@rule("parse_errors", severity="error", blocking=True)
+def check_parse_errors(catalog: Catalog) -> list[dict]:
+    """Files that are not readable JSON objects."""
+    return [{"file": f.file_path, "message": f.error} for f in catalog.errors]
+
+
+@rule("schema", severity="error", blocking=True)
+def check_schema(catalog: Catalog) -> list[dict]:
+    """Files that do not validate against datasource-schema.json."""
+    try:
+        validator = load_validator(SCHEMA_PATH)
+    except UnsupportedSchemaError:
+        return _check_schema_jsonschema(catalog)
+    return [
+        {"file": f.file_path, "path": err.path, "message": err.message}
+        for f in catalog.valid_files
+        for err in validator.iter_errors(f.data)
+    ]
+
+
+def _check_schema_jsonschema(catalog: Catalog) -> list[dict]:
+    """Generic fallback for schemas the compiled validator cannot handle."""
+    from jsonschema import Draft7Validator
+
+    with open(SCHEMA_PATH, encoding="utf-8") as f:
+        validator = Draft7Validator(json.load(f))
+    return [
+        {"file": f.file_path, "path": err.json_path, "message": err.message}
+        for f in catalog.valid_files
+        for err in validator.iter_errors(f.data)
+    ]
+
+
+@rule("duplicate_ids", severity="error", blocking=True)
+def check_duplicate_ids(catalog: Catalog) -> list[dict]:
+    """Ids used by more than one source file."""
+    return [{"id": id_, "files": paths} for id_, paths in find_duplicate_ids(catalog).items()]
+
+
+@rule("domain_case", severity="error", blocking=True)
+def check_domain_case(catalog: Catalog) -> list[dict]:
+    """Domains spelled with different capitalizations."""
+    return [
+        {"normalized": normalized, "variants": variants}
+        for normalized, variants in find_domain_case_variants(catalog).items()
+    ]
+
+
+@rule("duplicate_paths", severity="warning", blocking=False)
+def check_duplicate_path_rule(catalog: Catalog) -> list[dict]:
+    """Same country/entity catalogued under several L1 directories."""
+    return check_duplicate_paths(load_all_sources(catalog))
+
+
+@rule("near_duplicates", severity="warning", blocking=False)
+def check_near_duplicates(catalog: Catalog) -> list[dict]:
+    """Sources sharing a host and most of their description (same organization, several ids)."""
+    files = {source_id(f.data): f.file_path for f in catalog.valid_files}
+    clusters = find_near_duplicates([s for s in catalog.sources if source_id(s) is not None])
+    return [{**c, "files": [files[id_] for id_ in c["ids"]]} for c in clusters]
+
+
+@rule("illegitimate_l1", severity="error", blocking=False)
+def check_illegitimate_l1_rule(catalog: Catalog) -> list[dict]:
+    """L1 directories other than countries/ and international/ (R4 consensus)."""
+    return check_illegitimate_l1(load_all_sources(catalog))
+
+
+@rule("directory_underscores", severity="error", blocking=False)
+def check_directory_underscore_rule(catalog: Catalog) -> list[dict]:
+    """Directory names that are not kebab-case."""
+    return check_directory_underscores(load_all_sources(catalog))
+
+
+@rule("domain_format_conflicts", severity="info", blocking=False)
+def check_domain_format_rule(catalog: Catalog) -> list[dict]:
+    """Same domain concept written with different separators."""
+    conflicts, _ = check_domain_format_conflicts(load_all_sources(catalog))
+    return conflicts
+
+
+def run_checks(
+    catalog: Catalog,
+    names: list[str] | None = None,
+    overrides: dict[str, Callable[[Catalog], list[dict]]] | None = None,
+) -> dict:
+    """Run the named rules (default: all) and return the combined report.
+
+    `overrides` swaps in a different implementation for some rules while
+    keeping their name, severity and blocking flag, e.g. to check a partial
+    catalog against a published index.
+    """
+    selected = [RULES[name] for name in names] if names else list(RULES.values())
+    overrides = overrides or {}
+    results = {}
+    started = time.perf_counter()
+    for r in selected:
+        t0 = time.perf_counter()
+        try:
+            items = overrides.get(r.name, r.func)(catalog)
+        except Exception as e:
+            # One broken rule, e.g. on data the schema rule rejects, must not hide the others' findings.
+            items = [{"message": f"rule failed: {type(e).__name__}: {e}"}]
+        results[r.name] = {
+            "severity": r.severity,
+            "blocking": r.blocking,
+            "description": r.description,
+            "count": len(items),
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3),
+            "items": items,
+        }
+
+    failed = [name for name, result in results.items() if result["blocking"] and result["count"]]
+    return {
+        "scan_date": datetime.date.today().isoformat(),
+        "total_sources": len(catalog),
+        "rules": results,
+        "summary": {
+            "blocking": sum(results[name]["count"] for name in failed),
+            "errors": sum(r["count"] for r in results.values() if r["severity"] == "error"),
+            "warnings": sum(r["count"] for r in results.values() if r["severity"] == "warning"),
+            "info": sum(r["count"] for r in results.values() if r["severity"] == "info"),
+            "failed_rules": failed,
+            "pass": not failed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        },
+    }
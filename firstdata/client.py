@@ -0,0 +1,485 @@
+"""Asyncio client for the FirstData MCP tools.
+
+One FirstDataClient keeps a pool of keep-alive HTTP/1.1 connections to
+an MCP endpoint, the hosted one or a server started with
+scripts/serve_mcp.py, and speaks streamable HTTP over them: a session is
+initialized on first use and every tool call is one POST, answered as
+JSON or as a server-sent event stream.
+
+On top of the plain call:
+
+- get_source() splits id lists into batches of BATCH_SIZE ids, the
+  grouping the MCP tool description recommends, and sends the batches
+  concurrently, up to the pool size at a time.
+- Identical calls made while one is in flight share its response
+  instead of being sent twice.
+- Connection failures, timeouts and 429/502/503/504 responses are
+  retried with exponential backoff and jitter, honouring Retry-After
+  (seconds or an HTTP date) up to MAX_RETRY_AFTER seconds.
+- A pooled connection the server closed while it sat idle is replaced
+  by a new one, once, for any call: the request got no answer at all.
+- With a QueryCache (firstdata.cache), repeated calls are answered
+  locally, and get_source only requests the ids it has not seen.
+- With a token, remaining_daily from POST /api/token/verify is tracked
+  locally, and calls are refused with QuotaExhausted once they would dip
+  into the last `quota_reserve` calls, rather than failing server-side.
+
+HTTP/2 would need a third-party library; pooled keep-alive connections
+give the same connection reuse with the standard library alone.
+"""
+
+import asyncio
+import json
+import random
+import ssl
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Iterable
+from urllib.parse import urlsplit
+
+from firstdata.cache import QueryCache, cache_key
+
+DEFAULT_URL = "https://firstdata.deepminer.com.cn/mcp"
+PROTOCOL_VERSION = "2025-03-26"
+
+BATCH_SIZE = 20
+POOL_SIZE = 8
+MAX_RETRIES = 3
+BACKOFF = 0.5
+TIMEOUT = 30.0
+MAX_RETRY_AFTER = 60.0
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class ClientError(Exception):
+    """Base class of the errors raised by FirstDataClient."""
+
+
+class HttpError(ClientError):
+    def __init__(self, status: int, body: bytes, retry_after: float | None = None) -> None:
+        super().__init__(f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class ToolCallError(ClientError):
+    """A JSON-RPC error, or a tool result with isError set."""
+
+
+class QuotaExhausted(ClientError):
+    """The call would use up the reserved part of the daily quota."""
+
+
+class _StaleConnection(ConnectionResetError):
+    """A reused keep-alive connection closed before any byte of the response."""
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+        self.reused = False
+
+    def close(self) -> None:
+        self.closed = True
+        self.writer.close()
+
+    async def request(self, method: str, target: str, headers: dict[str, str], body: bytes) -> tuple:
+        """Send one request and read the whole response: (status, headers, body)."""
+        head = [f"{method} {target} HTTP/1.1", *(f"{k}: {v}" for k, v in headers.items())]
+        head.append(f"Content-Length: {len(body)}")
+        try:
+            self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+        except ConnectionError as e:
+            if self.reused:
+                raise _StaleConnection(str(e)) from e
+            raise
+        if not status_line:
+            raise (_StaleConnection if self.reused else ConnectionResetError)("connection closed by the server")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in response_headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while size := int((await self.reader.readline()).split(b";")[0], 16):
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # trailers
+            payload = b"".join(chunks)
+        elif "content-length" in response_headers:
+            payload = await self.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            payload = await self.reader.read()
+            self.closed = True
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, response_headers, payload
+
+
+class ConnectionPool:
+    """At most `size` keep-alive connections to one host, reused LIFO."""
+
+    def __init__(self, url: str, size: int = POOL_SIZE) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.tls = parts.scheme == "https"
+        self.port = parts.port or (443 if self.tls else 80)
+        self._idle: list[_Connection] = []
+        self._slots = asyncio.Semaphore(size)
+        self._ssl = ssl.create_default_context() if self.tls else None
+
+    @asynccontextmanager
+    async def connection(self, fresh: bool = False) -> AsyncIterator[_Connection]:
+        """A connection for one request: the last idle one, or a new one if none is idle or `fresh`."""
+        async with self._slots:
+            conn = self._idle.pop() if self._idle and not fresh else None
+            if conn is not None:
+                conn.reused = True
+            else:
+                reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+                conn = _Connection(reader, writer)
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            if not conn.closed:
+                self._idle.append(conn)
+
+    def close(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+
+def _parse_message(headers: dict[str, str], body: bytes, request_id: int) -> dict:
+    """The JSON-RPC response to `request_id` in a JSON or server-sent event body."""
+    if headers.get("content-type", "").startswith("text/event-stream"):
+        for event in body.decode("utf-8").replace("\r\n", "\n").split("\n\n"):
+            data = "\n".join(line[5:].lstrip() for line in event.split("\n") if line.startswith("data:"))
+            if data:
+                message = json.loads(data)
+                if isinstance(message, dict) and message.get("id") == request_id:
+                    return message
+        raise ClientError(f"no response to request {request_id} in the event stream")
+    return json.loads(body)
+
+
+def _retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header, delay-seconds or HTTP-date, within [0, MAX_RETRY_AFTER]."""
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, OverflowError):
+            return None
+    if delay != delay:  # NaN
+        return None
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+def _tool_result(result: dict):
+    """The payload of a tools/call result: structured content, else its text parsed as JSON if possible."""
+    texts = [item.get("text", "") for item in result.get("content", []) if item.get("type") == "text"]
+    if result.get("isError"):
+        raise ToolCallError("\n".join(texts) or "tool call failed")
+    if "structuredContent" in result:
+        return result["structuredContent"]
+    text = "\n".join(texts)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+class FirstDataClient:
+    """Pooled, batching, quota-aware client for one MCP endpoint.
+
+        async with FirstDataClient(token=os.environ["FIRSTDATA_API_KEY"]) as client:
+            sources = await client.get_source(ids)
+    """
+
+    def __init__(
+        self,
+        url: str = DEFAULT_URL,
+        token: str | None = None,
+        *,
+        pool_size: int = POOL_SIZE,
+        batch_size: int = BATCH_SIZE,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF,
+        timeout: float = TIMEOUT,
+        quota_reserve: int = 0,
+        cache: QueryCache | None = None,
+    ) -> None:
+        parts = urlsplit(url)
+        self.url = url
+        self.path = parts.path or "/"
+        self.token = token
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.quota_reserve = quota_reserve
+        self.cache = cache
+        self.remaining_daily: int | None = None
+        self._quota_checked = False
+        self._pool = ConnectionPool(url, pool_size)
+        self._session_id: str | None = None
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._quota_lock = asyncio.Lock()
+        self._next_id = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def __aenter__(self) -> "FirstDataClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def _headers(self) -> dict[str, str]:
+        default_port = 443 if self._pool.tls else 80
+        headers = {
+            "Host": self._pool.host if self._pool.port == default_port else f"{self._pool.host}:{self._pool.port}",
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if self._session_id:
+            headers["Mcp-Session-Id"] = self._session_id
+        return headers
+
+    async def _post(self, path: str, payload: dict, retries: int | None = None) -> tuple[dict[str, str], bytes]:
+        """POST JSON with retries; the headers and body of a 2xx response."""
+        retries = self.max_retries if retries is None else retries
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        for attempt in range(retries + 1):
+            try:
+                status, headers, response = await self._send(path, body)
+                if status < 300:
+                    return headers, response
+                raise HttpError(status, response, _retry_after(headers.get("retry-after")))
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError) as e:
+                if isinstance(e, HttpError) and e.status not in RETRY_STATUSES or attempt == retries:
+                    raise
+                if isinstance(e, HttpError) and e.status == 429:
+                    self._quota_checked = False
+                delay = self.backoff * 2 ** attempt * (0.5 + random.random())
+                await asyncio.sleep(e.retry_after if isinstance(e, HttpError) and e.retry_after is not None else delay)
+        raise AssertionError("unreachable")
+
+    async def _send(self, path: str, body: bytes) -> tuple:
+        """POST once: (status, headers, body), on a new connection if the pooled one went stale."""
+        try:
+            async with self._pool.connection() as conn:
+                return await asyncio.wait_for(conn.request("POST", path, self._headers(), body), self.timeout)
+        except _StaleConnection:
+            # The server closed it while idle, so it never saw the request.
+            async with self._pool.connection(fresh=True) as conn:
+                return await asyncio.wait_for(conn.request("POST", path, self._headers(), body), self.timeout)
+
+    async def _rpc(self, method: str, params: dict, retries: int | None = None) -> dict:
+        self._next_id += 1
+        request_id = self._next_id
+        headers, body = await self._post(
+            self.path, {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}, retries
+        )
+        if "mcp-session-id" in headers:
+            self._session_id = headers["mcp-session-id"]
+        message = _parse_message(headers, body, request_id)
+        if "error" in message:
+            raise ToolCallError(f"{method}: {message['error'].get('message')} ({message['error'].get('code')})")
+        return message["result"]
+
+    async def _ensure_session(self) -> None:
+        async with self._init_lock:
+            if self._initialized:
+                return
+            await self._rpc("initialize", {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "firstdata-client", "version": "0.1.0"},
+            })
+            await self._post(self.path, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+            self._initialized = True
+
+    async def verify_token(self) -> dict:
+        """POST /api/token/verify and record its remaining_daily."""
+        async with self._quota_lock:
+            return await self._verify_token()
+
+    async def _verify_token(self) -> dict:
+        if not self.token:
+            raise ClientError("verify_token needs a token")
+        _, body = await self._post("/api/token/verify", {"token": self.token})
+        data = json.loads(body)
+        info = data.get("data", data) if isinstance(data, dict) else {}
+        if isinstance(info.get("remaining_daily"), int):
+            self.remaining_daily = info["remaining_daily"]
+        self._quota_checked = True
+        return data
+
+    async def _reserve(self, calls: int) -> None:
+        """Refuse `calls` more tool calls if they would reach the reserved quota."""
+        # One verification for concurrent calls, and no call between a check and its deduction.
+        async with self._quota_lock:
+            if self.token and not self._quota_checked:
+                try:
+                    await self._verify_token()
+                except HttpError:
+                    self._quota_checked = True  # no verify endpoint, e.g. a local server
+            if self.remaining_daily is not None and self.remaining_daily - calls < self.quota_reserve:
+                raise QuotaExhausted(
+                    f"{calls} call(s) requested, {self.remaining_daily} left today, {self.quota_reserve} reserved"
+                )
+            if self.remaining_daily is not None:
+                self.remaining_daily -= calls
+
+    async def _call(
+        self, name: str, arguments: dict, retries: int | None = None, reserve: bool = True
+    ) -> tuple[str, object]:
+        """One tools/call: the index generation it reports, if any, and its decoded result.
+
+        `reserve` is false when the caller already reserved the quota for it.
+        """
+        if reserve:
+            await self._reserve(1)
+        await self._ensure_session()
+        params = {"name": name, "arguments": arguments}
+        try:
+            result = await self._rpc("tools/call", params, retries)
+        except HttpError as e:
+            if e.status != 404 or self._session_id is None:
+                raise
+            # The server dropped our session: start a new one and send the call again.
+            self._session_id, self._initialized = None, False
+            await self._ensure_session()
+            result = await self._rpc("tools/call", params, retries)
+        return (result.get("_meta") or {}).get("generation", ""), _tool_result(result)
+
+    def _cacheable(self, generation: str) -> bool:
+        """Move the cache to `generation`; False if the response is from an older one."""
+        return self.cache is not None and self.cache.set_generation(generation)
+
+    async def call_tool(self, name: str, arguments: dict, *, idempotent: bool = True, cached: bool = True):
+        """Call a tool and return its decoded result.
+
+        Concurrent identical calls of an idempotent tool share one request;
+        non-idempotent calls (ask_agent) are neither shared nor retried,
+        beyond resending on a new connection when a pooled one went stale.
+        With a cache, results are served from and stored in it unless
+        `cached` is false.
+        """
+        key = cache_key(name, arguments)
+        if self.cache is not None and cached:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+        started = time.monotonic()
+        if not idempotent:
+            generation, result = await self._call(name, arguments, retries=0)
+        else:
+            generation, result = await self._shared_call(key, name, arguments)
+        if self._cacheable(generation) and cached:
+            self.cache.put(key, result, self.cache.ttl_for(name), time.monotonic() - started)
+        return result
+
+    async def _shared_call(self, key: str, name: str, arguments: dict, reserve: bool = True):
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call(name, arguments, reserve=reserve)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved, so an unshared failure is not logged as unhandled
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def search_source(
+        self, keywords: str | Iterable[str] = (), domain: str | None = None, limit: int = 20
+    ) -> list[dict]:
+        arguments = {"keywords": [keywords] if isinstance(keywords, str) else list(keywords), "limit": limit}
+        if domain:
+            arguments["domain"] = domain
+        return await self.call_tool("search_source", arguments)
+
+    async def get_source(self, source_ids: Iterable[str], fields: list[str] | None = None) -> list[dict]:
+        """Records of the distinct `source_ids` in order, fetched in concurrent batches of `batch_size`.
+
+        Unknown ids come back as {"id": ..., "error": "Not found"} items,
+        as do ids the server's response leaves out; items are matched to
+        ids by their "id", not by their position. The quota of every batch
+        is reserved before the first is sent, so a request that does not
+        fit is refused whole. With a cache, each id is cached on its own
+        and only the missing ids are requested.
+        """
+        source_ids = list(dict.fromkeys(source_ids))
+        extra = {"fields": fields} if fields else {}
+        keys = {i: cache_key("get_source", {"source_ids": [i], **extra}) for i in source_ids}
+        found = {}
+        if self.cache is not None:
+            for source_id, key in keys.items():
+                hit = self.cache.get(key)
+                if hit is not None:
+                    found[source_id] = hit
+        missing = [i for i in source_ids if i not in found]
+
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        if batches:
+            await self._reserve(len(batches))
+        fetched = []
+
+        async def fetch(batch: list[str]) -> None:
+            started = time.monotonic()
+            arguments = {"source_ids": batch, **extra}
+            generation, items = await self._shared_call(
+                cache_key("get_source", arguments), "get_source", arguments, reserve=False
+            )
+            cost = (time.monotonic() - started) / len(batch)
+            cacheable = self._cacheable(generation)
+            by_id = {item.get("id"): item for item in items if isinstance(item, dict)}
+            for source_id in batch:
+                item = by_id.get(source_id)
+                if item is None:
+                    found[source_id] = {"id": source_id, "error": "Not found"}
+                    continue
+                found[source_id] = item
+                if cacheable:
+                    fetched.append((generation, (keys[source_id], item, self.cache.ttl, cost)))
+
+        await asyncio.gather(*(fetch(batch) for batch in batches))
+        if fetched:
+            # A later batch may have moved the cache on to a newer generation.
+            self.cache.put_many(entry for generation, entry in fetched if generation in ("", self.cache.generation))
+        return [found[i] for i in source_ids]
+
+    async def get_access_guide(self, source_id: str, operation: str, top_k: int = 3):
+        arguments = {"source_id": source_id, "operation": operation, "top_k": top_k}
+        return await self.call_tool("get_access_guide", arguments)
+
+    async def ask_agent(self, query: str, max_results: int = 5):
+        return await self.call_tool("ask_agent", {"query": query, "max_results": max_results}, idempotent=False)
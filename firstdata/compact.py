@@ -0,0 +1,70 @@
+"""Compact encoding of the grouped indexes (by-authority, by-domain, by-region).
+
+The legacy grouped indexes repeat a source's full summary entry in every
+group it belongs to, and in each of the three files. grouped.json stores
+each summary once in a `sources` table, ordered by file path, and every
+group lists integer ordinals into that table. expand_grouped() rebuilds
+any of the legacy indexes from the compact file for older clients.
+"""
+
+import json
+from pathlib import Path
+
+from firstdata.loader import INDEXES_DIR, path_key
+
+COMPACT_FORMAT = "compact-v1"
+GROUPED_PATH = INDEXES_DIR / "grouped.json"
+
+
+def _groups_key(index: dict) -> str:
+    (key,) = (k for k in index if k != "metadata")
+    return key
+
+
+def build_compact(indexes: dict[str, dict], metadata: dict) -> dict:
+    """Combine legacy grouped indexes, keyed by name (e.g. "by-domain"), into one compact index."""
+    # Keyed by file path, which is unique even when ids collide.
+    unique = {
+        entry["file_path"]: entry
+        for index in indexes.values()
+        for entries in index[_groups_key(index)].values()
+        for entry in entries
+    }
+    table = sorted(unique.values(), key=lambda entry: path_key(entry["file_path"]))
+    ordinals = {entry["file_path"]: i for i, entry in enumerate(table)}
+
+    compact = {}
+    for name, index in indexes.items():
+        key = _groups_key(index)
+        compact[name] = {
+            "metadata": index["metadata"],
+            key: {
+                group: [ordinals[entry["file_path"]] for entry in entries]
+                for group, entries in index[key].items()
+            },
+        }
+
+    return {
+        "metadata": {**metadata, "format": COMPACT_FORMAT},
+        "sources": table,
+        "indexes": compact,
+    }
+
+
+def expand_grouped(compact: dict, name: str) -> dict:
+    """Rehydrate the legacy index `name` (e.g. "by-domain") from a compact index."""
+    if compact["metadata"].get("format") != COMPACT_FORMAT:
+        raise ValueError(f"unsupported grouped index format: {compact['metadata'].get('format')!r}")
+    table = compact["sources"]
+    index = compact["indexes"][name]
+    key = _groups_key(index)
+    return {
+        "metadata": index["metadata"],
+        key: {group: [table[i] for i in ordinals] for group, ordinals in index[key].items()},
+    }
+
+
+def load_grouped_index(name: str, path: Path = GROUPED_PATH) -> dict:
+    """Load the legacy-shaped index `name` from the compact grouped.json."""
+    with open(path, encoding="utf-8") as f:
+        return expand_grouped(json.load(f), name)
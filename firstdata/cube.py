@@ -0,0 +1,134 @@
+"""Cross-tab statistics cube (cube.json) over the structured fields of every source.
+
+The base cube counts sources per combination of authority_level,
+geographic_scope, update_frequency, country and has_api. A source has
+several domains, so adding domain to the same cube would count a source
+once per domain in every roll-up; domains therefore live in a second
+cube over the same dimensions plus domain, which is only used when a
+query groups by domain or filters on a single domain.
+
+Values are encoded as in the facet index (firstdata.facets), so has_api
+is "true" or "false" and a filter is spelled the same for both indexes.
+Dimension values are stored once per dimension and cells refer to them
+by position, so the file stays small while any roll-up or slice is a
+pass over at most a few thousand cells instead of over the sources.
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+
+from firstdata.facets import facet_key
+from firstdata.loader import INDEXES_DIR
+
+CUBE_PATH = INDEXES_DIR / "cube.json"
+
+DIMENSIONS = ["authority_level", "geographic_scope", "update_frequency", "country", "has_api"]
+DOMAIN = "domain"
+
+
+def _value(value):
+    return None if value is None else facet_key(value)
+
+
+def _coordinates(source: dict) -> tuple:
+    return tuple(_value(source.get(dimension)) for dimension in DIMENSIONS)
+
+
+def _sort_key(value) -> tuple:
+    return (value is None, str(value))
+
+
+def _encode(counts: Counter, dimensions: list[str], values: dict[str, list]) -> list[list]:
+    positions = {d: {v: i for i, v in enumerate(values[d])} for d in dimensions}
+    cells = [
+        [positions[d][v] for d, v in zip(dimensions, cell)] + [count]
+        for cell, count in counts.items()
+    ]
+    return sorted(cells)
+
+
+def build_cube(sources: list[dict], now: str) -> dict:
+    base = Counter(_coordinates(s) for s in sources)
+    by_domain = Counter(
+        (*_coordinates(s), domain) for s in sources for domain in dict.fromkeys(s.get("domains", []))
+    )
+
+    values = {
+        dimension: sorted({cell[i] for cell in base}, key=_sort_key)
+        for i, dimension in enumerate(DIMENSIONS)
+    }
+    values[DOMAIN] = sorted({cell[-1] for cell in by_domain})
+
+    return {
+        "metadata": {
+            "generated_at": now,
+            "total_sources": len(sources),
+        },
+        "values": values,
+        "cubes": {
+            "base": {"dimensions": DIMENSIONS, "cells": _encode(base, DIMENSIONS, values)},
+            "domain": {
+                "dimensions": [*DIMENSIONS, DOMAIN],
+                "cells": _encode(by_domain, [*DIMENSIONS, DOMAIN], values),
+            },
+        },
+    }
+
+
+class Cube:
+    """Roll-ups and slices of cube.json."""
+
+    def __init__(self, data: dict) -> None:
+        self.values: dict[str, list] = data["values"]
+        self.cubes: dict[str, tuple[list[str], list[tuple]]] = {}
+        for name, cube in data["cubes"].items():
+            dimensions = cube["dimensions"]
+            cells = [
+                (*(self.values[d][i] for d, i in zip(dimensions, cell)), cell[-1])
+                for cell in cube["cells"]
+            ]
+            self.cubes[name] = (dimensions, cells)
+
+    def rollup(self, by: list[str] = (), where: dict | None = None) -> dict[tuple, int]:
+        """Number of sources per combination of the `by` dimensions, restricted to `where`.
+
+        `where` maps a dimension to a value or a list of accepted values;
+        has_api may be given as a bool or as "true"/"false".
+        A list of domains is only allowed when grouping by domain, since a
+        source with two of them would otherwise be counted twice.
+        """
+        where = {d: [_value(x) for x in (v if isinstance(v, list) else [v])] for d, v in (where or {}).items()}
+        uses_domain = DOMAIN in by or DOMAIN in where
+        if DOMAIN in where and DOMAIN not in by and len(where[DOMAIN]) > 1:
+            raise ValueError("filtering on several domains requires grouping by domain")
+
+        dimensions, cells = self.cubes["domain" if uses_domain else "base"]
+        for dimension in [*by, *where]:
+            if dimension not in dimensions:
+                raise KeyError(f"unknown dimension {dimension!r}; expected one of {', '.join(dimensions)}")
+        group = [dimensions.index(d) for d in by]
+        filters = [(dimensions.index(d), set(accepted)) for d, accepted in where.items()]
+
+        result: dict[tuple, int] = {}
+        for cell in cells:
+            if all(cell[i] in accepted for i, accepted in filters):
+                key = tuple(cell[i] for i in group)
+                result[key] = result.get(key, 0) + cell[-1]
+        return dict(sorted(result.items(), key=lambda item: tuple(map(_sort_key, item[0]))))
+
+    def count(self, where: dict | None = None) -> int:
+        """Number of sources matching `where`."""
+        return self.rollup((), where).get((), 0)
+
+
+_cubes: dict[Path, Cube] = {}
+
+
+def load_cube(path: Path = CUBE_PATH) -> Cube:
+    """Load cube.json, once per process."""
+    path = Path(path).resolve()
+    if path not in _cubes:
+        with open(path, encoding="utf-8") as f:
+            _cubes[path] = Cube(json.load(f))
+    return _cubes[path]
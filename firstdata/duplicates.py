@@ -0,0 +1,136 @@
+"""Near-duplicate sources: the same organization catalogued under several ids.
+
+Two descriptions of one organization are written by different people and
+share few phrases, but they point at the same site. The similarity of
+two sources is therefore the mean of two Jaccard coefficients: of their
+hosts (website and data_url, without "www.") and of the distinct words
+of their descriptions.
+
+Candidate pairs come from MinHash with LSH banding instead of comparing
+every pair. Each of the two sets gets a signature of BINS values by
+one-permutation hashing: every element is hashed once, the hash picks a
+bin and the bin keeps its smallest value, and empty bins borrow the
+value of the next non-empty bin. The two signatures are concatenated and
+cut into bands of ROWS values; sources with an identical band share a
+bucket, and only sources sharing a bucket are compared, with the exact
+coefficients. Pairs scoring at least THRESHOLD are merged into clusters.
+"""
+
+import hashlib
+from urllib.parse import urlsplit
+
+from firstdata.text import field_texts, tokenize
+
+BINS = 32
+ROWS = 4
+THRESHOLD = 0.55
+
+# Host sets hold one or two elements; an empty one must not match another.
+_EMPTY = -1
+
+
+def source_host(url) -> str | None:
+    """Lowercased host of a URL without a leading "www.", or None."""
+    if not isinstance(url, str):
+        return None
+    try:
+        host = urlsplit(url.strip()).hostname
+    except ValueError:
+        return None
+    return host.removeprefix("www.") if host else None
+
+
+def source_sets(source: dict) -> tuple[frozenset[str], frozenset[str]]:
+    """(hosts, description words) of a source."""
+    hosts = {source_host(source.get(key)) for key in ("website", "data_url")}
+    words = {t for text in field_texts(source.get("description")) for t in tokenize(text)}
+    return frozenset(hosts - {None}), frozenset(words)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+def signature(values: frozenset[str], bins: int = BINS) -> list[int]:
+    """One-permutation MinHash signature of a set, densified by rotation."""
+    if not values:
+        return [_EMPTY] * bins
+    slots: list[int | None] = [None] * bins
+    for value in values:
+        h = _hash(value)
+        b, rest = h % bins, h // bins
+        if slots[b] is None or rest < slots[b]:
+            slots[b] = rest
+    filled = []
+    for b in range(bins):
+        step = 0
+        while slots[(b + step) % bins] is None:
+            step += 1
+        filled.append(slots[(b + step) % bins] * bins + step)
+    return filled
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+def similarity(a: tuple[frozenset, frozenset], b: tuple[frozenset, frozenset]) -> float:
+    return (jaccard(a[0], b[0]) + jaccard(a[1], b[1])) / 2
+
+
+def candidate_pairs(signatures: list[list[int]], rows: int = ROWS) -> set[tuple[int, int]]:
+    """Positions of every two signatures with at least one identical band."""
+    pairs = set()
+    for start in range(0, len(signatures[0]) if signatures else 0, rows):
+        buckets: dict[tuple, list[int]] = {}
+        for i, sig in enumerate(signatures):
+            band = tuple(sig[start:start + rows])
+            if _EMPTY not in band:
+                buckets.setdefault(band, []).append(i)
+        for members in buckets.values():
+            for x, i in enumerate(members):
+                pairs.update((i, j) for j in members[x + 1:])
+    return pairs
+
+
+def find_near_duplicates(sources: list[dict], threshold: float = THRESHOLD) -> list[dict]:
+    """Clusters of sources whose pairwise similarity reaches `threshold`.
+
+    Each cluster is {"ids", "similarity", "pairs"}: its ids, its highest
+    pair score and every matching pair as [id, id, score], best first.
+    """
+    sets = [source_sets(s) for s in sources]
+    signatures = [signature(hosts) + signature(words) for hosts, words in sets]
+
+    matches = []
+    for i, j in candidate_pairs(signatures):
+        score = similarity(sets[i], sets[j])
+        if score >= threshold:
+            matches.append((i, j, score))
+
+    parent = list(range(len(sources)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in matches:
+        parent[find(i)] = find(j)
+
+    clusters: dict[int, list[tuple[int, int, float]]] = {}
+    for i, j, score in matches:
+        clusters.setdefault(find(i), []).append((*sorted((i, j), key=lambda k: sources[k]["id"]), score))
+
+    result = []
+    for pairs in clusters.values():
+        pairs.sort(key=lambda p: (-p[2], sources[p[0]]["id"], sources[p[1]]["id"]))
+        ids = sorted({sources[k]["id"] for i, j, _ in pairs for k in (i, j)})
+        result.append({
+            "ids": ids,
+            "similarity": round(pairs[0][2], 3),
+            "pairs": [[sources[i]["id"], sources[j]["id"], round(score, 3)] for i, j, score in pairs],
+        })
+    return sorted(result, key=lambda c: (-c["similarity"], c["ids"]))
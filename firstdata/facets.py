@@ -0,0 +1,142 @@
+"""Bitmap facet index (facets.json) over the structured fields of every source.
+
+Bit i of a bitmap stands for the i-th source in catalog order, and every
+value of every facet (authority_level, geographic_scope, update_frequency,
+country, has_api and each domain) has the bitmap of the sources carrying
+it. Bitmaps are plain Python ints, so AND/OR/NOT over any combination of
+facets is a handful of big-integer operations and counting a result is
+int.bit_count(). In the JSON file each bitmap is a hex string.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from firstdata.loader import INDEXES_DIR
+
+FACETS_PATH = INDEXES_DIR / "facets.json"
+
+FACETS = ["authority_level", "geographic_scope", "update_frequency", "country", "has_api", "domain"]
+
+
+def facet_values(source: dict, facet: str) -> list[str]:
+    """Values of `facet` for a source, as strings; missing fields have none."""
+    if facet == "domain":
+        return list(source.get("domains", []))
+    if facet == "has_api":
+        return [facet_key(source["has_api"])]
+    value = source.get(facet)
+    return [] if value is None else [value]
+
+
+def facet_key(value) -> str:
+    """How a facet value is stored: booleans as "true"/"false", anything else as its str()."""
+    return str(value).lower() if isinstance(value, bool) else str(value)
+
+
+def build_facets(sources: list[dict], now: str) -> dict:
+    bitmaps: dict[str, dict[str, int]] = {facet: {} for facet in FACETS}
+    for i, source in enumerate(sources):
+        for facet in FACETS:
+            for value in facet_values(source, facet):
+                bitmaps[facet][value] = bitmaps[facet].get(value, 0) | (1 << i)
+
+    return {
+        "metadata": {
+            "generated_at": now,
+            "total_sources": len(sources),
+            "encoding": "hex bitmap, bit i = ids[i]",
+        },
+        "ids": [s["id"] for s in sources],
+        "facets": {
+            facet: {value: format(bitmap, "x") for value, bitmap in sorted(values.items())}
+            for facet, values in bitmaps.items()
+        },
+    }
+
+
+@dataclass
+class FacetResult:
+    ids: list[str]
+    """Ids of the matching sources, in catalog order."""
+    counts: dict[str, dict[str, int]]
+    """facet -> value -> number of matching sources with that value, for every facet not filtered on."""
+
+
+class FacetIndex:
+    def __init__(self, ids: list[str], bitmaps: dict[str, dict[str, int]]) -> None:
+        self.ids = ids
+        self.bitmaps = bitmaps
+        self.all = (1 << len(ids)) - 1
+
+    @classmethod
+    def from_json(cls, data: dict) -> "FacetIndex":
+        return cls(
+            data["ids"],
+            {
+                facet: {value: int(bitmap, 16) for value, bitmap in values.items()}
+                for facet, values in data["facets"].items()
+            },
+        )
+
+    def bitmap(self, facet: str, values) -> int:
+        """Sources having any of `values` (a single value or a list) for `facet`."""
+        if facet not in self.bitmaps:
+            raise KeyError(f"unknown facet {facet!r}; expected one of {', '.join(self.bitmaps)}")
+        if isinstance(values, (str, bool)):
+            values = [values]
+        result = 0
+        for value in values:
+            result |= self.bitmaps[facet].get(facet_key(value), 0)
+        return result
+
+    def select(self, include: dict | None = None, exclude: dict | None = None) -> int:
+        """Bitmap of sources matching every facet in `include` and no facet in `exclude`.
+
+        Both map a facet to a value or a list of values; the values of one
+        facet are alternatives (OR), distinct facets must all hold (AND).
+        """
+        result = self.all
+        for facet, values in (include or {}).items():
+            result &= self.bitmap(facet, values)
+        for facet, values in (exclude or {}).items():
+            result &= ~self.bitmap(facet, values)
+        return result
+
+    def ids_of(self, bitmap: int) -> list[str]:
+        ids = []
+        while bitmap:
+            low = bitmap & -bitmap
+            ids.append(self.ids[low.bit_length() - 1])
+            bitmap ^= low
+        return ids
+
+    def counts(self, bitmap: int, facets: list[str] | None = None) -> dict[str, dict[str, int]]:
+        """Number of sources of `bitmap` with each value of each facet, zero counts omitted."""
+        counts = {}
+        for facet in facets if facets is not None else self.bitmaps:
+            values = {}
+            for value, value_bitmap in self.bitmaps[facet].items():
+                count = (bitmap & value_bitmap).bit_count()
+                if count:
+                    values[value] = count
+            counts[facet] = values
+        return counts
+
+    def search(self, include: dict | None = None, exclude: dict | None = None) -> FacetResult:
+        """Matching ids plus facet counts over the remaining facets."""
+        bitmap = self.select(include, exclude)
+        remaining = [facet for facet in self.bitmaps if facet not in (include or {})]
+        return FacetResult(self.ids_of(bitmap), self.counts(bitmap, remaining))
+
+
+_indexes: dict[Path, FacetIndex] = {}
+
+
+def load_facet_index(path: Path = FACETS_PATH) -> FacetIndex:
+    """Load facets.json, once per process."""
+    path = Path(path).resolve()
+    if path not in _indexes:
+        with open(path, encoding="utf-8") as f:
+            _indexes[path] = FacetIndex.from_json(json.load(f))
+    return _indexes[path]
@@ -0,0 +1,234 @@
+"""Position-independent catalog image (catalog.img) queried in place through mmap.
+
+Every worker of a multi-process server needs the records, an id lookup
+and the keyword postings. Parsing all-sources.json and ngrams.bin gives
+each worker a private copy of all of them; this image holds the same
+data as flat arrays and strings that are used where they lie in a
+read-only mapping, so every worker shares the one copy in the OS page
+cache and is ready as soon as the file is mapped.
+
+Layout: a header, then u32 arrays, then the posting lists, then UTF-8
+strings. Every reference is an offset from the start of the file, and
+the arrays use the native byte order of the machine that built the
+image, which must be little-endian.
+
+    header     magic, catalog digest, source count, gram count, posting typecode
+    records    count + 1 offsets: record i is the compact JSON between two of them
+    keywords   count + 1 offsets of each source's keyword_text()
+    domains    count + 1 offsets of each source's domain_text()
+    ids        count + 1 offsets of the source ids, ordered by their UTF-8 bytes
+    positions  count catalog positions of those ids
+    grams      gram count + 1 offsets of the sorted grams' UTF-8 strings
+    postings   gram count + 1 offsets into the concatenated posting lists
+    lists      posting lists, u16 (u32 above 65535 sources)
+    strings    records, keyword texts, domain texts, ids, grams
+
+Records are in catalog order, the positions used by the posting lists.
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Iterable
+
+from firstdata.binindex import RecordLookup
+from firstdata.loader import INDEXES_DIR
+from firstdata.search import (
+    DEFAULT_LIMIT,
+    NgramIndex,
+    SearchIndex,
+    catalog_digest,
+    domain_text,
+    keyword_text,
+)
+
+IMAGE_PATH = INDEXES_DIR / "catalog.img"
+MAGIC = b"FDIMG\x00\x00\x01"
+
+HEADER = struct.Struct("<8s20sIIc3x")
+
+
+def _offsets(blobs: list[bytes], start: int) -> array:
+    offsets = array("I", [start])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    return offsets
+
+
+def build_image(sources: list[dict], hashes: dict[str, str], keywords: NgramIndex | None = None) -> bytes:
+    """The catalog.img of `sources`, the records of the files in `hashes`.
+
+    `keywords` is the NgramIndex of `sources` if the caller already has one.
+    """
+    if sys.byteorder != "little":
+        raise RuntimeError("catalog.img is little-endian and must be built on a little-endian machine")
+    count = len(sources)
+    texts = [keyword_text(s) for s in sources]
+    if keywords is None:
+        keywords = NgramIndex.build(texts)
+    postings = keywords.postings
+    grams = sorted(postings, key=lambda g: g.encode("utf-8"))
+    typecode = "H" if count <= 0xFFFF else "I"
+
+    records = [json.dumps(s, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for s in sources]
+    keyword_blobs = [text.encode("utf-8") for text in texts]
+    domain_blobs = [domain_text(s).encode("utf-8") for s in sources]
+    gram_blobs = [g.encode("utf-8") for g in grams]
+    positions = array("I", sorted(range(count), key=lambda i: sources[i]["id"].encode("utf-8")))
+    id_blobs = [sources[i]["id"].encode("utf-8") for i in positions]
+    for a, b in zip(id_blobs, id_blobs[1:]):
+        if a == b:
+            raise ValueError(f"duplicate source id: {a.decode()}")
+
+    lists = array(typecode)
+    ends = array("I", [0])
+    for gram in grams:
+        lists.extend(postings[gram])
+        ends.append(len(lists))
+    lists_bytes = lists.tobytes()
+    lists_bytes += b"\x00" * (-len(lists_bytes) % 4)
+
+    tables_size = 4 * (4 * (count + 1) + count + 2 * (len(grams) + 1))
+    strings_start = HEADER.size + tables_size + len(lists_bytes)
+    record_offsets = _offsets(records, strings_start)
+    keyword_offsets = _offsets(keyword_blobs, record_offsets[-1])
+    domain_offsets = _offsets(domain_blobs, keyword_offsets[-1])
+    id_offsets = _offsets(id_blobs, domain_offsets[-1])
+    gram_offsets = _offsets(gram_blobs, id_offsets[-1])
+
+    header = HEADER.pack(MAGIC, catalog_digest(hashes.items()), count, len(grams), typecode.encode())
+    return b"".join([
+        header,
+        record_offsets.tobytes(),
+        keyword_offsets.tobytes(),
+        domain_offsets.tobytes(),
+        id_offsets.tobytes(),
+        positions.tobytes(),
+        gram_offsets.tobytes(),
+        ends.tobytes(),
+        lists_bytes,
+        *records,
+        *keyword_blobs,
+        *domain_blobs,
+        *id_blobs,
+        *gram_blobs,
+    ])
+
+
+class _Strings:
+    """Sequence of the strings delimited by an offset array, decoded on access."""
+
+    def __init__(self, data: mmap.mmap, offsets: memoryview, decode: Callable[[bytes], object]) -> None:
+        self._data = data
+        self._offsets = offsets
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, i: int) -> bytes:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._data[self._offsets[i]:self._offsets[i + 1]]
+
+    def __getitem__(self, i: int):
+        return self._decode(self.raw(i))
+
+
+class _Postings:
+    """gram -> posting list, by binary search of the sorted gram strings."""
+
+    def __init__(self, grams: _Strings, ends: memoryview, lists: memoryview) -> None:
+        self._grams = _Keys(grams)
+        self._ends = ends
+        self._lists = lists
+
+    def get(self, gram: str, default=()):
+        key = gram.encode("utf-8")
+        i = bisect_left(self._grams, key)
+        if i == len(self._grams) or self._grams[i] != key:
+            return default
+        return self._lists[self._ends[i]:self._ends[i + 1]]
+
+
+class _Keys:
+    """Undecoded view of a _Strings, for bisect."""
+
+    def __init__(self, strings: _Strings) -> None:
+        self._strings = strings
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._strings.raw(i)
+
+
+class CatalogImage(RecordLookup):
+    """Read-only, in-place view of a catalog.img file."""
+
+    def __init__(self, path: Path = IMAGE_PATH) -> None:
+        if sys.byteorder != "little":
+            raise RuntimeError("catalog.img can only be mapped on a little-endian machine")
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, digest, count, gram_count, typecode = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a FirstData catalog image")
+        self.digest: bytes = digest
+
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+
+        def table(length: int, code: str = "I") -> memoryview:
+            nonlocal offset
+            size = length * array(code).itemsize
+            part = view[offset:offset + size].cast(code)
+            offset += size
+            return part
+
+        self.records = _Strings(self._mmap, table(count + 1), json.loads)
+        self.keywords = _Strings(self._mmap, table(count + 1), lambda b: b.decode("utf-8"))
+        self.domains = _Strings(self._mmap, table(count + 1), lambda b: b.decode("utf-8"))
+        self._ids = _Keys(_Strings(self._mmap, table(count + 1), bytes))
+        self._positions = table(count)
+        grams = _Strings(self._mmap, table(gram_count + 1), bytes)
+        ends = table(gram_count + 1)
+        lists = table(ends[-1], typecode.decode())
+
+        self.index = SearchIndex(
+            self.records,
+            # Texts are decoded from the mapping on each use rather than copied into every worker.
+            NgramIndex(count, _Postings(grams, ends, lists), self.keywords.__getitem__, cache=False),
+            domains=self.domains,
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def position(self, source_id: str) -> int | None:
+        """Catalog position of `source_id`, or None if there is no such source."""
+        key = source_id.encode("utf-8")
+        i = bisect_left(self._ids, key)
+        if i < len(self._ids) and self._ids[i] == key:
+            return self._positions[i]
+        return None
+
+    def get(self, source_id: str) -> dict | None:
+        """The index record for `source_id`, or None if there is no such source."""
+        position = self.position(source_id)
+        return None if position is None else self.records[position]
+
+    def search(
+        self,
+        keywords: str | Iterable[str] = (),
+        domain: str | None = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> list[dict]:
+        """search_source over the image; see SearchIndex.search."""
+        return self.index.search(keywords, domain, limit)
@@ -0,0 +1,203 @@
+"""Load every source JSON file under firstdata/sources in a single pass.
+
+All scripts share this loader so the tree is walked and parsed once per
+process. Large trees are parsed across a process pool; small ones are
+parsed inline because pool start-up costs more than it saves.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from firstdata.search import SearchIndex
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+REPO_ROOT = PACKAGE_DIR.parent
+SOURCES_DIR = PACKAGE_DIR / "sources"
+INDEXES_DIR = PACKAGE_DIR / "indexes"
+SCHEMA_PATH = PACKAGE_DIR / "schemas" / "datasource-schema.json"
+
+# Below this many files a process pool is slower than parsing inline.
+PARALLEL_THRESHOLD = 2000
+CHUNK_SIZE = 256
+
+
+@dataclass(frozen=True)
+class SourceFile:
+    """One source JSON file and the result of parsing it."""
+
+    file_path: str
+    """Path relative to the sources directory, always '/'-separated."""
+    content_hash: str
+    data: dict | None = None
+    error: str | None = None
+
+    @property
+    def parts(self) -> tuple[str, ...]:
+        return tuple(self.file_path.split("/"))
+
+
+@dataclass
+class Catalog:
+    """All source files of one sources directory, in sorted path order."""
+
+    sources_dir: Path
+    files: list[SourceFile] = field(default_factory=list)
+    _search_index: "SearchIndex | None" = field(default=None, init=False, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def valid_files(self) -> list[SourceFile]:
+        return [f for f in self.files if f.error is None]
+
+    @property
+    def sources(self) -> list[dict]:
+        """Parsed content of every file that could be read."""
+        return [f.data for f in self.files if f.error is None]
+
+    @property
+    def errors(self) -> list[SourceFile]:
+        return [f for f in self.files if f.error is not None]
+
+    def path(self, source_file: SourceFile) -> Path:
+        return self.sources_dir / source_file.file_path
+
+    def search(
+        self,
+        keywords: str | Iterable[str] = (),
+        domain: str | None = None,
+        limit: int = 20,
+        max_edits: int = 0,
+        translate: bool = False,
+    ) -> list[dict]:
+        """Search sources the way the hosted `search_source` tool does.
+
+        Each keyword is a case-insensitive substring of a source's name,
+        description, tags, domains or data_content; a source matching any
+        keyword is returned. `domain` keeps only sources with a domain
+        containing it. Results are in path order, at most `limit` (1-200)
+        of them.
+
+        `max_edits` (0-2, off by default) lets a keyword that matches
+        nothing fall back to its spelling corrections, and `translate`
+        adds the English or Chinese equivalents of every keyword.
+        """
+        if self._search_index is None:
+            from firstdata.search import SearchIndex
+
+            self._search_index = SearchIndex.for_catalog(self)
+        return self._search_index.search(keywords, domain, limit, max_edits, translate)
+
+
+def content_hash(content: bytes) -> str:
+    """Hash file content the way `git hash-object` does.
+
+    Using git's blob format lets a stored hash be cross-checked against
+    `git ls-files -s` without reading the file.
+    """
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def relative_path(path: Path, sources_dir: Path = SOURCES_DIR) -> str:
+    return str(path.relative_to(sources_dir)).replace(os.sep, "/")
+
+
+def path_key(file_path: str) -> tuple[str, ...]:
+    """Sort key matching the order of `sorted(sources_dir.rglob(...))`."""
+    return tuple(file_path.split("/"))
+
+
+def source_id(data: dict) -> str | None:
+    """The id of a source record, or None if it is not a string (the schema rule reports it)."""
+    id_ = data.get("id")
+    return id_ if isinstance(id_, str) else None
+
+
+def source_domains(data: dict) -> list[str]:
+    """The string domains of a source record; the schema rule reports any others."""
+    domains = data.get("domains")
+    return [d for d in domains if isinstance(d, str)] if isinstance(domains, list) else []
+
+
+def iter_source_paths(sources_dir: Path = SOURCES_DIR) -> list[Path]:
+    return sorted(sources_dir.rglob("*.json"))
+
+
+def hash_sources(sources_dir: Path = SOURCES_DIR) -> dict[str, str]:
+    """Return file_path -> content hash for every source file, without parsing."""
+    return {
+        relative_path(path, sources_dir): content_hash(path.read_bytes())
+        for path in iter_source_paths(sources_dir)
+    }
+
+
+def _parse_file(path: Path, sources_dir: Path) -> SourceFile:
+    file_path = relative_path(path, sources_dir)
+    try:
+        content = path.read_bytes()
+    except OSError as e:
+        return SourceFile(file_path, "", error=str(e))
+    digest = content_hash(content)
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return SourceFile(file_path, digest, error=str(e))
+    if not isinstance(data, dict):
+        return SourceFile(file_path, digest, error="top-level value is not an object")
+    return SourceFile(file_path, digest, data=data)
+
+
+def _parse_chunk(paths: list[Path], sources_dir: Path) -> list[SourceFile]:
+    return [_parse_file(path, sources_dir) for path in paths]
+
+
+def _default_workers(count: int) -> int:
+    if count < PARALLEL_THRESHOLD:
+        return 1
+    return os.cpu_count() or 1
+
+
+_cache: dict[Path, Catalog] = {}
+
+
+def load_catalog(
+    sources_dir: Path = SOURCES_DIR,
+    *,
+    paths: list[Path] | None = None,
+    workers: int | None = None,
+    refresh: bool = False,
+) -> Catalog:
+    """Parse source files into a Catalog.
+
+    The full catalog of a directory is cached for the lifetime of the
+    process, so several checks run in one process share one parse. Pass
+    `refresh=True` after modifying files on disk. Passing `paths` loads
+    just those files and bypasses the cache.
+    """
+    sources_dir = Path(sources_dir).resolve()
+    if paths is None and not refresh and sources_dir in _cache:
+        return _cache[sources_dir]
+
+    selected = iter_source_paths(sources_dir) if paths is None else sorted(Path(p).resolve() for p in paths)
+    if workers is None:
+        workers = _default_workers(len(selected))
+
+    if workers <= 1:
+        files = _parse_chunk(selected, sources_dir)
+    else:
+        chunks = [selected[i:i + CHUNK_SIZE] for i in range(0, len(selected), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_parse_chunk, chunks, [sources_dir] * len(chunks))
+            files = [f for chunk in results for f in chunk]
+
+    catalog = Catalog(sources_dir, files)
+    if paths is None:
+        _cache[sources_dir] = catalog
+    return catalog
@@ -0,0 +1,192 @@
+"""BM25F-ranked search over the catalog (indexes/bm25.bin).
+
+Every source is scored with BM25F across its name, tags, domains,
+description and data_content, each field with its own weight and length
+normalisation, using the shared tokenizer in firstdata.text. Because the
+score of a document is a sum of independent per-term contributions, the
+contribution of every (term, source) pair is computed once at build time
+and stored as an impact posting list; a query only sums the posting
+lists of its terms and takes the top k, so its cost depends on how many
+sources contain the query terms, not on the size of the catalog.
+
+An optional prior on authority_level lifts, for example, a central bank
+above a commercial aggregator that mentions the same terms.
+"""
+
+import heapq
+import json
+import math
+import struct
+from array import array
+from collections import Counter
+from pathlib import Path
+
+from firstdata.loader import INDEXES_DIR
+from firstdata.text import field_texts, tokenize
+
+BM25_PATH = INDEXES_DIR / "bm25.bin"
+MAGIC = b"FDBMF\x00\x00\x01"
+HEADER = struct.Struct("<8sIII")
+
+K1 = 1.2
+FIELDS = {
+    # field: (weight, length normalisation b)
+    "name": (3.0, 0.5),
+    "tags": (2.0, 0.3),
+    "domains": (2.0, 0.3),
+    "description": (1.0, 0.75),
+    "data_content": (1.0, 0.75),
+}
+
+AUTHORITY_PRIOR = {
+    "government": 1.0,
+    "international": 1.0,
+    "research": 0.7,
+    "market": 0.5,
+    "commercial": 0.3,
+    "other": 0.0,
+}
+DEFAULT_PRIOR_WEIGHT = 0.5
+
+
+def field_tokens(source: dict) -> dict[str, list[str]]:
+    """Tokens of every ranked field of a source."""
+    return {
+        field: [token for text in field_texts(source.get(field)) for token in tokenize(text)]
+        for field in FIELDS
+    }
+
+
+class RankedIndex:
+    """Impact-ordered BM25F postings: term -> (source ordinals, scores)."""
+
+    def __init__(
+        self,
+        ids: list[str],
+        authority: list[str],
+        postings: dict[str, tuple[array, array]],
+    ) -> None:
+        self.ids = ids
+        self.authority = authority
+        self.postings = postings
+
+    @classmethod
+    def build(cls, sources: list[dict]) -> "RankedIndex":
+        docs = [field_tokens(s) for s in sources]
+        count = len(docs)
+        average = {
+            field: (sum(len(d[field]) for d in docs) / count if count else 0.0) or 1.0
+            for field in FIELDS
+        }
+
+        # Pseudo term frequency: weighted, length-normalised sum over fields.
+        weighted: dict[str, dict[int, float]] = {}
+        for i, doc in enumerate(docs):
+            for field, (weight, b) in FIELDS.items():
+                norm = 1 - b + b * len(doc[field]) / average[field]
+                for term, tf in Counter(doc[field]).items():
+                    postings = weighted.setdefault(term, {})
+                    postings[i] = postings.get(i, 0.0) + weight * tf / norm
+
+        postings = {}
+        for term in sorted(weighted):
+            tfs = weighted[term]
+            idf = math.log(1 + (count - len(tfs) + 0.5) / (len(tfs) + 0.5))
+            ordinals = array("I", sorted(tfs))
+            scores = array("f", (idf * tfs[i] / (K1 + tfs[i]) for i in ordinals))
+            postings[term] = (ordinals, scores)
+
+        return cls(
+            [s["id"] for s in sources],
+            [s.get("authority_level", "other") for s in sources],
+            postings,
+        )
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        prior_weight: float = DEFAULT_PRIOR_WEIGHT,
+    ) -> list[tuple[str, float]]:
+        """The `limit` best (id, score) pairs for a free-text query, best first.
+
+        Only sources containing at least one query term are ranked; the
+        authority prior, scaled by `prior_weight`, is added to their score.
+        """
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            if term in self.postings:
+                ordinals, impacts = self.postings[term]
+                for i, impact in zip(ordinals, impacts):
+                    scores[i] = scores.get(i, 0.0) + impact
+        if prior_weight:
+            for i in scores:
+                scores[i] += prior_weight * AUTHORITY_PRIOR.get(self.authority[i], 0.0)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.ids[i], score) for i, score in best]
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index.
+
+        Layout: header (magic, source count, term blob size, metadata
+        size), JSON metadata with the ids and authority levels, the terms
+        as NUL-separated UTF-8, a u32 array of posting-list end offsets,
+        then all source ordinals (u32) and all impacts (float32).
+        """
+        terms = list(self.postings)
+        metadata = json.dumps(
+            {"ids": self.ids, "authority_level": self.authority},
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+        blob = "\0".join(terms).encode("utf-8")
+        ends, ordinals, impacts = array("I"), array("I"), array("f")
+        for term in terms:
+            term_ordinals, term_impacts = self.postings[term]
+            ordinals.extend(term_ordinals)
+            impacts.extend(term_impacts)
+            ends.append(len(ordinals))
+        header = HEADER.pack(MAGIC, len(self.ids), len(blob), len(metadata))
+        return b"".join(
+            [header, metadata, blob, ends.tobytes(), ordinals.tobytes(), impacts.tobytes()]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RankedIndex":
+        magic, _, blob_size, metadata_size = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a FirstData BM25 index")
+        offset = HEADER.size
+        metadata = json.loads(data[offset:offset + metadata_size])
+        offset += metadata_size
+        terms = data[offset:offset + blob_size].decode("utf-8").split("\0") if blob_size else []
+        offset += blob_size
+
+        ends = array("I")
+        ends.frombytes(data[offset:offset + 4 * len(terms)])
+        offset += 4 * len(terms)
+        total = ends[-1] if terms else 0
+        ordinals, impacts = array("I"), array("f")
+        ordinals.frombytes(data[offset:offset + 4 * total])
+        impacts.frombytes(data[offset + 4 * total:offset + 8 * total])
+
+        ordinal_view, impact_view = memoryview(ordinals), memoryview(impacts)
+        postings, start = {}, 0
+        for term, end in zip(terms, ends):
+            postings[term] = (ordinal_view[start:end], impact_view[start:end])
+            start = end
+        return cls(metadata["ids"], metadata["authority_level"], postings)
+
+
+_indexes: dict[Path, RankedIndex] = {}
+
+
+def load_ranked_index(path: Path = BM25_PATH) -> RankedIndex:
+    """Load the BM25 index written by build_indexes.py, once per process."""
+    path = Path(path).resolve()
+    if path not in _indexes:
+        _indexes[path] = RankedIndex.from_bytes(path.read_bytes())
+    return _indexes[path]
+
+
+def build_ranked_index(sources: list[dict]) -> bytes:
+    return RankedIndex.build(sources).to_bytes()
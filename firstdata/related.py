@@ -0,0 +1,118 @@
+"""Related-sources graph (related.json): the top-k most similar sources of each source.
+
+A source is a sparse vector over three groups of features, its domains,
+its tags and the terms of its description, each weighted by IDF,
+normalised within its group and scaled by the group weight, then
+normalised as a whole. Similarity is the cosine of two vectors.
+
+All similarities are one sparse product of the source-feature matrix
+with its transpose, computed row by row through an inverted index from
+feature to sources: each source only visits the sources sharing one of
+its features, never the whole catalog. Features carried by more than
+MAX_DF_RATIO of the sources say little about relatedness and are
+dropped, and only the TERMS_PER_SOURCE rarest description terms of a
+source are kept, which bounds both the features per source and the
+length of every posting list.
+"""
+
+import heapq
+import json
+import math
+from pathlib import Path
+
+from firstdata.loader import INDEXES_DIR
+from firstdata.text import field_texts, tokenize
+
+RELATED_PATH = INDEXES_DIR / "related.json"
+
+TOP_K = 10
+MIN_SCORE = 0.05
+MAX_DF_RATIO = 0.2
+TERMS_PER_SOURCE = 20
+GROUP_WEIGHTS = {"domain": 1.0, "tag": 1.0, "term": 0.5}
+
+
+def source_features(source: dict) -> dict[str, set[str]]:
+    return {
+        "domain": set(source.get("domains", [])),
+        "tag": {t.lower() for t in source.get("tags", [])},
+        "term": {t for text in field_texts(source.get("description")) for t in tokenize(text)},
+    }
+
+
+def feature_vectors(sources: list[dict]) -> list[dict[tuple[str, str], float]]:
+    """Unit-length sparse vectors of every source, keyed by (group, feature)."""
+    features = [source_features(s) for s in sources]
+    df: dict[tuple[str, str], int] = {}
+    for groups in features:
+        for group, values in groups.items():
+            for value in values:
+                df[(group, value)] = df.get((group, value), 0) + 1
+
+    count = len(sources)
+    max_df = max(2, MAX_DF_RATIO * count)
+    vectors = []
+    for groups in features:
+        vector = {}
+        for group, values in groups.items():
+            weights = {
+                (group, v): math.log(count / df[(group, v)])
+                for v in sorted(values)
+                if 1 < df[(group, v)] <= max_df  # a feature of one source relates it to nothing
+            }
+            if group == "term":
+                rarest = heapq.nlargest(TERMS_PER_SOURCE, weights.items(), key=lambda item: (item[1], item[0]))
+                weights = dict(rarest)
+            norm = math.sqrt(sum(w * w for w in weights.values()))
+            for key, w in weights.items():
+                vector[key] = GROUP_WEIGHTS[group] * w / norm
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        vectors.append({key: w / norm for key, w in vector.items()})
+    return vectors
+
+
+def top_neighbors(vectors: list[dict], k: int = TOP_K) -> list[list[tuple[int, float]]]:
+    """The k most similar other vectors of each vector, as (position, cosine), best first."""
+    postings: dict[tuple[str, str], list[tuple[int, float]]] = {}
+    for i, vector in enumerate(vectors):
+        for key, w in vector.items():
+            postings.setdefault(key, []).append((i, w))
+
+    neighbors = []
+    for i, vector in enumerate(vectors):
+        scores: dict[int, float] = {}
+        for key, w in vector.items():
+            for j, u in postings[key]:
+                scores[j] = scores.get(j, 0.0) + w * u
+        scores.pop(i, None)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        neighbors.append([(j, score) for j, score in best if score >= MIN_SCORE])
+    return neighbors
+
+
+def build_related(sources: list[dict], now: str) -> dict:
+    neighbors = top_neighbors(feature_vectors(sources))
+    ids = [s["id"] for s in sources]
+    return {
+        "metadata": {
+            "generated_at": now,
+            "total_sources": len(sources),
+            "top_k": TOP_K,
+        },
+        "related": {
+            ids[i]: [{"id": ids[j], "score": round(score, 4)} for j, score in row]
+            for i, row in enumerate(neighbors)
+        },
+    }
+
+
+_graphs: dict[Path, dict[str, list[dict]]] = {}
+
+
+def load_related(path: Path = RELATED_PATH) -> dict[str, list[dict]]:
+    """source id -> [{"id", "score"}] of its most similar sources, loaded once per process."""
+    path = Path(path).resolve()
+    if path not in _graphs:
+        with open(path, encoding="utf-8") as f:
+            _graphs[path] = json.load(f)["related"]
+    return _graphs[path]
@@ -0,0 +1,266 @@
+"""Local keyword search with the semantics of the hosted `search_source` tool.
+
+`search_source` (see skills/firstdata/mcp-tool-descriptions-draft.md)
+matches each keyword as an independent, case-insensitive substring of a
+source's metadata, combines keywords with OR, filters by a substring of
+one of the source's domains and returns at most 200 results.
+
+Rather than testing every keyword against every source, NgramIndex keeps
+character trigram postings, falling back to bigram and single-character
+postings so that short terms, notably two-character CJK words such as
+中国, are answered straight from the index. A longer term's candidates
+are the sources containing all of its trigrams; only those are checked
+with a real substring test, so query cost follows the number of
+candidates rather than the catalog size.
+
+build_indexes.py persists the postings to indexes/ngrams.bin together
+with a digest of the source files they were built from; a catalog with
+the same digest loads them instead of re-indexing; without the file,
+the postings are built in memory.
+"""
+
+import hashlib
+import struct
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Sequence
+
+from firstdata.loader import INDEXES_DIR, path_key
+from firstdata.spelling import MAX_EDITS, SpellingIndex
+from firstdata.text import field_texts
+from firstdata.translations import Translations
+
+if TYPE_CHECKING:
+    from firstdata.loader import Catalog
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+GRAM = 3
+
+NGRAM_PATH = INDEXES_DIR / "ngrams.bin"
+MAGIC = b"FDNGR\x00\x00\x01"
+HEADER = struct.Struct("<8s20sIIc3x")
+
+SEARCH_FIELDS = ["name", "description", "tags", "domains", "data_content"]
+
+# Joins a source's field values so no match can span two fields.
+SEPARATOR = "\x00"
+
+
+def keyword_text(source: dict) -> str:
+    """Searchable text of a source: every string in its SEARCH_FIELDS, lowercased."""
+    texts = []
+    for field in SEARCH_FIELDS:
+        texts.extend(field_texts(source.get(field)))
+    return SEPARATOR.join(texts).lower()
+
+
+def domain_text(source: dict) -> str:
+    return SEPARATOR.join(field_texts(source.get("domains"))).lower()
+
+
+def catalog_digest(files: Iterable[tuple[str, str]]) -> bytes:
+    """Digest of (file_path, content hash) pairs, identifying the state of a sources tree."""
+    digest = hashlib.sha1()
+    for file_path, content_hash in sorted(files, key=lambda f: path_key(f[0])):
+        digest.update(f"{file_path}\0{content_hash}\n".encode())
+    return digest.digest()
+
+
+def _grams(text: str) -> set[str]:
+    """Every substring of `text` of length 1 to GRAM that stays within one field."""
+    grams = set()
+    for n in range(1, GRAM + 1):
+        grams.update(text[j:j + n] for j in range(len(text) - n + 1))
+    return {g for g in grams if SEPARATOR not in g}
+
+
+def _contains(postings: Sequence[int], i: int) -> bool:
+    j = bisect_left(postings, i)
+    return j < len(postings) and postings[j] == i
+
+
+class NgramIndex:
+    """Substring lookup over a list of texts via an n-gram inverted index.
+
+    `text(i)` returns the i-th text; it is only called for candidates, so
+    a loaded index never needs the texts of sources a query cannot match.
+    Fetched texts are kept unless `cache` is false, for texts that are
+    already at hand, such as those of a mapped image.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        postings: dict[str, Sequence[int]],
+        text: Callable[[int], str],
+        cache: bool = True,
+    ) -> None:
+        self.size = size
+        self.postings = postings
+        self._text = text
+        self._texts: dict[int, str] | None = {} if cache else None
+
+    @classmethod
+    def build(cls, texts: list[str]) -> "NgramIndex":
+        postings: dict[str, list[int]] = {}
+        for i, text in enumerate(texts):
+            for gram in _grams(text):
+                postings.setdefault(gram, []).append(i)
+        return cls(len(texts), postings, texts.__getitem__)
+
+    def text(self, i: int) -> str:
+        if self._texts is None:
+            return self._text(i)
+        if i not in self._texts:
+            self._texts[i] = self._text(i)
+        return self._texts[i]
+
+    def find(self, term: str) -> set[int]:
+        """Positions of the texts containing `term`, which must already be lowercase."""
+        if len(term) <= GRAM:
+            return set(self.postings.get(term, ()))
+
+        lists = sorted(
+            (self.postings.get(term[j:j + GRAM], ()) for j in range(len(term) - GRAM + 1)),
+            key=len,
+        )
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            candidates = {i for i in candidates if _contains(postings, i)}
+        return {i for i in candidates if term in self.text(i)}
+
+    def to_bytes(self, digest: bytes) -> bytes:
+        """Serialize the postings for the catalog state identified by `digest`.
+
+        Layout: header, then the grams as NUL-separated UTF-8, then a u32
+        array of posting-list end offsets, then all posting lists
+        concatenated as u16 (or u32 for catalogs above 65535 sources).
+        """
+        typecode = "H" if self.size <= 0xFFFF else "I"
+        grams = sorted(self.postings)
+        blob = SEPARATOR.join(grams).encode("utf-8")
+        ends, flat = array("I"), array(typecode)
+        for gram in grams:
+            flat.extend(self.postings[gram])
+            ends.append(len(flat))
+        header = HEADER.pack(MAGIC, digest, self.size, len(blob), typecode.encode())
+        return b"".join([header, blob, ends.tobytes(), flat.tobytes()])
+
+    @classmethod
+    def from_bytes(cls, data: bytes, digest: bytes, text: Callable[[int], str]) -> "NgramIndex | None":
+        """Load serialized postings, or None if they were built for another catalog state."""
+        if len(data) < HEADER.size:
+            return None
+        magic, stored, size, blob_size, typecode = HEADER.unpack_from(data)
+        if magic != MAGIC or stored != digest:
+            return None
+        offset = HEADER.size
+        grams = data[offset:offset + blob_size].decode("utf-8").split(SEPARATOR) if blob_size else []
+        offset += blob_size
+        ends = array("I")
+        ends.frombytes(data[offset:offset + 4 * len(grams)])
+        flat = array(typecode.decode())
+        flat.frombytes(data[offset + 4 * len(grams):])
+        view = memoryview(flat)
+        postings, start = {}, 0
+        for gram, end in zip(grams, ends):
+            postings[gram] = view[start:end]
+            start = end
+        return cls(size, postings, text)
+
+
+class SearchIndex:
+    """search_source over an in-memory list of sources."""
+
+    def __init__(
+        self,
+        sources: Sequence[dict],
+        keywords: NgramIndex | None = None,
+        domains: Sequence[str] | None = None,
+    ) -> None:
+        self.sources = sources
+        self.domains = [domain_text(s) for s in sources] if domains is None else domains
+        if keywords is None:
+            keywords = NgramIndex.build([keyword_text(s) for s in sources])
+        self.keywords = keywords
+        self._spelling: SpellingIndex | None = None
+        self._translations: Translations | None = None
+
+    @property
+    def spelling(self) -> SpellingIndex:
+        if self._spelling is None:
+            self._spelling = SpellingIndex.from_sources(self.sources)
+        return self._spelling
+
+    @property
+    def translations(self) -> Translations:
+        if self._translations is None:
+            self._translations = Translations.from_sources(self.sources)
+        return self._translations
+
+    @classmethod
+    def for_catalog(cls, catalog: "Catalog", path: Path = NGRAM_PATH) -> "SearchIndex":
+        """Index a catalog, reusing the persisted postings if they match its files."""
+        sources = catalog.sources
+        keywords = None
+        if not catalog.errors:
+            digest = catalog_digest((f.file_path, f.content_hash) for f in catalog.files)
+            try:
+                data = Path(path).read_bytes()
+            except OSError:
+                data = b""
+            keywords = NgramIndex.from_bytes(data, digest, lambda i: keyword_text(sources[i]))
+        return cls(sources, keywords)
+
+    def search(
+        self,
+        keywords: str | Iterable[str] = (),
+        domain: str | None = None,
+        limit: int = DEFAULT_LIMIT,
+        max_edits: int = 0,
+        translate: bool = False,
+    ) -> list[dict]:
+        """Sources matching any keyword and the domain filter, in catalog order.
+
+        With `max_edits` above zero, a keyword that matches nothing is
+        replaced by its spelling corrections within that many edits. With
+        `translate`, the English or Chinese equivalents of each keyword
+        are searched for as well.
+        """
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}, got {limit}")
+        if not 0 <= max_edits <= MAX_EDITS:
+            raise ValueError(f"max_edits must be between 0 and {MAX_EDITS}, got {max_edits}")
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        keywords = [k for k in keywords if k]
+        if translate:
+            keywords = self.translations.expand(keywords)
+        terms = {k.lower() for k in keywords}
+
+        if terms:
+            matches = set()
+            for term in terms:
+                found = self.keywords.find(term)
+                if not found and max_edits:
+                    for correction in self.spelling.suggest(term, max_edits):
+                        found |= self.keywords.find(correction)
+                matches |= found
+        else:
+            matches = set(range(len(self.sources)))
+        if domain:
+            domain = domain.lower()
+            matches = {i for i in matches if domain in self.domains[i]}
+        return [self.sources[i] for i in sorted(matches)[:limit]]
+
+
+def build_ngram_index(sources: list[dict], hashes: dict[str, str], keywords: NgramIndex | None = None) -> bytes:
+    """Serialized keyword postings for `sources`, the records of the files in `hashes`.
+
+    `keywords` is the NgramIndex of `sources` if the caller already has one.
+    """
+    if keywords is None:
+        keywords = NgramIndex.build([keyword_text(s) for s in sources])
+    return keywords.to_bytes(catalog_digest(hashes.items()))
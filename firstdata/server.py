@@ -0,0 +1,472 @@
+"""Self-hosted MCP server for `search_source` and `get_source`.
+
+Serves the two lookup tools of the hosted endpoint from the built
+indexes, with the same contract (skills/firstdata/SKILL.md): keywords
+are independent case-insensitive substrings combined with OR, `domain`
+is a substring of one of the source's domains, `limit` is 1-200, and an
+unknown id in `get_source` yields {"id": ..., "error": "Not found"} in
+the result array rather than a failed call.
+
+Everything is loaded once at startup: the records from all-sources.json
+and the keyword postings from ngrams.bin, which are used as is when
+build-manifest.json shows they were built from the same files. A call is
+then an in-memory lookup of a few microseconds, so requests are answered
+on the event loop itself and one process serves thousands of concurrent
+connections.
+
+With several worker processes, Snapshot.map() serves from catalog.img
+instead: the records, id table and postings are read in place from a
+shared read-only mapping, so N workers cost one copy of the catalog in
+the page cache rather than N parsed copies, and a worker starts in
+milliseconds. The workers share one listening port (SO_REUSEPORT).
+
+A running server picks up new indexes without a restart. It polls
+build-manifest.json, which build_indexes.py writes last and only when a
+source changed; when the file changes, the next generation is loaded in a
+worker thread while the current one keeps serving, then swapped in by a
+single assignment. Calls run without yielding to the event loop, so each
+one sees a single generation from start to end, and the old generation
+is freed as soon as the last reference to it is dropped. all-sources.json
+and catalog.img carry the catalog digest of the files they were built
+from; a generation whose digest differs from its manifest's (an update
+still being copied in) is discarded and retried at the next poll.
+
+Two transports speak the same JSON-RPC messages: stdio, one message per
+line, and streamable HTTP, where each POST to /mcp carries a message or a
+batch and gets a JSON response. The server is stateless, so it neither
+issues session ids nor opens server-to-client streams.
+"""
+
+import asyncio
+import json
+import sys
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Sequence
+
+from firstdata.image import IMAGE_PATH, CatalogImage
+from firstdata.loader import INDEXES_DIR
+from firstdata.search import (
+    DEFAULT_LIMIT,
+    MAX_LIMIT,
+    NGRAM_PATH,
+    NgramIndex,
+    SearchIndex,
+    catalog_digest,
+    keyword_text,
+)
+
+PROTOCOL_VERSION = "2025-03-26"
+SUPPORTED_VERSIONS = {"2024-11-05", "2025-03-26", "2025-06-18"}
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MCP_PATH = "/mcp"
+MAX_BODY = 1 << 20
+MAX_HEADERS = 100
+# Seconds a kept-alive connection may wait for its next request, and a
+# request may take to send its headers, then its body.
+IDLE_TIMEOUT = 60.0
+READ_TIMEOUT = 10.0
+RELOAD_INTERVAL = 2.0
+MANIFEST_NAME = "build-manifest.json"
+
+# JSON-RPC error codes.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+TOOLS = [
+    {
+        "name": "search_source",
+        "description": (
+            "Search data sources by keyword and domain. Each keyword is matched as an independent, "
+            "case-insensitive substring of the name, description, tags, domains and data content; "
+            "several keywords are combined with OR. `domain` is a substring of one of the source's "
+            "domains. Returns at most `limit` sources (1-200, default 20)."
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "keywords": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Independent substring keywords, e.g. [\"中国\", \"GDP\"]",
+                },
+                "domain": {"type": "string", "description": "领域关键词，子串匹配"},
+                "limit": {"type": "integer", "minimum": 1, "maximum": MAX_LIMIT, "default": DEFAULT_LIMIT},
+            },
+        },
+        "annotations": {"readOnlyHint": True, "idempotentHint": True},
+    },
+    {
+        "name": "get_source",
+        "description": (
+            "Full details of data sources by id. An unknown id does not fail the call: its item in "
+            "the result array is {\"id\": ..., \"error\": \"Not found\"}. `fields` restricts the "
+            "returned fields; all fields are returned when it is omitted."
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "source_ids": {"type": "array", "items": {"type": "string"}},
+                "fields": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["source_ids"],
+        },
+        "annotations": {"readOnlyHint": True, "idempotentHint": True},
+    },
+]
+
+
+TOOL_NAMES = {tool["name"] for tool in TOOLS}
+
+
+class ToolError(Exception):
+    """Invalid tool arguments, reported to the caller as an isError result."""
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _version() -> str:
+    try:
+        return metadata.version("firstdata")
+    except metadata.PackageNotFoundError:
+        return "0.0.0"
+
+
+def manifest_state(indexes_dir: Path) -> tuple[int, int, int] | None:
+    """Identity of the current build-manifest.json file, or None if there is none."""
+    try:
+        stat = (Path(indexes_dir) / MANIFEST_NAME).stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class Snapshot:
+    """The records and search index of one build of indexes/."""
+
+    def __init__(
+        self,
+        sources: Sequence[dict],
+        index: SearchIndex,
+        lookup: Callable[[str], dict | None],
+        generation: str = "",
+    ) -> None:
+        self.sources = sources
+        self.index = index
+        self.lookup = lookup
+        self.generation = generation
+
+    @staticmethod
+    def _manifest(indexes_dir: Path) -> dict[str, str] | None:
+        try:
+            with open(indexes_dir / MANIFEST_NAME, encoding="utf-8") as f:
+                return json.load(f)["files"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @classmethod
+    def load(cls, indexes_dir: Path = INDEXES_DIR) -> "Snapshot":
+        """Load a generation, raising ValueError if its files disagree with its manifest."""
+        indexes_dir = Path(indexes_dir)
+        with open(indexes_dir / "all-sources.json", encoding="utf-8") as f:
+            index = json.load(f)
+        sources = index["sources"]
+        by_id = {s["id"]: s for s in sources}
+        files = cls._manifest(indexes_dir)
+        if files is None:
+            return cls(sources, SearchIndex(sources), by_id.get)
+        digest = catalog_digest(files.items())
+        if index["metadata"].get("catalog_digest") != digest.hex():
+            raise ValueError(f"all-sources.json does not match {MANIFEST_NAME}")
+
+        try:
+            data = (indexes_dir / NGRAM_PATH.name).read_bytes()
+        except OSError:
+            data = b""
+        keywords = NgramIndex.from_bytes(data, digest, lambda i: keyword_text(sources[i]))
+        return cls(sources, SearchIndex(sources, keywords), by_id.get, digest.hex())
+
+    @classmethod
+    def map(cls, indexes_dir: Path = INDEXES_DIR) -> "Snapshot":
+        """Map a generation's catalog.img, raising ValueError if it disagrees with its manifest."""
+        indexes_dir = Path(indexes_dir)
+        image = CatalogImage(indexes_dir / IMAGE_PATH.name)
+        files = cls._manifest(indexes_dir)
+        if files is None or image.digest != catalog_digest(files.items()):
+            raise ValueError(f"{IMAGE_PATH.name} does not match {MANIFEST_NAME}")
+        return cls(image.records, image.index, image.get, image.digest.hex())
+
+    def search_source(self, arguments: dict) -> list[dict]:
+        keywords = arguments.get("keywords") or []
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+            raise ToolError("keywords must be an array of strings")
+        domain = arguments.get("domain")
+        if domain is not None and not isinstance(domain, str):
+            raise ToolError("domain must be a string")
+        limit = arguments.get("limit", DEFAULT_LIMIT)
+        if not isinstance(limit, int) or isinstance(limit, bool):
+            raise ToolError("limit must be an integer")
+        try:
+            return self.index.search(keywords, domain, limit)
+        except ValueError as e:
+            raise ToolError(str(e)) from None
+
+    def get_source(self, arguments: dict) -> list[dict]:
+        source_ids = arguments.get("source_ids")
+        if isinstance(source_ids, str):
+            source_ids = [source_ids]
+        if not isinstance(source_ids, list) or not all(isinstance(i, str) for i in source_ids):
+            raise ToolError("source_ids must be an array of strings")
+        fields = arguments.get("fields")
+        if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
+            raise ToolError("fields must be an array of strings")
+
+        result = []
+        for source_id in source_ids:
+            source = self.lookup(source_id)
+            if source is None:
+                result.append({"id": source_id, "error": "Not found"})
+            elif fields:
+                result.append({"id": source_id, **{f: source[f] for f in fields if f in source}})
+            else:
+                result.append(source)
+        return result
+
+
+class McpServer:
+    """JSON-RPC dispatch of MCP messages, independent of the transport.
+
+    With `indexes_dir`, the transports also watch that directory and swap
+    in each new generation of indexes, loaded with `loader`.
+    """
+
+    def __init__(
+        self,
+        snapshot: Snapshot,
+        indexes_dir: Path | None = None,
+        loader: Callable[[Path], Snapshot] = Snapshot.load,
+    ) -> None:
+        self.snapshot = snapshot
+        self.indexes_dir = indexes_dir
+        self.loader = loader
+
+    async def watch(self, interval: float = RELOAD_INTERVAL) -> None:
+        """Poll the manifest and swap in every new generation until cancelled."""
+        state = manifest_state(self.indexes_dir)
+        while True:
+            await asyncio.sleep(interval)
+            current = manifest_state(self.indexes_dir)
+            if current == state:
+                continue
+            try:
+                snapshot = await asyncio.to_thread(self.loader, self.indexes_dir)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Reload deferred: {e}", file=sys.stderr)
+                continue
+            if manifest_state(self.indexes_dir) != current:
+                continue  # updated again while loading
+            state = current
+            if snapshot.generation != self.snapshot.generation:
+                self.snapshot = snapshot
+                print(
+                    f"Reloaded {len(snapshot.sources)} sources (generation {snapshot.generation[:12]})",
+                    file=sys.stderr,
+                )
+
+    def _start_watch(self) -> "asyncio.Task | None":
+        return asyncio.create_task(self.watch()) if self.indexes_dir is not None else None
+
+    def handle(self, message) -> dict | None:
+        """The response to one JSON-RPC message, or None for a notification."""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or "method" not in message:
+            return _error(message.get("id") if isinstance(message, dict) else None, INVALID_REQUEST, "Invalid request")
+        if "id" not in message:
+            return None
+        params = message.get("params") or {}
+        if not isinstance(params, dict):
+            return _error(message["id"], INVALID_PARAMS, "params must be an object")
+        try:
+            result = self.dispatch(message["method"], params)
+        except RpcError as e:
+            return _error(message["id"], e.code, e.message)
+        except Exception as e:
+            print(f"Internal error in {message['method']}: {type(e).__name__}: {e}", file=sys.stderr)
+            return _error(message["id"], INTERNAL_ERROR, "Internal error")
+        return {"jsonrpc": "2.0", "id": message["id"], "result": result}
+
+    def handle_payload(self, payload: bytes) -> bytes | None:
+        """Serialized response to a serialized message or batch, or None if nothing is due."""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return _dump(_error(None, PARSE_ERROR, "Parse error"))
+        if isinstance(message, list):
+            if not message:
+                return _dump(_error(None, INVALID_REQUEST, "Invalid request"))
+            responses = [r for r in map(self.handle, message) if r is not None]
+            return _dump(responses) if responses else None
+        response = self.handle(message)
+        return None if response is None else _dump(response)
+
+    def dispatch(self, method: str, params: dict) -> dict:
+        if method == "initialize":
+            requested = params.get("protocolVersion")
+            return {
+                "protocolVersion": requested if requested in SUPPORTED_VERSIONS else PROTOCOL_VERSION,
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": {"name": "firstdata", "version": _version()},
+            }
+        if method == "ping":
+            return {}
+        if method == "tools/list":
+            return {"tools": TOOLS}
+        if method == "tools/call":
+            return self.call_tool(params.get("name"), params.get("arguments") or {})
+        raise RpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    def call_tool(self, name: str, arguments: dict) -> dict:
+        # One generation for the whole call, even if a reload lands meanwhile.
+        snapshot = self.snapshot
+        if not isinstance(name, str) or name not in TOOL_NAMES:
+            raise RpcError(INVALID_PARAMS, f"Unknown tool: {name}")
+        if not isinstance(arguments, dict):
+            raise RpcError(INVALID_PARAMS, "arguments must be an object")
+        try:
+            result = getattr(snapshot, name)(arguments)
+        except ToolError as e:
+            return {"content": [{"type": "text", "text": str(e)}], "isError": True}
+        text = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+        response = {"content": [{"type": "text", "text": text}], "isError": False}
+        if snapshot.generation:
+            # Lets client caches drop results of older indexes.
+            response["_meta"] = {"generation": snapshot.generation}
+        return response
+
+    async def serve_stdio(self) -> None:
+        """Answer newline-delimited messages on stdin until it closes."""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=MAX_BODY)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        out = sys.stdout.buffer
+        watcher = self._start_watch()
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    response = self.handle_payload(line)
+                    if response is not None:
+                        out.write(response + b"\n")
+                        out.flush()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+    async def serve_http(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, reuse_port: bool = False) -> None:
+        """Serve streamable HTTP on host:port until cancelled; `reuse_port` lets workers share the port."""
+        server = await asyncio.start_server(
+            self._connection, host, port, limit=MAX_BODY, backlog=4096, reuse_port=reuse_port or None
+        )
+        watcher = self._start_watch()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while await self._exchange(reader, writer):
+                pass
+        except (
+            ConnectionError,
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            asyncio.TimeoutError,
+            ValueError,
+        ):
+            pass
+        finally:
+            writer.close()
+
+    async def _exchange(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Serve one request on a connection; False when it should be closed."""
+        request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+        if not request_line:
+            return False
+        method, target, version = request_line.decode("latin-1").split()
+        headers = await asyncio.wait_for(_read_headers(reader), READ_TIMEOUT)
+        keep_alive = (
+            headers.get("connection", "").lower() != "close"
+            if version == "HTTP/1.1"
+            else headers.get("connection", "").lower() == "keep-alive"
+        )
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY:
+            await _respond(writer, 413, b"", False)
+            return False
+        body = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT) if length else b""
+
+        if target.split("?", 1)[0] != MCP_PATH:
+            status, payload = 404, b""
+        elif method != "POST":
+            # No server-initiated stream to open and no session to delete.
+            status, payload = 405, b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            status, payload, keep_alive = 411, b"", False
+        else:
+            response = self.handle_payload(body)
+            status, payload = (202, b"") if response is None else (200, response)
+        await _respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+}
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> dict[str, str]:
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+        if len(headers) > MAX_HEADERS:
+            raise ValueError("too many headers")
+    return headers
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: bytes, keep_alive: bool) -> None:
+    head = [f"HTTP/1.1 {status} {REASONS[status]}", f"Content-Length: {len(payload)}"]
+    if payload:
+        head.append("Content-Type: application/json")
+    if status == 405:
+        head.append("Allow: POST")
+    head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+    await writer.drain()
+
+
+def _error(id_, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": id_, "error": {"code": code, "message": message}}
+
+
+def _dump(response) -> bytes:
+    return json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,144 @@
+"""Typo correction for search keywords with a SymSpell deletion dictionary.
+
+The vocabulary is every word of the sources' tags, domains and English
+names, counted by the number of sources using it. Every word is indexed
+under each string obtained by deleting up to MAX_EDITS characters from
+it; a misspelled query word generates its own deletions, and any word
+sharing one is a candidate. Only candidates are compared with a real
+edit distance, so a lookup costs the same whatever the vocabulary size.
+
+Words shorter than MIN_LENGTH and non-Latin text are not corrected:
+short words have too many neighbours at distance one, and CJK text has
+no spelling in the same sense.
+"""
+
+import json
+import re
+from itertools import combinations
+from pathlib import Path
+
+from firstdata.loader import INDEXES_DIR
+from firstdata.text import field_texts
+
+SPELLING_PATH = INDEXES_DIR / "spelling.json"
+
+MAX_EDITS = 2
+MIN_LENGTH = 4
+MAX_SUGGESTIONS = 3
+
+WORD_RE = re.compile(r"[a-z][a-z0-9]+")
+
+
+def source_words(source: dict) -> set[str]:
+    """Distinct correctable words of a source's tags, domains and English name."""
+    texts = [*source.get("tags", []), *source.get("domains", [])]
+    texts.extend(field_texts((source.get("name") or {}).get("en")))
+    return {w for text in texts for w in WORD_RE.findall(text.lower()) if len(w) >= MIN_LENGTH}
+
+
+def build_spelling(sources: list[dict], now: str) -> dict:
+    counts: dict[str, int] = {}
+    for source in sources:
+        for word in source_words(source):
+            counts[word] = counts.get(word, 0) + 1
+    return {
+        "metadata": {
+            "generated_at": now,
+            "total_words": len(counts),
+            "max_edits": MAX_EDITS,
+        },
+        "words": dict(sorted(counts.items())),
+    }
+
+
+def deletes(word: str, max_edits: int) -> set[str]:
+    """`word` and every string obtained by deleting up to `max_edits` of its characters."""
+    result = {word}
+    for n in range(1, min(max_edits, len(word) - 1) + 1):
+        for positions in combinations(range(len(word)), n):
+            result.add("".join(c for i, c in enumerate(word) if i not in positions))
+    return result
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count once), capped at limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class SpellingIndex:
+    def __init__(self, words: dict[str, int], max_edits: int = MAX_EDITS) -> None:
+        self.words = words
+        self.max_edits = max_edits
+        self._deletes: dict[str, list[str]] = {}
+        for word in words:
+            for deleted in deletes(word, max_edits):
+                self._deletes.setdefault(deleted, []).append(word)
+
+    @classmethod
+    def from_sources(cls, sources: list[dict]) -> "SpellingIndex":
+        return cls(build_spelling(sources, "")["words"])
+
+    def candidates(self, word: str, max_edits: int | None = None) -> list[tuple[str, int]]:
+        """Vocabulary words within `max_edits` of `word` as (word, distance), best first."""
+        max_edits = self.max_edits if max_edits is None else min(max_edits, self.max_edits)
+        word = word.lower()
+        if word in self.words:
+            return [(word, 0)]
+        if len(word) < MIN_LENGTH or not WORD_RE.fullmatch(word):
+            return []
+
+        found = {}
+        for deleted in deletes(word, max_edits):
+            for candidate in self._deletes.get(deleted, ()):
+                if candidate not in found:
+                    found[candidate] = edit_distance(word, candidate, max_edits)
+        matches = [(w, d) for w, d in found.items() if d <= max_edits]
+        return sorted(matches, key=lambda m: (m[1], -self.words[m[0]], m[0]))
+
+    def suggest(self, keyword: str, max_edits: int | None = None) -> list[str]:
+        """Corrected forms of a keyword, or [] if it has no correctable typo.
+
+        A single word yields up to MAX_SUGGESTIONS of the closest words; in
+        a phrase each word is replaced by its best correction.
+        """
+        words = re.split(r"(\W+)", keyword.lower())
+        if len(words) == 1:
+            candidates = self.candidates(words[0], max_edits)
+            if not candidates or candidates[0][1] == 0:
+                return []
+            best = candidates[0][1]
+            return [w for w, d in candidates if d == best][:MAX_SUGGESTIONS]
+
+        corrected = []
+        for part in words:
+            candidates = self.candidates(part, max_edits) if WORD_RE.fullmatch(part) else []
+            corrected.append(candidates[0][0] if candidates else part)
+        phrase = "".join(corrected)
+        return [phrase] if phrase != keyword.lower() else []
+
+
+_indexes: dict[Path, SpellingIndex] = {}
+
+
+def load_spelling(path: Path = SPELLING_PATH) -> SpellingIndex:
+    """Load spelling.json and build its deletion dictionary, once per process."""
+    path = Path(path).resolve()
+    if path not in _indexes:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        _indexes[path] = SpellingIndex(data["words"], data["metadata"]["max_edits"])
+    return _indexes[path]
@@ -0,0 +1,222 @@
+"""Structural checks over the sources/ taxonomy.
+
+Shared by scripts/taxonomy-health-check.py and the combined check engine.
+"""
+
+from collections import defaultdict
+
+from firstdata.loader import source_domains
+
+
+def load_all_sources(catalog):
+    """Project the catalog onto the fields the taxonomy checks need."""
+    sources = []
+    for f in catalog.files:
+        if f.parts[-1] == "_index.json" or f.error is not None:
+            continue
+        sources.append({
+            "file": f.file_path,
+            "path_parts": list(f.parts),
+            "id": f.data.get("id", ""),
+            "name": f.data.get("name", ""),
+            "domains": source_domains(f.data),
+        })
+    return sources
+
+
+def check_duplicate_paths(sources):
+    """
+    Detect country/entity-level duplicates: same country scattered across
+    multiple L1 directories.
+
+    Two sub-checks:
+    a) Country L1 orphans — top-level dirs like india/, japan/ that duplicate
+       entries already under countries/
+    b) Country alias conflicts — e.g., us/ vs usa/ vs countries/us/ vs
+       countries/north-america/usa/
+
+    Does NOT flag subject categories (agriculture, finance, etc.) that
+    naturally appear under multiple country/org trees.
+    """
+    # Known country aliases to group together
+    COUNTRY_ALIASES = {
+        "us": "united-states",
+        "usa": "united-states",
+        "cn": "china",
+        "hk": "hong-kong",
+        "uk": "united-kingdom",
+    }
+
+    # R4 consensus: final top-level = country dirs + international/
+    # academic/ and sectors/ are NOT legitimate L1 — should be dispersed
+    # into country directories. Only countries/ and international/ survive.
+    LEGITIMATE_L1 = {"countries", "international"}
+
+    # Step 1: Build country → {path_prefix: [files]} from L1 dirs
+    l1_dirs = set()
+    for s in sources:
+        l1_dirs.add(s["path_parts"][0])
+
+    # Candidate country L1s: top-level dirs not in LEGITIMATE_L1
+    candidate_countries = {d for d in l1_dirs - LEGITIMATE_L1
+                          if d not in ("academic", "sectors", "regional")}
+
+    # Step 2: For each candidate, find all paths where this country appears
+    duplicates = []
+
+    # Group candidates by normalized name
+    country_groups = defaultdict(set)  # norm_name → {l1_dir_name, ...}
+    for c in candidate_countries:
+        norm = COUNTRY_ALIASES.get(c, c)
+        country_groups[norm].add(c)
+
+    for norm_name, l1_names in sorted(country_groups.items()):
+        paths = {}
+
+        # Files directly under these L1 dirs
+        for l1 in l1_names:
+            prefix = l1 + "/"
+            files = [s["file"] for s in sources if s["path_parts"][0] == l1]
+            if files:
+                paths[prefix] = files
+
+        # Files under countries/ tree that match this country
+        search_names = l1_names | {norm_name}
+        for s in sources:
+            if s["path_parts"][0] != "countries":
+                continue
+            # Check if any path part matches our country names
+            for part in s["path_parts"][1:-1]:
+                part_norm = COUNTRY_ALIASES.get(part, part)
+                if part_norm == norm_name or part in search_names:
+                    # Build the path prefix up to this country folder
+                    idx = s["path_parts"].index(part)
+                    prefix = "/".join(s["path_parts"][:idx+1]) + "/"
+                    paths.setdefault(prefix, [])
+                    if s["file"] not in paths[prefix]:
+                        paths[prefix].append(s["file"])
+
+        if len(paths) > 1:
+            total = sum(len(f) for f in paths.values())
+            entry = {
+                "entity": norm_name,
+                "paths": {},
+                "total_files": total
+            }
+            for prefix, files in sorted(paths.items()):
+                entry["paths"][prefix] = {
+                    "count": len(files),
+                    "files": sorted(files)
+                }
+            duplicates.append(entry)
+
+    return duplicates
+
+
+def check_illegitimate_l1(sources):
+    """
+    Find L1 directories that violate R4 consensus.
+
+    R4 three-party consensus (taxonomy design study round 4):
+      Decision: academic/ and sectors/ do NOT remain as top-level directories;
+      they should be dispersed into country directories by geographic affiliation.
+      Final top-level structure: country directories + international/
+      Only `countries/` and `international/` are legitimate L1 directories.
+
+    Everything else (academic/, sectors/, china/, india/, etc.) should be
+    dispersed into the country tree.
+    """
+    # See R4 consensus above. This is NOT arbitrary — changing this set
+    # requires a new three-party decision.
+    LEGITIMATE_L1 = {"countries", "international"}
+
+    l1_counts = defaultdict(list)
+    for s in sources:
+        l1 = s["path_parts"][0]
+        l1_counts[l1].append(s["file"])
+
+    illegitimate = []
+    for l1, files in sorted(l1_counts.items()):
+        if l1 not in LEGITIMATE_L1:
+            illegitimate.append({
+                "l1": l1,
+                "file_count": len(files),
+                "category": _classify_l1(l1),
+                "files": sorted(files) if len(files) <= 5 else sorted(files)[:5] + [f"... and {len(files)-5} more"]
+            })
+    return illegitimate
+
+
+def _classify_l1(l1_name):
+    """Classify why an L1 directory is illegitimate."""
+    country_names = {
+        "china", "india", "japan", "singapore", "thailand",
+        "us", "usa", "cn", "hk", "uk",
+    }
+    if l1_name in country_names:
+        return "country-orphan"
+    if l1_name in ("academic", "sectors"):
+        return "non-geographic-axis"
+    if l1_name == "regional":
+        return "scope-axis"
+    # Default to country-orphan: academic/sectors/regional have explicit
+    # branches above, so anything else is most likely a country directory.
+    return "country-orphan"
+
+
+def check_directory_underscores(sources):
+    """Find directory names containing underscores (should be kebab-case)."""
+    violations = defaultdict(list)
+    for s in sources:
+        for part in s["path_parts"][:-1]:
+            if "_" in part:
+                violations[part].append(s["file"])
+
+    return [
+        {
+            "directory": dirname,
+            "suggested": dirname.replace("_", "-"),
+            "affected_files": len(files),
+            "files": sorted(files)
+        }
+        for dirname, files in sorted(violations.items())
+    ]
+
+
+def check_domain_format_conflicts(sources):
+    """Find domain values where the same concept uses different formatting."""
+    # Collect all domain values
+    all_domains = []
+    for s in sources:
+        for d in s["domains"]:
+            all_domains.append(d)
+
+    # Normalize and group
+    normalized = defaultdict(lambda: defaultdict(int))
+    for d in all_domains:
+        norm = d.lower().replace("-", " ").replace("_", " ").strip()
+        normalized[norm][d] += 1
+
+    conflicts = []
+    for concept, variants in sorted(normalized.items()):
+        if len(variants) > 1:
+            conflicts.append({
+                "concept": concept,
+                "variants": dict(sorted(variants.items())),
+                "total_occurrences": sum(variants.values())
+            })
+
+    # Summary stats
+    total = len(all_domains)
+    has_space = sum(1 for d in all_domains if " " in d)
+    has_hyphen = sum(1 for d in all_domains if "-" in d)
+    has_underscore = sum(1 for d in all_domains if "_" in d)
+    format_stats = {
+        "total_entries": total,
+        "with_spaces": has_space,
+        "with_hyphens": has_hyphen,
+        "with_underscores": has_underscore,
+        "conflict_groups": len(conflicts),
+    }
+
+    return conflicts, format_stats
@@ -0,0 +1,44 @@
+"""Text helpers shared by the search indexes.
+
+tokenize() lowercases text and splits it into runs of Latin letters and
+digits, which become word tokens, and runs of CJK characters, which have
+no word separators and become overlapping character bigrams (中国人口 ->
+中国, 国人, 人口). A CJK run of one character is a token on its own.
+"""
+
+import re
+
+# Latin words, or runs of kana, CJK ideographs and Hangul syllables.
+TOKEN_RE = re.compile(
+    r"[a-z0-9]+"
+    r"|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+)
+
+STOPWORDS = frozenset(
+    "a an and are as at by for from in is it of on or the to with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Word tokens for Latin text and character bigrams for CJK text."""
+    tokens = []
+    for run in TOKEN_RE.findall(text.lower()):
+        if run[0].isascii():
+            if run not in STOPWORDS:
+                tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def field_texts(value) -> list[str]:
+    """Every string inside a field value: a string, a list, or an {lang: text} object."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, list):
+        return [text for item in value for text in field_texts(item)]
+    return []
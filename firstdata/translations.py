@@ -0,0 +1,228 @@
+"""English <-> Chinese query expansion mined from the catalog (translations.json).
+
+Tags mix both languages, and contributors usually tag a concept in both:
+a block of English tags followed by the same concepts in Chinese, in the
+same order, or alternating pairs ("城镇化", "urbanization"). A source's
+tags are split into runs of one language and taken two runs at a time,
+from the first run or from the second, whichever pairs tags that
+co-occur more across the catalog (a lone tag can open the list), and
+tags at the same position of two runs of equal length are aligned. When
+one run has extra aliases, the shorter run is aligned in order into the
+longer one on the pairs seen in even runs, keeping only the pairs every
+best alignment agrees on.
+
+Across the catalog an English and a Chinese tag are scored with the Dice
+coefficient of their source sets, counting the sources where the two are
+aligned (POSITIONAL_DICE, provided they are aligned in at least
+ALIGNED_SHARE of the sources they share), or, for pairs that are not,
+all sources where they co-occur (COOCCURRENT_DICE, over at least
+MIN_COOCCURRENCE sources, since topically related tags co-occur often
+too). The English and Chinese name of each source are kept as a pair as
+well.
+
+Keys are normalized terms and values the most common spelling of a tag
+or name, so an expansion matches the catalog text; expansion is a
+dictionary lookup of the normalized keyword.
+"""
+
+import json
+import re
+from collections import Counter
+from itertools import groupby
+from pathlib import Path
+
+from firstdata.loader import INDEXES_DIR
+
+TRANSLATIONS_PATH = INDEXES_DIR / "translations.json"
+
+POSITIONAL_DICE = 0.1
+ALIGNED_SHARE = 0.5
+COOCCURRENT_DICE = 0.6
+MIN_COOCCURRENCE = 5
+MAX_TRANSLATIONS = 5
+
+CJK_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]")
+SEPARATOR_RE = re.compile(r"[\s_]+")
+
+
+def normalize(term: str) -> str:
+    """Lookup key of a term: lowercased, with spaces and underscores as hyphens."""
+    return SEPARATOR_RE.sub("-", term.strip().lower())
+
+
+def is_chinese(term: str) -> bool:
+    return CJK_RE.search(term) is not None
+
+
+def language_runs(tags: list[str], score=lambda pair: 0.0) -> list[tuple[list[str], list[str]]]:
+    """(English, Chinese) runs of tags, taking consecutive runs two at a time.
+
+    Runs are paired from the first run or from the second, whichever gives
+    the higher total `score` of (English, Chinese) pairs: position by
+    position for runs of equal length, else each tag of the shorter run
+    with its best match in the longer. Ties pair from the first run.
+    """
+    runs = [list(run) for _, run in groupby(tags, key=is_chinese)]
+
+    def paired(offset: int) -> list[tuple[list[str], list[str]]]:
+        return [
+            (b, a) if is_chinese(a[0]) else (a, b)
+            for a, b in zip(runs[offset::2], runs[offset + 1::2])
+        ]
+
+    def total(pairs: list[tuple[list[str], list[str]]]) -> float:
+        points = 0.0
+        for english, chinese in pairs:
+            if len(english) == len(chinese):
+                points += sum(score(pair) for pair in zip(english, chinese))
+            elif len(english) < len(chinese):
+                points += sum(max(score((en, zh)) for zh in chinese) for en in english)
+            else:
+                points += sum(max(score((en, zh)) for en in english) for zh in chinese)
+        return points
+
+    return max((paired(0), paired(1)), key=total)
+
+
+def align(english: list[str], chinese: list[str], known) -> list[tuple[str, str]]:
+    """Pairs of two runs of different lengths that every best alignment agrees on.
+
+    The shorter run is matched in order into the longer one, skipping the
+    surplus tags of the longer; an alignment scores one per pair that
+    `known` accepts.
+    """
+    swap = len(english) < len(chinese)
+    long, short = (chinese, english) if swap else (english, chinese)
+    n, m = len(long), len(short)
+    score = [[int(known((short[j], long[i]) if swap else (long[i], short[j]))) for j in range(m)] for i in range(n)]
+
+    # before[i][j]: best score of short[:j] within long[:i]; after[i][j]: of short[j:] within long[i:].
+    before = [[-1] * (m + 1) for _ in range(n + 1)]
+    after = [[-1] * (m + 1) for _ in range(n + 1)]
+    for i in range(n + 1):
+        before[i][0] = 0
+        after[i][m] = 0
+    for i in range(1, n + 1):
+        for j in range(1, min(i, m) + 1):
+            before[i][j] = max(before[i - 1][j], before[i - 1][j - 1] + score[i - 1][j - 1])
+    for i in range(n - 1, -1, -1):
+        for j in range(m - 1, max(m - (n - i), 0) - 1, -1):
+            after[i][j] = max(after[i + 1][j], after[i + 1][j + 1] + score[i][j])
+    best = after[0][0]
+
+    pairs = []
+    for j in range(m):
+        on_best = [
+            i for i in range(j, n - m + j + 1)
+            if before[i][j] + score[i][j] + after[i + 1][j + 1] == best
+        ]
+        if len(on_best) == 1:
+            i = on_best[0]
+            pairs.append((short[j], long[i]) if swap else (long[i], short[j]))
+    return pairs
+
+
+def build_translations(sources: list[dict], now: str) -> dict:
+    occurrences: dict[str, set[int]] = {}
+    cooccurrences: Counter[tuple[str, str]] = Counter()
+    positional: Counter[tuple[str, str]] = Counter()
+    uneven: list[tuple[list[str], list[str]]] = []
+    spellings: dict[str, Counter[str]] = {}
+    names: set[tuple[str, str]] = set()
+
+    def key(term: str) -> str:
+        term = term.strip()
+        k = normalize(term)
+        spellings.setdefault(k, Counter())[term] += 1
+        return k
+
+    source_tags = []
+    for i, source in enumerate(sources):
+        tags = list(dict.fromkeys(key(t) for t in source.get("tags", []) if t.strip()))
+        source_tags.append(tags)
+        for tag in tags:
+            occurrences.setdefault(tag, set()).add(i)
+        english = [t for t in tags if not is_chinese(t)]
+        chinese = [t for t in tags if is_chinese(t)]
+        cooccurrences.update((en, zh) for en in english for zh in chinese)
+
+        name = source.get("name") or {}
+        if name.get("en") and name.get("zh"):
+            names.add((key(name["en"]), key(name["zh"])))
+
+    def cooccurrent_dice(pair: tuple[str, str]) -> float:
+        return 2 * cooccurrences[pair] / (len(occurrences[pair[0]]) + len(occurrences[pair[1]]))
+
+    for tags in source_tags:
+        for english_run, chinese_run in language_runs(tags, cooccurrent_dice):
+            if len(english_run) == len(chinese_run):
+                positional.update(zip(english_run, chinese_run))
+            else:
+                uneven.append((english_run, chinese_run))
+
+    # Runs of different lengths are aligned on the pairs seen in even runs.
+    even = set(positional)
+    for english_run, chinese_run in uneven:
+        positional.update(align(english_run, chinese_run, even.__contains__))
+
+    scored: dict[tuple[str, str], float] = {pair: 1.0 for pair in names}
+    for (en, zh), count in cooccurrences.items():
+        total = len(occurrences[en]) + len(occurrences[zh])
+        dice = 2 * positional[(en, zh)] / total
+        if dice < POSITIONAL_DICE or positional[(en, zh)] < ALIGNED_SHARE * count:
+            dice = 2 * count / total if count >= MIN_COOCCURRENCE else 0.0
+            if dice < COOCCURRENT_DICE:
+                continue
+        scored[(en, zh)] = max(scored.get((en, zh), 0.0), round(dice, 3))
+
+    def spelling(k: str) -> str:
+        return min(spellings[k].items(), key=lambda s: (-s[1], s[0]))[0]
+
+    table: dict[str, list[tuple[str, float]]] = {}
+    for (en, zh), score in scored.items():
+        table.setdefault(en, []).append((spelling(zh), score))
+        table.setdefault(zh, []).append((spelling(en), score))
+
+    return {
+        "metadata": {
+            "generated_at": now,
+            "total_terms": len(table),
+            "total_pairs": len(scored),
+        },
+        "terms": {
+            term: [t for t, _ in sorted(translations, key=lambda x: (-x[1], x[0]))[:MAX_TRANSLATIONS]]
+            for term, translations in sorted(table.items())
+        },
+    }
+
+
+class Translations:
+    def __init__(self, terms: dict[str, list[str]]) -> None:
+        self.terms = terms
+
+    @classmethod
+    def from_sources(cls, sources: list[dict]) -> "Translations":
+        return cls(build_translations(sources, "")["terms"])
+
+    def translate(self, term: str) -> list[str]:
+        """Terms of the other language associated with `term`, best first."""
+        return self.terms.get(normalize(term), [])
+
+    def expand(self, keywords: list[str]) -> list[str]:
+        """The keywords followed by their translations, without duplicates."""
+        expanded = dict.fromkeys(keywords)
+        for keyword in keywords:
+            expanded.update(dict.fromkeys(self.translate(keyword)))
+        return list(expanded)
+
+
+_tables: dict[Path, Translations] = {}
+
+
+def load_translations(path: Path = TRANSLATIONS_PATH) -> Translations:
+    """Load translations.json, once per process."""
+    path = Path(path).resolve()
+    if path not in _tables:
+        with open(path, encoding="utf-8") as f:
+            _tables[path] = Translations(json.load(f)["terms"])
+    return _tables[path]
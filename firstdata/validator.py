@@ -0,0 +1,226 @@
+"""Compiled fast-path validator for datasource-schema.json.
+
+The schema is translated once into a specialised Python function: every
+keyword becomes straight-line code with the regexes precompiled and the
+enums turned into sets, so validating a source is a handful of
+isinstance checks instead of a walk through a generic interpreter.
+
+Only the Draft 7 keywords the datasource schema uses are supported.
+generate_source() raises UnsupportedSchemaError for anything else so
+callers can fall back to jsonschema. Error paths and messages are
+produced exactly as jsonschema's `json_path` and `message` would be,
+and in the same order. Like check-jsonschema without the optional
+rfc3987 package, `format` is treated as an annotation.
+
+Generating and compiling the module takes about a millisecond, so it is
+done in memory once per process and never cached on disk, where another
+user could swap in code for us to exec.
+"""
+
+import ast
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from firstdata.loader import SCHEMA_PATH
+
+# Keywords that never produce errors.
+ANNOTATIONS = {
+    "$schema", "$id", "$comment", "title", "description", "examples",
+    "default", "version", "format",
+}
+
+TYPE_CHECKS = {
+    "string": "isinstance({v}, str)",
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "integer": (
+        "((isinstance({v}, int) and not isinstance({v}, bool))"
+        " or (isinstance({v}, float) and {v}.is_integer()))"
+    ),
+}
+
+# Property names jsonschema renders as `.name` rather than `['name']`.
+SIMPLE_PROPERTY_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9_]*$")
+
+
+class UnsupportedSchemaError(ValueError):
+    """The schema uses a keyword the compiler does not implement."""
+
+
+@dataclass(frozen=True)
+class ValidationError:
+    path: str
+    """JSON path of the failing value, in jsonschema's `json_path` format."""
+    message: str
+
+
+def _child_path(path: str, name: str) -> str:
+    """Path expression for property `name` below the value at expression `path`."""
+    if SIMPLE_PROPERTY_RE.match(name):
+        segment = "." + name
+    else:
+        segment = "['" + name.replace("\\", "\\\\").replace("'", r"\'") + "']"
+    try:
+        return repr(ast.literal_eval(path) + segment)  # fold static paths into one literal
+    except ValueError:
+        return f"{path} + {segment!r}"
+
+
+class _Compiler:
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.constants: list[str] = []
+        self.depth = 0
+
+    def constant(self, expression: str) -> str:
+        """Hoist `expression` to a module-level constant and return its name."""
+        name = f"_C{len(self.constants)}"
+        self.constants.append(f"{name} = {expression}")
+        return name
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def error(self, indent: int, path: str, message: str) -> None:
+        self.emit(indent, f"errors.append(({path}, {message}))")
+
+    def node(self, schema: dict, v: str, path: str, indent: int) -> None:
+        """Emit checks for `schema` against variable `v` located at expression `path`."""
+        if schema is True or schema == {}:
+            return
+        if not isinstance(schema, dict):
+            raise UnsupportedSchemaError(f"schema {schema!r} is not an object")
+
+        for keyword, value in schema.items():
+            if keyword in ANNOTATIONS:
+                continue
+            handler = getattr(self, "kw_" + keyword.replace("$", ""), None)
+            if handler is None:
+                raise UnsupportedSchemaError(f"keyword {keyword!r} is not supported")
+            handler(schema, value, v, path, indent)
+
+    def kw_type(self, schema, types, v, path, indent):
+        types = [types] if isinstance(types, str) else types
+        if any(t not in TYPE_CHECKS for t in types):
+            raise UnsupportedSchemaError(f"type {types!r} is not supported")
+        test = " or ".join(TYPE_CHECKS[t].format(v=v) for t in types)
+        reprs = ", ".join(repr(t) for t in types)
+        self.emit(indent, f"if not ({test}):")
+        self.error(indent + 1, path, f"repr({v}) + {' is not of type ' + reprs!r}")
+
+    def kw_required(self, schema, required, v, path, indent):
+        if not required:
+            return
+        self.emit(indent, f"if isinstance({v}, dict):")
+        for name in required:
+            self.emit(indent + 1, f"if {name!r} not in {v}:")
+            self.error(indent + 2, path, repr(f"{name!r} is a required property"))
+
+    def kw_properties(self, schema, properties, v, path, indent):
+        self.depth += 1
+        child = f"v{self.depth}"
+        self.emit(indent, f"if isinstance({v}, dict):")
+        for name, subschema in properties.items():
+            start = len(self.lines)
+            self.emit(indent + 1, f"if {name!r} in {v}:")
+            self.emit(indent + 2, f"{child} = {v}[{name!r}]")
+            self.node(subschema, child, _child_path(path, name), indent + 2)
+            if len(self.lines) == start + 2:
+                del self.lines[start:]  # nothing to check for this property
+        if self.lines[-1].endswith(f"if isinstance({v}, dict):"):
+            self.lines.pop()
+
+    def kw_additionalProperties(self, schema, allowed, v, path, indent):
+        if allowed is True:
+            return
+        if allowed is not False or "patternProperties" in schema:
+            raise UnsupportedSchemaError("only additionalProperties: false is supported")
+        known = self.constant(f"frozenset({sorted(schema.get('properties', {}))!r})")
+        self.emit(indent, f"if isinstance({v}, dict) and not {known}.issuperset({v}):")
+        self.emit(indent + 1, f"extras = sorted(set({v}) - {known}, key=str)")
+        self.error(
+            indent + 1,
+            path,
+            "'Additional properties are not allowed (%s %s unexpected)' % "
+            "(', '.join(repr(e) for e in extras), 'was' if len(extras) == 1 else 'were')",
+        )
+
+    def kw_items(self, schema, items, v, path, indent):
+        if not isinstance(items, dict):
+            raise UnsupportedSchemaError("only a single items schema is supported")
+        self.depth += 1
+        index, child = f"i{self.depth}", f"v{self.depth}"
+        start = len(self.lines)
+        self.emit(indent, f"if isinstance({v}, list):")
+        self.emit(indent + 1, f"for {index}, {child} in enumerate({v}):")
+        self.node(items, child, f"{path} + '[' + str({index}) + ']'", indent + 2)
+        if len(self.lines) == start + 2:
+            del self.lines[start:]
+
+    def kw_minItems(self, schema, minimum, v, path, indent):
+        message = "should be non-empty" if minimum == 1 else "is too short"
+        self.emit(indent, f"if isinstance({v}, list) and len({v}) < {minimum}:")
+        self.error(indent + 1, path, f"repr({v}) + {' ' + message!r}")
+
+    def kw_pattern(self, schema, pattern, v, path, indent):
+        regex = self.constant(f"re.compile({pattern!r})")
+        self.emit(indent, f"if isinstance({v}, str) and not {regex}.search({v}):")
+        self.error(indent + 1, path, f"repr({v}) + {' does not match ' + repr(pattern)!r}")
+
+    def kw_enum(self, schema, enum, v, path, indent):
+        if not all(isinstance(e, str) for e in enum):
+            raise UnsupportedSchemaError("only string enums are supported")
+        values = self.constant(f"frozenset({enum!r})")
+        self.emit(indent, f"if not (isinstance({v}, str) and {v} in {values}):")
+        self.error(indent + 1, path, f"repr({v}) + {' is not one of ' + repr(enum)!r}")
+
+
+def generate_source(schema: dict) -> str:
+    """Return the source of a module defining `validate(instance) -> [(path, message)]`."""
+    compiler = _Compiler()
+    compiler.emit(0, "def validate(v0):")
+    compiler.emit(1, "errors = []")
+    compiler.node(schema, "v0", "'$'", 1)
+    compiler.emit(1, "return errors")
+    return "\n".join(["import re", *compiler.constants, "", *compiler.lines]) + "\n"
+
+
+def schema_hash(schema_bytes: bytes) -> str:
+    return hashlib.sha256(schema_bytes).hexdigest()
+
+
+class CompiledValidator:
+    """Validator specialised for one schema."""
+
+    def __init__(self, schema: dict, digest: str) -> None:
+        self.schema = schema
+        self.schema_hash = digest
+        code = compile(generate_source(schema), f"<firstdata-validator-{digest[:12]}>", "exec")
+        namespace: dict = {}
+        exec(code, namespace)
+        self._validate: Callable[[object], list[tuple[str, str]]] = namespace["validate"]
+
+    def iter_errors(self, instance: object) -> list[ValidationError]:
+        return [ValidationError(path, message) for path, message in self._validate(instance)]
+
+    def is_valid(self, instance: object) -> bool:
+        return not self._validate(instance)
+
+
+_validators: dict[str, CompiledValidator] = {}
+
+
+def load_validator(schema_path: Path = SCHEMA_PATH) -> CompiledValidator:
+    """Return the compiled validator for the schema file, compiling it at most once per process."""
+    schema_bytes = Path(schema_path).read_bytes()
+    digest = schema_hash(schema_bytes)
+    if digest not in _validators:
+        _validators[digest] = CompiledValidator(json.loads(schema_bytes), digest)
+    return _validators[digest]
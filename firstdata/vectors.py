@@ -0,0 +1,162 @@
+"""Offline semantic search over hashed TF-IDF vectors reduced with LSA.
+
+Each source's name, description and data_content are tokenized with the
+shared tokenizer and hashed into DIMENSIONS signed buckets (the hashing
+trick, so there is no vocabulary to store), weighted by TF-IDF, and
+projected onto the top COMPONENTS singular vectors of the catalog's
+TF-IDF matrix, found in float32 by randomized SVD. Latent semantic analysis lets sources that use related
+words land close together even when they share few exact terms.
+
+build_indexes.py writes three files:
+
+    vectors.npy             float32 [sources x COMPONENTS], unit-length rows
+    vector-projection.npy   float32 [DIMENSIONS x COMPONENTS], IDF folded in
+    vectors.json            source ids in row order, and the parameters
+
+A query is hashed the same way, multiplied by the projection and
+compared with every row in one matrix product, so a batch of queries
+costs a couple of BLAS calls. numpy is an optional dependency
+(`uv sync --extra vector`); this module is the only one that needs it.
+"""
+
+import io
+import json
+import math
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from firstdata.loader import INDEXES_DIR
+from firstdata.text import field_texts, tokenize
+
+VECTORS_PATH = INDEXES_DIR / "vectors.npy"
+PROJECTION_PATH = INDEXES_DIR / "vector-projection.npy"
+VECTORS_META_PATH = INDEXES_DIR / "vectors.json"
+
+DIMENSIONS = 4096
+COMPONENTS = 128
+OVERSAMPLES = 64
+POWER_ITERATIONS = 6
+VECTOR_FIELDS = ["name", "description", "data_content"]
+
+
+def _hashed_tf(tokens: list[str]) -> np.ndarray:
+    """Signed hashed term frequencies, log-scaled."""
+    vector = np.zeros(DIMENSIONS, dtype=np.float64)
+    for token, tf in Counter(tokens).items():
+        h = zlib.crc32(token.encode("utf-8"))
+        vector[h % DIMENSIONS] += (1.0 + math.log(tf)) * (1 if h >> 31 else -1)
+    return vector
+
+
+def source_tokens(source: dict) -> list[str]:
+    return [
+        token
+        for field in VECTOR_FIELDS
+        for text in field_texts(source.get(field))
+        for token in tokenize(text)
+    ]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _npy_bytes(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array, dtype=np.float32))
+    return buffer.getvalue()
+
+
+def top_right_singular_vectors(matrix: np.ndarray, k: int) -> np.ndarray:
+    """The top `k` right singular vectors of `matrix`, as rows, by randomized SVD.
+
+    A seeded Gaussian sketch of k + OVERSAMPLES columns, refined by
+    POWER_ITERATIONS rounds of subspace iteration, captures the top of the
+    spectrum; only the small projected matrix is decomposed exactly. This
+    avoids the full SVD of the sources x DIMENSIONS matrix, whose time and
+    memory grow with the catalog.
+    """
+    rank = min(k + OVERSAMPLES, *matrix.shape)
+    sketch = np.random.default_rng(0).standard_normal((matrix.shape[1], rank)).astype(matrix.dtype)
+    q, _ = np.linalg.qr(matrix @ sketch)
+    for _ in range(POWER_ITERATIONS):
+        q, _ = np.linalg.qr(matrix.T @ q)
+        q, _ = np.linalg.qr(matrix @ q)
+    _, _, vt = np.linalg.svd(q.T @ matrix, full_matrices=False)
+    return vt[:k]
+
+
+def build_vectors(sources: list[dict]) -> dict[Path, bytes]:
+    """Contents of the three vector index files for `sources`."""
+    tf = np.zeros((len(sources), DIMENSIONS), dtype=np.float32)
+    for i, source in enumerate(sources):
+        tf[i] = _hashed_tf(source_tokens(source))
+    df = np.count_nonzero(tf, axis=0)
+    idf = (np.log((1 + len(sources)) / (1 + df)) + 1).astype(np.float32)
+    tfidf = _normalize(tf * idf)
+
+    components = min(COMPONENTS, *tfidf.shape)
+    basis = top_right_singular_vectors(tfidf, components).T
+    # Singular vectors are defined up to sign; fix it so rebuilds are stable.
+    signs = np.sign(basis[np.abs(basis).argmax(axis=0), np.arange(components)])
+    basis *= np.where(signs == 0, 1, signs)
+
+    metadata = {
+        "dimensions": DIMENSIONS,
+        "components": components,
+        "fields": VECTOR_FIELDS,
+        "ids": [s["id"] for s in sources],
+    }
+    return {
+        VECTORS_PATH: _npy_bytes(_normalize(tfidf @ basis)),
+        PROJECTION_PATH: _npy_bytes(idf[:, None] * basis),
+        VECTORS_META_PATH: (json.dumps(metadata, ensure_ascii=False, indent=2) + "\n").encode("utf-8"),
+    }
+
+
+class VectorIndex:
+    """Cosine top-k over the unit-length LSA vectors of every source."""
+
+    def __init__(self, ids: list[str], vectors: np.ndarray, projection: np.ndarray) -> None:
+        self.ids = ids
+        self.vectors = vectors
+        self.projection = projection
+
+    @classmethod
+    def load(
+        cls,
+        vectors_path: Path = VECTORS_PATH,
+        projection_path: Path = PROJECTION_PATH,
+        meta_path: Path = VECTORS_META_PATH,
+    ) -> "VectorIndex":
+        with open(meta_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+        vectors = np.load(vectors_path, mmap_mode="r")
+        if vectors.shape[0] != len(metadata["ids"]):
+            raise ValueError(f"{vectors_path} does not match {meta_path}")
+        return cls(metadata["ids"], vectors, np.load(projection_path))
+
+    def embed(self, queries: list[str]) -> np.ndarray:
+        """Unit-length vectors of free-text queries, one row per query."""
+        tf = np.array([_hashed_tf(tokenize(q)) for q in queries]).reshape(len(queries), DIMENSIONS)
+        return _normalize(tf @ self.projection).astype(np.float32)
+
+    def search_many(self, queries: list[str], limit: int = 10) -> list[list[tuple[str, float]]]:
+        """The `limit` most similar (id, cosine) pairs for each query, best first."""
+        if not queries:
+            return []
+        scores = self.embed(queries) @ self.vectors.T
+        limit = min(limit, scores.shape[1])
+        top = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+        results = []
+        for row, candidates in zip(scores, top):
+            ranked = candidates[np.lexsort((candidates, -row[candidates]))]
+            results.append([(self.ids[i], float(row[i])) for i in ranked if row[i] > 0])
+        return results
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[str, float]]:
+        return self.search_many([query], limit)[0]
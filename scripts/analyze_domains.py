@@ -1,10 +1,13 @@
 """Analyze domain usage across all data sources to identify inconsistencies."""
 
 import json
+import sys
 from collections import defaultdict
 from pathlib import Path
 
-SOURCES_DIR = Path(__file__).parent.parent / "firstdata" / "sources"
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from firstdata.loader import load_catalog  # noqa: E402
 
 
 def main() -> None:
@@ -12,23 +15,22 @@ def main() -> None:
     all_domains = defaultdict(int)
     domain_files = defaultdict(list)
 
-    for path in sorted(SOURCES_DIR.rglob("*.json")):
-        try:
-            with open(path, encoding="utf-8") as f:
-                data = json.load(f)
+    catalog = load_catalog()
+    for f in catalog.files:
+        if f.error is not None:
+            print(f"Error reading {catalog.path(f)}: {f.error}")
+            continue
 
-            for domain in data.get("domains", []):
-                all_domains[domain] += 1
-                domain_files[domain].append(str(path.relative_to(SOURCES_DIR)))
-        except Exception as e:
-            print(f"Error reading {path}: {e}")
+        for domain in f.data.get("domains", []):
+            all_domains[domain] += 1
+            domain_files[domain].append(f.file_path)
 
     # Find case-insensitive duplicates
     print("=" * 80)
     print("DOMAIN USAGE ANALYSIS")
     print("=" * 80)
     print(f"\nTotal unique domains: {len(all_domains)}")
-    print(f"Total sources scanned: {len(list(SOURCES_DIR.rglob('*.json')))}")
+    print(f"Total sources scanned: {len(catalog)}")
 
     # Group by lowercase version
     lowercase_groups = defaultdict(list)
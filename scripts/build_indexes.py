@@ -1,31 +1,177 @@
 """Generate aggregated index files from individual data source JSON files."""
 
+import argparse
+import hashlib
 import json
 import os
+import re
+import subprocess
+import sys
+import tempfile
 from collections import defaultdict
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable
 
 REPO_ROOT = Path(__file__).parent.parent
-SOURCES_DIR = REPO_ROOT / "firstdata" / "sources"
-INDEXES_DIR = REPO_ROOT / "firstdata" / "indexes"
+sys.path.insert(0, str(REPO_ROOT))
+
+from firstdata.autocomplete import AUTOCOMPLETE_PATH, build_autocomplete  # noqa: E402
+from firstdata.binindex import BINARY_PATH, build_binary  # noqa: E402
+from firstdata.catalog_db import SQLITE_PATH, read_metadata, render_database, same_database  # noqa: E402
+from firstdata.compact import GROUPED_PATH, build_compact  # noqa: E402
+from firstdata.cube import CUBE_PATH, build_cube  # noqa: E402
+from firstdata.facets import FACETS_PATH, build_facets  # noqa: E402
+from firstdata.image import IMAGE_PATH, build_image  # noqa: E402
+from firstdata.loader import (  # noqa: E402
+    INDEXES_DIR,
+    SOURCES_DIR,
+    SourceFile,
+    hash_sources,
+    load_catalog,
+    path_key,
+)
+from firstdata.ranking import BM25_PATH, FIELDS as BM25_FIELDS, build_ranked_index  # noqa: E402
+from firstdata.related import RELATED_PATH, build_related  # noqa: E402
+from firstdata.search import NGRAM_PATH, NgramIndex, build_ngram_index, catalog_digest, keyword_text  # noqa: E402
+from firstdata.spelling import SPELLING_PATH, build_spelling  # noqa: E402
+from firstdata.translations import TRANSLATIONS_PATH, build_translations  # noqa: E402
+
+try:
+    from firstdata.vectors import PROJECTION_PATH, VECTOR_FIELDS, VECTORS_PATH, build_vectors
+except ImportError:  # numpy is an optional dependency (uv sync --extra vector)
+    build_vectors = None
+
 BADGES_DIR = REPO_ROOT / "assets" / "badges"
 
+MANIFEST_PATH = INDEXES_DIR / "build-manifest.json"
+
 SCHEMA_VERSION = "2.0"
+MANIFEST_VERSION = 2
+GENERATED_AT_RE = re.compile(rb'"generated_at": "([^"]+)"')
 TARGET_TOTAL = 1000
 
+# Indexes built from a few fields of each source: an edit that leaves
+# those fields alone leaves the index alone, so its builder is skipped.
+# An edit that does touch them still rebuilds the whole index: related,
+# BM25 and vector weights depend on catalog-wide statistics (document
+# frequencies, the SVD projection), so they are not patched per file.
+# Neither are catalog.sqlite and catalog.img, which are rendered in one
+# pass. A one-file text edit therefore costs a few seconds, not the
+# near-zero of an edit that leaves these fields alone.
+FIELD_INPUTS = {
+    AUTOCOMPLETE_PATH: ["tags", "domains", "name"],
+    SPELLING_PATH: ["tags", "domains", "name"],
+    TRANSLATIONS_PATH: ["tags", "name"],
+    RELATED_PATH: ["domains", "tags", "description"],
+    BM25_PATH: list(BM25_FIELDS),
+}
+if build_vectors is not None:
+    FIELD_INPUTS[VECTORS_PATH] = VECTOR_FIELDS
+
+# Rewritten whole by most source edits, so CI publishes them to the
+# bucket instead of committing them (see .gitignore).
+UNCOMMITTED_INDEXES = [SQLITE_PATH, BINARY_PATH, NGRAM_PATH, IMAGE_PATH, BM25_PATH]
+if build_vectors is not None:
+    UNCOMMITTED_INDEXES += [VECTORS_PATH, PROJECTION_PATH]
+
+
+def to_record(source_file: SourceFile) -> dict:
+    """Index record for one source: its content plus derived fields."""
+    return {
+        **source_file.data,
+        "has_api": source_file.data.get("api_url") is not None,
+        "file_path": source_file.file_path,
+    }
+
+
+def load_sources() -> tuple[list[dict], dict[str, str]]:
+    catalog = load_catalog()
+    if catalog.errors:
+        raise SystemExit(f"Cannot parse {catalog.errors[0].file_path}: {catalog.errors[0].error}")
+    records = [to_record(f) for f in catalog.files]
+    return records, {f.file_path: f.content_hash for f in catalog.files}
+
+
+def load_manifest() -> dict | None:
+    """Return the manifest of the previous build, if usable."""
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def code_digest() -> str:
+    """Digest of the code that builds the indexes: this script and the firstdata modules it uses."""
+    digest = hashlib.sha1(Path(__file__).read_bytes())
+    for name, module in sorted(sys.modules.items()):
+        if name.split(".")[0] == "firstdata" and getattr(module, "__file__", None):
+            digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def index_key(path: Path) -> str:
+    return path.relative_to(INDEXES_DIR).as_posix()
+
 
-def load_sources() -> list[dict]:
-    sources = []
-    for path in sorted(SOURCES_DIR.rglob("*.json")):
-        with open(path, encoding="utf-8") as f:
-            data = json.load(f)
-        data["has_api"] = data.get("api_url") is not None
-        data["file_path"] = str(path.relative_to(SOURCES_DIR)).replace(os.sep, '/')
-        sources.append(data)
+def input_digest(sources: list[dict], fields: list[str]) -> str:
+    """Digest of the id and `fields` of every source, in catalog order."""
+    digest = hashlib.sha1()
+    for s in sources:
+        values = [s["id"], *(s.get(field) for field in fields)]
+        digest.update(json.dumps(values, ensure_ascii=False, sort_keys=True).encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+def load_previous_sources() -> dict[str, dict] | None:
+    """Return the records of the previous build keyed by file_path, if any."""
+    try:
+        with open(INDEXES_DIR / "all-sources.json", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return {s["file_path"]: s for s in previous["sources"]}
+
+
+def load_sources_incremental(hashes: dict[str, str], manifest: dict[str, str]) -> list[dict] | None:
+    """Re-parse only added or changed files, reusing the previous build for the rest.
+
+    `manifest` is the file_path -> content hash map of the previous build.
+    Returns None when there is no consistent previous build to patch, in
+    which case the caller falls back to a full rebuild.
+    """
+    previous = load_previous_sources()
+    if previous is None or previous.keys() != manifest.keys():
+        return None
+
+    added = {p for p in hashes if p not in manifest}
+    changed = {p for p in hashes if p in manifest and manifest[p] != hashes[p]}
+    deleted = manifest.keys() - hashes.keys()
+    print(f"  Incremental: {len(added)} added, {len(changed)} changed, {len(deleted)} deleted")
+
+    catalog = load_catalog(paths=[SOURCES_DIR / p for p in added | changed])
+    if catalog.errors:
+        raise SystemExit(f"Cannot parse {catalog.errors[0].file_path}: {catalog.errors[0].error}")
+
+    sources = [previous[p] for p in hashes if p not in added and p not in changed]
+    sources.extend(to_record(f) for f in catalog.files)
+    sources.sort(key=lambda s: path_key(s["file_path"]))
     return sources
 
 
+def build_manifest(hashes: dict[str, str], code: str, inputs: dict[str, str]) -> dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "code": code,
+        "inputs": dict(sorted(inputs.items())),
+        "files": dict(sorted(hashes.items())),
+    }
+
+
 def summary_entry(source: dict) -> dict:
     """Compact representation used in grouped indexes."""
     entry = {
@@ -41,16 +187,20 @@ def summary_entry(source: dict) -> dict:
     return entry
 
 
-def build_all_sources(sources: list[dict], now: str) -> dict:
-    return {
-        "metadata": {
-            "generated_at": now,
-            "total_sources": len(sources),
-            "version": SCHEMA_VERSION,
-            "schema_version": "v2.0.0",
-        },
-        "sources": sources,
-    }
+def build_all_sources(hashes: dict[str, str]) -> Callable[[list[dict], str], dict]:
+    """Builder for all-sources.json, stamped with the catalog digest of the files in `hashes`."""
+    def build(sources: list[dict], now: str) -> dict:
+        return {
+            "metadata": {
+                "generated_at": now,
+                "total_sources": len(sources),
+                "version": SCHEMA_VERSION,
+                "schema_version": "v2.0.0",
+                "catalog_digest": catalog_digest(hashes.items()).hex(),
+            },
+            "sources": sources,
+        }
+    return build
 
 
 def build_by_authority(sources: list[dict], now: str) -> dict:
@@ -106,6 +256,20 @@ def build_by_region(sources: list[dict], now: str) -> dict:
     }
 
 
+def build_grouped(grouped: dict[str, dict]) -> Callable[[list[dict], str], dict]:
+    """Builder for the compact index holding the given legacy grouped indexes."""
+    def build(sources: list[dict], now: str) -> dict:
+        return build_compact(
+            grouped,
+            {
+                "generated_at": now,
+                "total_sources": len(sources),
+                "version": SCHEMA_VERSION,
+            },
+        )
+    return build
+
+
 def build_statistics(sources: list[dict], now: str) -> dict:
     by_authority: dict[str, int] = defaultdict(int)
     by_scope: dict[str, int] = defaultdict(int)
@@ -167,27 +331,179 @@ def build_badges(sources: list[dict]) -> list[tuple[Path, dict]]:
     ]
 
 
-def write_json(path: Path, data: dict) -> None:
+def render_json(data: dict) -> bytes:
+    return (json.dumps(data, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
+def write_json(path: Path, data: dict) -> bool:
+    """Atomically write `data` to `path` unless the file already has those exact bytes."""
+    return write_bytes(path, render_json(data))
+
+
+def write_bytes(path: Path, content: bytes) -> bool:
+    """Atomically write `content` to `path` unless the file already has those exact bytes."""
+    try:
+        if path.read_bytes() == content:
+            print(f"  [UNCHANGED] {path.relative_to(REPO_ROOT)}")
+            return False
+    except FileNotFoundError:
+        pass
+
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-        f.write("\n")  # Add trailing newline
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", delete=False) as f:
+        f.write(content)
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, path)
     print(f"  [OK] {path.relative_to(REPO_ROOT)}")
+    return True
+
+
+def previous_timestamp(path: Path) -> str | None:
+    """generated_at of an existing index file; metadata is always its first key."""
+    try:
+        with open(path, "rb") as f:
+            match = GENERATED_AT_RE.search(f.read(1024))
+    except FileNotFoundError:
+        return None
+    return match.group(1).decode() if match else None
+
+
+def write_index(path: Path, build: Callable[[list[dict], str], dict], sources: list[dict], now: str) -> dict:
+    """Write an index, keeping its previous generated_at if nothing else changed.
+
+    Returns the index as it now stands on disk.
+    """
+    previous = previous_timestamp(path)
+    if previous is not None:
+        data = build(sources, previous)
+        if path.read_bytes() == render_json(data):
+            print(f"  [UNCHANGED] {path.relative_to(REPO_ROOT)}")
+            return data
+    data = build(sources, now)
+    write_json(path, data)
+    return data
+
+
+def catalog_db_metadata(sources: list[dict], now: str) -> dict:
+    return {
+        "generated_at": now,
+        "total_sources": len(sources),
+        "version": SCHEMA_VERSION,
+    }
+
+
+def write_catalog_db(sources: list[dict], now: str) -> None:
+    """Write catalog.sqlite, keeping its previous generated_at if nothing else changed."""
+    previous = (read_metadata(SQLITE_PATH) or {}).get("generated_at")
+    if previous is not None:
+        content = render_database(sources, catalog_db_metadata(sources, previous))
+        if same_database(SQLITE_PATH.read_bytes(), content):
+            print(f"  [UNCHANGED] {SQLITE_PATH.relative_to(REPO_ROOT)}")
+            return
+    write_bytes(SQLITE_PATH, render_database(sources, catalog_db_metadata(sources, now)))
+
+
+def source_timestamp() -> str:
+    """Time of the newest committed source change, so rebuilding the same tree is reproducible.
+
+    Falls back to the current time when git is unavailable or the sources
+    have uncommitted changes.
+    """
+    try:
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--", str(SOURCES_DIR)],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        committed = subprocess.run(
+            ["git", "log", "-1", "--format=%ct", "--", str(SOURCES_DIR)],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        status, committed = "", ""
+    if status or not committed:
+        return datetime.now(timezone.utc).isoformat()
+    return datetime.fromtimestamp(int(committed), timezone.utc).isoformat()
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate aggregated index files from individual data source JSON files."
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-parse every source file and rebuild every index instead of patching the previous build",
+    )
+    args = parser.parse_args()
+
     print("Loading sources...")
-    sources = load_sources()
+    code = code_digest()
+    manifest = None if args.full else load_manifest()
+    if manifest is not None and manifest.get("code") != code:
+        print("  Index code changed since the last build")
+        manifest["inputs"] = {}
+    sources = None
+    if manifest is not None:
+        hashes = hash_sources()
+        if (
+            hashes == manifest["files"]
+            and manifest["inputs"].keys() >= set(map(index_key, FIELD_INPUTS))
+            and all(path.exists() for path in UNCOMMITTED_INDEXES)
+        ):
+            print("  No source changes, indexes are up to date")
+            return
+        sources = load_sources_incremental(hashes, manifest["files"])
+    if sources is None:
+        print("  Full rebuild")
+        sources, hashes = load_sources()
+        manifest = None
     print(f"  Found {len(sources)} source files")
+    previous_inputs = manifest["inputs"] if manifest is not None else {}
+    inputs: dict[str, str] = {}
+
+    def stale(path: Path) -> bool:
+        """Record the input digest of a FIELD_INPUTS index; False if its last build used the same."""
+        key = index_key(path)
+        inputs[key] = input_digest(sources, FIELD_INPUTS[path])
+        if previous_inputs.get(key) == inputs[key] and path.exists():
+            print(f"  [UNCHANGED] {path.relative_to(REPO_ROOT)} (inputs unchanged)")
+            return False
+        return True
 
-    now = datetime.now(timezone.utc).isoformat()
+    now = source_timestamp()
 
     print("Building indexes...")
-    write_json(INDEXES_DIR / "all-sources.json", build_all_sources(sources, now))
-    write_json(INDEXES_DIR / "by-authority.json", build_by_authority(sources, now))
-    write_json(INDEXES_DIR / "by-domain.json", build_by_domain(sources, now))
-    write_json(INDEXES_DIR / "by-region.json", build_by_region(sources, now))
-    write_json(INDEXES_DIR / "statistics.json", build_statistics(sources, now))
+    write_index(INDEXES_DIR / "all-sources.json", build_all_sources(hashes), sources, now)
+    grouped = {
+        "by-authority": write_index(INDEXES_DIR / "by-authority.json", build_by_authority, sources, now),
+        "by-domain": write_index(INDEXES_DIR / "by-domain.json", build_by_domain, sources, now),
+        "by-region": write_index(INDEXES_DIR / "by-region.json", build_by_region, sources, now),
+    }
+    write_index(GROUPED_PATH, build_grouped(grouped), sources, now)
+    write_index(INDEXES_DIR / "statistics.json", build_statistics, sources, now)
+    write_index(FACETS_PATH, build_facets, sources, now)
+    write_index(CUBE_PATH, build_cube, sources, now)
+    for path, build in [
+        (AUTOCOMPLETE_PATH, build_autocomplete),
+        (SPELLING_PATH, build_spelling),
+        (TRANSLATIONS_PATH, build_translations),
+        (RELATED_PATH, build_related),
+    ]:
+        if stale(path):
+            write_index(path, build, sources, now)
+    write_catalog_db(sources, now)
+    write_bytes(BINARY_PATH, build_binary(sources))
+    keywords = NgramIndex.build([keyword_text(s) for s in sources])
+    write_bytes(NGRAM_PATH, build_ngram_index(sources, hashes, keywords))
+    write_bytes(IMAGE_PATH, build_image(sources, hashes, keywords))
+    if stale(BM25_PATH):
+        write_bytes(BM25_PATH, build_ranked_index(sources))
+    if build_vectors is None:
+        print("  [SKIP] vector index (numpy is not installed)")
+    elif stale(VECTORS_PATH):
+        for path, content in build_vectors(sources).items():
+            write_bytes(path, content)
+    write_json(MANIFEST_PATH, build_manifest(hashes, code, inputs))
 
     print("Building badges...")
     for path, data in build_badges(sources):
@@ -0,0 +1,89 @@
+"""Run every source check in one pass and emit a combined report.
+
+Replaces running `make validate`, check_ids.py, check_domains.py and
+taxonomy-health-check.py one after another: the catalog is parsed once
+and every rule runs over the shared data.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from firstdata.changed import run_changed_checks  # noqa: E402
+from firstdata.checks import RULES, run_checks  # noqa: E402
+from firstdata.loader import load_catalog  # noqa: E402
+
+SEVERITY_ICONS = {"error": "🔴", "warning": "🟡", "info": "📊"}
+
+
+def print_summary(report: dict) -> None:
+    print("=" * 60)
+    print("  FirstData Source Checks")
+    print(f"  Sources scanned: {report['total_sources']} (loaded in {report['load_ms']:.1f} ms)")
+    if "mode" in report:
+        print(f"  Mode: {report['mode']}")
+    print("=" * 60)
+    for name, result in report["rules"].items():
+        icon = "✅" if not result["count"] else SEVERITY_ICONS[result["severity"]]
+        blocking = "" if result["blocking"] else " (non-blocking)"
+        print(f"  {icon} {name:<26} {result['count']:>5} finding(s) {result['elapsed_ms']:>9.1f} ms{blocking}")
+
+    for name in report["summary"]["failed_rules"]:
+        print(f"\n[FAIL] {name}: {report['rules'][name]['description']}")
+        for item in report["rules"][name]["items"][:20]:
+            print(f"  - {json.dumps(item, ensure_ascii=False)}")
+        if report["rules"][name]["count"] > 20:
+            print(f"  ... and {report['rules'][name]['count'] - 20} more")
+
+    print("\n" + "=" * 60)
+    s = report["summary"]
+    status = "✅ PASS" if s["pass"] else "❌ FAIL"
+    print(f"  {status} | Blocking: {s['blocking']} | Errors: {s['errors']} | Warnings: {s['warnings']} | Info: {s['info']}")
+    print("=" * 60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run every source check in one pass.")
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument(
+        "--changed",
+        metavar="BASE",
+        help="Check only source files changed since the merge base with BASE (e.g. origin/main), "
+        "comparing ids and domains against the published index",
+    )
+    scope.add_argument(
+        "--rules",
+        nargs="+",
+        choices=sorted(RULES),
+        metavar="RULE",
+        help=f"Run only these rules (default: all). Available: {', '.join(RULES)}",
+    )
+    parser.add_argument("--json", action="store_true", help="Print only the JSON report")
+    parser.add_argument("--output", type=Path, help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.changed:
+        report = run_changed_checks(args.changed)
+    else:
+        report = run_checks(load_catalog(), args.rules)
+    # Everything that is not rule time: git, index and source loading.
+    report["load_ms"] = round((time.perf_counter() - t0) * 1000 - report["summary"]["elapsed_ms"], 3)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_summary(report)
+
+    if not report["summary"]["pass"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
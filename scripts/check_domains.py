@@ -1,17 +1,13 @@
 """Check for domain field inconsistencies across all source JSON files."""
 
 import argparse
-import json
 import sys
-from collections import defaultdict
 from pathlib import Path
 
-SOURCES_DIR = Path(__file__).parent.parent / "firstdata" / "sources"
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-
-def normalize_domain(domain: str) -> str:
-    """Normalize domain to lowercase for comparison."""
-    return domain.lower()
+from firstdata.checks import find_domain_case_variants  # noqa: E402
+from firstdata.loader import load_catalog  # noqa: E402
 
 
 def main() -> None:
@@ -27,39 +23,22 @@ def main() -> None:
 
     print("Checking domain consistency across all sources...")
 
-    # Collect all domains and their files
-    domain_variants = defaultdict(lambda: defaultdict(list))
-    errors = []
-
-    for path in sorted(SOURCES_DIR.rglob("*.json")):
-        rel_path = path.relative_to(SOURCES_DIR)
-        try:
-            with open(path, encoding="utf-8") as f:
-                data = json.load(f)
-
-            domains = data.get("domains", [])
-
-            for domain in domains:
-                normalized = normalize_domain(domain)
-                domain_variants[normalized][domain].append(str(rel_path))
-
-        except Exception as e:
-            errors.append(f"{rel_path}: Error reading file - {e}")
+    catalog = load_catalog()
+    errors = [f"{f.file_path}: Error reading file - {f.error}" for f in catalog.errors]
 
     # Check for case inconsistencies
     inconsistencies = []
-    for normalized, variants in sorted(domain_variants.items()):
-        if len(variants) > 1:
-            # Multiple capitalizations exist for the same domain
-            files_affected = []
-            for variant, paths in variants.items():
-                files_affected.extend([(variant, p) for p in paths])
-
-            inconsistencies.append({
-                "normalized": normalized,
-                "variants": dict(variants),
-                "files": files_affected,
-            })
+    for normalized, variants in find_domain_case_variants(catalog).items():
+        # Multiple capitalizations exist for the same domain
+        files_affected = []
+        for variant, paths in variants.items():
+            files_affected.extend([(variant, p) for p in paths])
+
+        inconsistencies.append({
+            "normalized": normalized,
+            "variants": variants,
+            "files": files_affected,
+        })
 
     # Report findings
     if errors:
@@ -1,23 +1,22 @@
 """Check for duplicate IDs across all source JSON files."""
 
-import json
 import sys
 from pathlib import Path
 
-SOURCES_DIR = Path(__file__).parent.parent / "firstdata" / "sources"
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from firstdata.checks import find_duplicate_ids  # noqa: E402
+from firstdata.loader import load_catalog  # noqa: E402
 
 
 def main() -> None:
-    seen: dict[str, Path] = {}
-    errors: list[str] = []
+    catalog = load_catalog()
+    errors: list[str] = [f"Cannot parse {catalog.path(f)}: {f.error}" for f in catalog.errors]
 
-    for path in sorted(SOURCES_DIR.rglob("*.json")):
-        data = json.loads(path.read_text(encoding="utf-8"))
-        id_ = data.get("id")
-        if id_ in seen:
-            errors.append(f"Duplicate id '{id_}' in:\n  {seen[id_]}\n  {path}")
-        else:
-            seen[id_] = path
+    for id_, paths in find_duplicate_ids(catalog).items():
+        first, *others = [catalog.sources_dir / p for p in paths]
+        for path in others:
+            errors.append(f"Duplicate id '{id_}' in:\n  {first}\n  {path}")
 
     if errors:
         print("[ERROR] Duplicate IDs found:")
@@ -25,7 +24,7 @@ def main() -> None:
             print(e)
         sys.exit(1)
 
-    print(f"[OK] All {len(seen)} IDs are unique.")
+    print(f"[OK] All {len({f.data.get('id') for f in catalog.valid_files})} IDs are unique.")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,12 @@
 """Fix domain case inconsistencies by converting all domains to lowercase."""
 
 import json
+import sys
 from pathlib import Path
 
-SOURCES_DIR = Path(__file__).parent.parent / "firstdata" / "sources"
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from firstdata.loader import load_catalog  # noqa: E402
 
 
 def main() -> None:
@@ -14,15 +17,21 @@ def main() -> None:
     unchanged_files = []
     errors = []
 
-    for path in sorted(SOURCES_DIR.rglob("*.json")):
-        rel_path = path.relative_to(SOURCES_DIR)
+    catalog = load_catalog()
+    for source_file in catalog.files:
+        rel_path = source_file.file_path
+        if source_file.error is not None:
+            error_msg = f"{rel_path}: {source_file.error}"
+            errors.append(error_msg)
+            print(f"[ERROR] {error_msg}")
+            continue
+
         try:
-            with open(path, encoding="utf-8") as f:
-                data = json.load(f)
+            data = source_file.data
 
             original_domains = data.get("domains", [])
             if not original_domains:
-                unchanged_files.append(str(rel_path))
+                unchanged_files.append(rel_path)
                 continue
 
             # Convert all domains to lowercase
@@ -33,7 +42,7 @@ def main() -> None:
                 data["domains"] = lowercase_domains
 
                 # Write back with same formatting
-                with open(path, "w", encoding="utf-8") as f:
+                with open(catalog.path(source_file), "w", encoding="utf-8") as f:
                     json.dump(data, f, ensure_ascii=False, indent=2)
                     f.write("\n")  # Add trailing newline
 
@@ -42,9 +51,9 @@ def main() -> None:
                 print(f"  After:  {lowercase_domains}")
                 print()
 
-                fixed_files.append(str(rel_path))
+                fixed_files.append(rel_path)
             else:
-                unchanged_files.append(str(rel_path))
+                unchanged_files.append(rel_path)
 
         except Exception as e:
             error_msg = f"{rel_path}: {e}"
@@ -0,0 +1,82 @@
+"""Serve search_source and get_source over MCP from the built indexes.
+
+    python scripts/serve_mcp.py                  # streamable HTTP on 127.0.0.1:8765/mcp
+    python scripts/serve_mcp.py --port 9000 --host 0.0.0.0
+    python scripts/serve_mcp.py --stdio          # for MCP clients that spawn the server
+    python scripts/serve_mcp.py --workers 8 --mmap   # 8 processes sharing catalog.img
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from firstdata.loader import INDEXES_DIR  # noqa: E402
+from firstdata.server import DEFAULT_HOST, DEFAULT_PORT, MCP_PATH, McpServer, Snapshot  # noqa: E402
+
+
+def serve(args: argparse.Namespace) -> None:
+    loader = Snapshot.map if args.mmap else Snapshot.load
+    t0 = time.perf_counter()
+    snapshot = loader(args.indexes)
+    # stdout belongs to the protocol in stdio mode.
+    print(
+        f"Loaded {len(snapshot.sources)} sources in {(time.perf_counter() - t0) * 1000:.0f} ms",
+        file=sys.stderr,
+    )
+
+    server = McpServer(snapshot, None if args.no_reload else args.indexes, loader)
+    try:
+        if args.stdio:
+            asyncio.run(server.serve_stdio())
+        else:
+            asyncio.run(server.serve_http(args.host, args.port, reuse_port=args.workers > 1))
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the FirstData MCP tools from the built indexes.")
+    parser.add_argument("--stdio", action="store_true", help="Speak MCP over stdin/stdout instead of HTTP")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"HTTP bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"HTTP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--indexes", type=Path, default=INDEXES_DIR, help="Directory of the built indexes")
+    parser.add_argument(
+        "--no-reload",
+        action="store_true",
+        help="Keep serving the indexes loaded at startup instead of picking up rebuilt ones",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Query catalog.img in place through a shared mapping instead of parsing the JSON indexes",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="HTTP worker processes sharing the port (default: 1)")
+    args = parser.parse_args()
+    if args.workers < 1 or (args.stdio and args.workers > 1):
+        parser.error("--workers must be at least 1, and 1 with --stdio")
+
+    if args.workers == 1:
+        if not args.stdio:
+            print(f"Serving on http://{args.host}:{args.port}{MCP_PATH}", file=sys.stderr)
+        serve(args)
+        return
+
+    print(f"Serving on http://{args.host}:{args.port}{MCP_PATH} with {args.workers} workers", file=sys.stderr)
+    workers = [multiprocessing.Process(target=serve, args=(args,)) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Shared fixtures: a sample source record, throwaway source trees and a local MCP endpoint."""
+
+import asyncio
+import copy
+import json
+import threading
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from firstdata.loader import INDEXES_DIR, SOURCES_DIR
+from firstdata.server import McpServer
+
+SAMPLE_PATH = SOURCES_DIR / "academic" / "ieee-xplore.json"
+
+
+@pytest.fixture(scope="session")
+def _sample_data() -> dict:
+    with open(SAMPLE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def records() -> list[dict]:
+    """The index records of the committed all-sources.json."""
+    with open(INDEXES_DIR / "all-sources.json", encoding="utf-8") as f:
+        return json.load(f)["sources"]
+
+
+@pytest.fixture
+def make_source(_sample_data) -> Callable[..., dict]:
+    """Build a schema-valid source: the sample record with `id` and the given fields replaced."""
+    def make(source_id: str, **fields) -> dict:
+        return {**copy.deepcopy(_sample_data), "id": source_id, **fields}
+    return make
+
+
+@pytest.fixture
+def write_sources(tmp_path) -> Callable[[dict[str, dict | str]], Path]:
+    """Write {relative path: record or raw text} into a fresh sources directory and return it."""
+    root = tmp_path / "sources"
+
+    def write(files: dict[str, dict | str]) -> Path:
+        for file_path, content in files.items():
+            path = root / file_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not isinstance(content, str):
+                content = json.dumps(content, ensure_ascii=False, indent=2) + "\n"
+            path.write_text(content, encoding="utf-8")
+        return root
+
+    return write
+
+
+@pytest.fixture
+def serve_http() -> Callable[[McpServer], str]:
+    """Serve an McpServer over HTTP on an ephemeral port, in a background thread; returns its URL."""
+    running = []
+
+    def serve(server: McpServer) -> str:
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        listener = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(server._connection, "127.0.0.1", 0), loop
+        ).result()
+        running.append((loop, listener, thread))
+        host, port = listener.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/mcp"
+
+    yield serve
+
+    async def shutdown(listener: asyncio.Server) -> None:
+        listener.close()
+        connections = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+
+    for loop, listener, thread in running:
+        asyncio.run_coroutine_threadsafe(shutdown(listener), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,41 @@
+import heapq
+
+import pytest
+
+from firstdata.autocomplete import Autocomplete, build_autocomplete, load_autocomplete, term_keys
+
+
+@pytest.fixture(scope="module")
+def autocomplete(records) -> Autocomplete:
+    return Autocomplete([tuple(t) for t in build_autocomplete(records, "now")["terms"]])
+
+
+def reference(autocomplete, prefix, limit):
+    """Best completions by scanning every term."""
+    prefix = prefix.lower()
+    matching = [
+        (term, weight) for term, weight in autocomplete.terms
+        if any(key.startswith(prefix) for key in term_keys(term))
+    ]
+    return heapq.nsmallest(limit, matching, key=lambda t: (-t[1], len(t[0]), t[0].lower(), t[0]))
+
+
+@pytest.mark.parametrize("prefix", ["g", "gd", "gdp", "Growth", "bank", "世界", "中", "statistics-", "zzzz"])
+def test_completions_match_a_scan(autocomplete, prefix):
+    assert autocomplete.complete(prefix, 20) == reference(autocomplete, prefix, 20)
+
+
+def test_word_starts_complete():
+    index = Autocomplete([("economic-growth", 3), ("World Bank", 2)])
+    assert index.complete("growth") == [("economic-growth", 3)]
+    assert index.complete("ban") == [("World Bank", 2)]
+    assert index.complete("  ") == []
+
+
+def test_limit_is_validated(autocomplete):
+    with pytest.raises(ValueError):
+        autocomplete.complete("gdp", 0)
+
+
+def test_committed_index_is_current(autocomplete):
+    assert load_autocomplete().terms == autocomplete.terms
@@ -0,0 +1,40 @@
+import pytest
+
+from firstdata.binindex import BinaryCatalog, build_binary
+
+
+@pytest.fixture(scope="module")
+def catalog(records, tmp_path_factory):
+    path = tmp_path_factory.mktemp("bin") / "sources.bin"
+    path.write_bytes(build_binary(records))
+    with BinaryCatalog(path) as catalog:
+        yield catalog
+
+
+def test_every_record_round_trips(catalog, records):
+    assert len(catalog) == len(records)
+    for record in records:
+        assert catalog.get(record["id"]) == record
+
+
+def test_ids_are_sorted_by_bytes(catalog, records):
+    assert list(catalog.ids()) == sorted((r["id"] for r in records), key=lambda i: i.encode("utf-8"))
+
+
+def test_missing_ids(catalog, records):
+    assert catalog.get("no-such-source") is None
+    assert "no-such-source" not in catalog
+    first = records[0]["id"]
+    assert catalog.get_many([first, "no-such-source", first]) == {first: records[0]}
+
+
+def test_duplicate_ids_are_rejected():
+    with pytest.raises(ValueError):
+        build_binary([{"id": "a"}, {"id": "a"}])
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "sources.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        BinaryCatalog(path)
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from firstdata.cache import QueryCache, cache_key
+from firstdata.client import FirstDataClient
+from firstdata.search import SearchIndex
+from firstdata.server import McpServer, Snapshot
+
+
+def test_equivalent_calls_share_a_key():
+    assert cache_key("search_source", {"keywords": ["GDP", "中国", "gdp"]}) == cache_key(
+        "search_source", {"keywords": ["中国", "gdp"], "limit": 20, "domain": ""}
+    )
+    assert cache_key("search_source", {"keywords": "x", "domain": "Economics"}) == cache_key(
+        "search_source", {"keywords": ["x"], "domain": "economics"}
+    )
+    assert cache_key("search_source", {"keywords": ["x"], "limit": 5}) != cache_key("search_source", {"keywords": ["x"]})
+    assert cache_key("get_source", {"source_ids": ["a"], "fields": ["b", "a", "b"]}) == cache_key(
+        "get_source", {"source_ids": ["a"], "fields": ["a", "b"]}
+    )
+
+
+def test_returned_values_are_copies():
+    cache = QueryCache()
+    value = [{"id": "a", "tags": ["x"]}]
+    cache.put("k", value, 60)
+    value[0]["tags"].append("changed")
+    hit = cache.get("k")
+    assert hit == [{"id": "a", "tags": ["x"]}]
+    hit[0]["id"] = "mutated"
+    assert cache.get("k") == [{"id": "a", "tags": ["x"]}]
+
+
+def test_expiry_and_eviction():
+    cache = QueryCache(max_entries=2)
+    cache.put("old", 1, -1)
+    assert cache.get("old") is None
+    for key in "abc":
+        cache.put(key, key, 60)
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+    stats = cache.stats()
+    assert (stats["evictions"], stats["expirations"], stats["memory_hits"], stats["misses"]) == (1, 1, 1, 2)
+
+
+def test_disk_tier_resumes_the_newest_generation(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = QueryCache(path=path)
+    cache.set_generation("g1")
+    cache.put("a", {"v": 1}, 60, cost=0.5)
+    cache.set_generation("g2")
+    cache.put_many([("b", {"v": 2}, 60, 0.25), ("c", [3], 60, 0.25)])
+    cache.close()
+
+    reopened = QueryCache(path=path)
+    assert reopened.generation == "g2"
+    assert reopened.get("b") == {"v": 2}
+    assert reopened.get("c") == [3]
+    assert reopened.get("a") is None  # dropped when the cache moved to g2
+    assert reopened.stats()["disk_hits"] == 2
+    assert reopened.stats()["saved_seconds"] == 0.5
+
+
+def test_late_response_of_a_retired_generation(tmp_path):
+    cache = QueryCache(path=tmp_path / "cache.sqlite")
+    assert cache.set_generation("g1")
+    assert cache.set_generation("g2")
+    cache.put("a", 1, 60)
+    assert cache.set_generation("g1") is False
+    assert cache.generation == "g2"
+    assert cache.get("a") == 1
+    assert cache.set_generation("") is True
+
+
+def test_purge(tmp_path):
+    cache = QueryCache(path=tmp_path / "cache.sqlite")
+    cache.put_many([("a", 1, -1, 0.0), ("b", 2, 60, 0.0)])
+    assert cache.purge() == 1
+    assert cache.get("b") == 2
+
+
+class GenerationSnapshot(Snapshot):
+    def __init__(self, records: list[dict], generation: str) -> None:
+        by_id = {r["id"]: r for r in records}
+        super().__init__(records, SearchIndex(records), by_id.get, generation)
+        self.calls = 0
+
+    def get_source(self, arguments: dict) -> list[dict]:
+        self.calls += 1
+        return super().get_source(arguments)
+
+
+def test_client_caches_per_id_and_skips_stale_generations(records, serve_http):
+    server = McpServer(GenerationSnapshot(records, "g1"))
+    url = serve_http(server)
+    cache = QueryCache()
+    ids = [r["id"] for r in records[:30]]
+
+    async def calls(client):
+        first = await client.get_source(ids[:20])
+        again = await client.get_source(ids[10:30])  # only ids[20:30] are requested
+        assert server.snapshot.calls == 2
+        server.snapshot = GenerationSnapshot(records, "g2")
+        await client.get_source([records[40]["id"]])  # the response reports g2
+        await client.get_source(ids[:5])
+        assert server.snapshot.calls == 2  # the cache dropped g1's records
+        server.snapshot = GenerationSnapshot(records, "g1")
+        await client.get_source(ids[5:8])
+        await client.get_source(ids[5:8])
+        assert server.snapshot.calls == 2  # g1 is retired, its responses are not cached
+        return first, again
+
+    async def main():
+        async with FirstDataClient(url, cache=cache) as client:
+            return await calls(client)
+
+    first, again = asyncio.run(main())
+    assert first == records[:20]
+    assert again == records[10:30]
+    assert cache.generation == "g2"
+
+
+@pytest.mark.parametrize("fields", [None, ["name"]])
+def test_client_cache_hits_are_identical_to_responses(records, serve_http, fields):
+    url = serve_http(McpServer(GenerationSnapshot(records, "g1")))
+    ids = [r["id"] for r in records[:3]]
+
+    async def main():
+        async with FirstDataClient(url, cache=QueryCache()) as client:
+            fetched = await client.get_source(ids, fields)
+            fetched[0]["id"] = "mutated"
+            return await client.get_source(ids, fields)
+
+    expected = records[:3] if fields is None else [{"id": r["id"], "name": r["name"]} for r in records[:3]]
+    assert asyncio.run(main()) == expected
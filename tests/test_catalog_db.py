@@ -0,0 +1,41 @@
+import pytest
+
+from firstdata.catalog_db import TEXT_COLUMNS, build_database, connect, read_metadata, search_text
+
+
+@pytest.fixture(scope="module")
+def conn(records, tmp_path_factory):
+    path = tmp_path_factory.mktemp("db") / "catalog.sqlite"
+    build_database(path, records, {"generated_at": "2026-01-01T00:00:00+00:00"})
+    conn = connect(path)
+    yield conn
+    conn.close()
+
+
+def expected_ids(conn, term: str) -> list[str]:
+    rows = conn.execute(f"SELECT id, {', '.join(TEXT_COLUMNS)} FROM sources ORDER BY rowid").fetchall()
+    return [row["id"] for row in rows if any(term.lower() in (row[c] or "").lower() for c in TEXT_COLUMNS)]
+
+
+@pytest.mark.parametrize("term", ["中国", "EU", "m2", "统计", "gdp", "中国人民银行", "Statistics", "100%", "a_b"])
+def test_search_text_matches_substrings(conn, term):
+    found = [row["id"] for row in search_text(conn, term)]
+    assert found == expected_ids(conn, term)
+
+
+def test_short_chinese_terms_are_found(conn):
+    assert len(search_text(conn, "中国")) > 100
+
+
+def test_rows_mirror_the_records(conn, records):
+    assert conn.execute("SELECT count(*) FROM sources").fetchone()[0] == len(records)
+    row = conn.execute("SELECT * FROM sources WHERE id = ?", (records[0]["id"],)).fetchone()
+    assert row["name_en"] == records[0]["name"]["en"]
+    assert row["file_path"] == records[0]["file_path"]
+
+
+def test_metadata(tmp_path):
+    path = tmp_path / "catalog.sqlite"
+    build_database(path, [], {"generated_at": "x"})
+    assert read_metadata(path) == {"generated_at": "x", "db_version": "1"}
+    assert read_metadata(tmp_path / "missing.sqlite") is None
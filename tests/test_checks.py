@@ -0,0 +1,77 @@
+from firstdata.checks import RULES, run_checks
+from firstdata.loader import load_catalog
+
+
+def test_current_catalog_passes_blocking_rules():
+    report = run_checks(load_catalog(), [name for name, r in RULES.items() if r.blocking])
+    assert report["summary"]["pass"], report["summary"]["failed_rules"]
+
+
+def test_findings_of_a_broken_tree(write_sources, make_source):
+    root = write_sources({
+        "countries/a.json": make_source("dup", domains=["Economics"]),
+        "countries/b.json": make_source("dup", domains=["economics"]),
+        "countries/c.json": make_source("bad", authority_level="rumour"),
+        "countries/d.json": "{not json",
+    })
+    report = run_checks(load_catalog(root), ["parse_errors", "schema", "duplicate_ids", "domain_case"])
+    rules = report["rules"]
+
+    assert [item["file"] for item in rules["parse_errors"]["items"]] == ["countries/d.json"]
+    # "Economics" breaks the schema's lowercase domain pattern as well.
+    assert {item["file"] for item in rules["schema"]["items"]} == {"countries/a.json", "countries/c.json"}
+    assert rules["duplicate_ids"]["items"] == [
+        {"id": "dup", "files": ["countries/a.json", "countries/b.json"]}
+    ]
+    assert rules["domain_case"]["items"][0]["normalized"] == "economics"
+    assert report["summary"]["failed_rules"] == ["parse_errors", "schema", "duplicate_ids", "domain_case"]
+    assert not report["summary"]["pass"]
+
+
+def test_non_blocking_findings_do_not_fail(write_sources, make_source):
+    root = write_sources({"china/a.json": make_source("a")})
+    report = run_checks(load_catalog(root), ["illegitimate_l1"])
+    assert report["rules"]["illegitimate_l1"]["count"] == 1
+    assert report["summary"]["pass"]
+
+
+def test_overrides_keep_rule_metadata(write_sources, make_source):
+    root = write_sources({"countries/a.json": make_source("a")})
+    report = run_checks(
+        load_catalog(root),
+        ["duplicate_ids"],
+        overrides={"duplicate_ids": lambda catalog: [{"id": "a", "files": ["x", "y"]}]},
+    )
+    result = report["rules"]["duplicate_ids"]
+    assert result["blocking"] and result["severity"] == "error"
+    assert report["summary"]["failed_rules"] == ["duplicate_ids"]
+
+
+def test_schema_invalid_values_are_reported_not_fatal(write_sources, make_source):
+    root = write_sources({
+        "countries/a.json": make_source("a", domains=[1, "Economics"]),
+        "countries/b.json": make_source(["b"], domains="economics"),
+        "countries/c.json": make_source({"id": "c"}, domains=["economics"]),
+    })
+    report = run_checks(load_catalog(root))
+    schema_files = {item["file"] for item in report["rules"]["schema"]["items"]}
+    assert {"countries/a.json", "countries/b.json", "countries/c.json"} <= schema_files
+    assert report["rules"]["duplicate_ids"]["count"] == 0
+    assert report["rules"]["domain_case"]["items"] == [
+        {"normalized": "economics", "variants": {"Economics": ["countries/a.json"], "economics": ["countries/c.json"]}}
+    ]
+    assert not any(
+        item.get("message", "").startswith("rule failed") for r in report["rules"].values() for item in r["items"]
+    )
+
+
+def test_a_failing_rule_becomes_a_finding(write_sources, make_source):
+    root = write_sources({"countries/a.json": make_source("a")})
+
+    def broken(catalog):
+        raise KeyError("domains")
+
+    report = run_checks(load_catalog(root), ["duplicate_ids", "parse_errors"], {"duplicate_ids": broken})
+    assert report["rules"]["duplicate_ids"]["items"] == [{"message": "rule failed: KeyError: 'domains'"}]
+    assert report["rules"]["parse_errors"]["count"] == 0
+    assert report["summary"]["failed_rules"] == ["duplicate_ids"]
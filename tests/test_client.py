@@ -0,0 +1,165 @@
+import asyncio
+import json
+import time
+from email.utils import formatdate
+
+import pytest
+
+from firstdata.client import MAX_RETRY_AFTER, FirstDataClient, QuotaExhausted, _retry_after
+from firstdata import server as server_module
+from firstdata.search import SearchIndex
+from firstdata.server import McpServer, Snapshot
+
+
+class CountingSnapshot(Snapshot):
+    """A snapshot of the committed records that counts the tool calls it answers."""
+
+    def __init__(self, records: list[dict]) -> None:
+        by_id = {r["id"]: r for r in records}
+        super().__init__(records, SearchIndex(records), by_id.get)
+        self.calls: list[tuple[str, dict]] = []
+
+    def search_source(self, arguments: dict) -> list[dict]:
+        self.calls.append(("search_source", arguments))
+        time.sleep(0.05)  # keeps the first call in flight while the others are made
+        return super().search_source(arguments)
+
+    def get_source(self, arguments: dict) -> list[dict]:
+        self.calls.append(("get_source", arguments))
+        return super().get_source(arguments)
+
+
+class ShufflingSnapshot(CountingSnapshot):
+    """Answers get_source out of order and without the last requested id."""
+
+    def get_source(self, arguments: dict) -> list[dict]:
+        return list(reversed(super().get_source(arguments)[:-1]))
+
+
+def run(url: str, calls, **options):
+    async def main():
+        async with FirstDataClient(url, **options) as client:
+            return await calls(client)
+    return asyncio.run(main())
+
+
+def test_search_source(records, serve_http):
+    url = serve_http(McpServer(CountingSnapshot(records)))
+    result = run(url, lambda client: client.search_source(["中国", "GDP"], limit=30))
+    assert result == SearchIndex(records).search(["中国", "GDP"], limit=30)
+
+
+def test_get_source_batches(records, serve_http):
+    snapshot = CountingSnapshot(records)
+    url = serve_http(McpServer(snapshot))
+    ids = [r["id"] for r in records[:45]] + ["no-such-source", records[0]["id"]]
+    result = run(url, lambda client: client.get_source(ids), batch_size=20)
+    assert result == records[:45] + [{"id": "no-such-source", "error": "Not found"}]
+    assert sorted(len(arguments["source_ids"]) for _, arguments in snapshot.calls) == [6, 20, 20]
+
+
+def test_get_source_matches_items_by_id(records, serve_http):
+    url = serve_http(McpServer(ShufflingSnapshot(records)))
+    ids = [r["id"] for r in records[:5]]
+    result = run(url, lambda client: client.get_source(ids, fields=["name"]))
+    assert result[:4] == [{"id": r["id"], "name": r["name"]} for r in records[:4]]
+    assert result[4] == {"id": ids[4], "error": "Not found"}
+
+
+def test_identical_calls_share_a_request(records, serve_http):
+    snapshot = CountingSnapshot(records)
+    url = serve_http(McpServer(snapshot))
+
+    async def calls(client):
+        return await asyncio.gather(*(client.search_source("census") for _ in range(5)))
+
+    results = run(url, calls)
+    assert all(r == results[0] for r in results)
+    assert len(snapshot.calls) == 1
+
+
+def test_quota_is_reserved_for_every_batch_up_front(records, serve_http):
+    snapshot = CountingSnapshot(records)
+    url = serve_http(McpServer(snapshot))
+    ids = [r["id"] for r in records[:80]]
+
+    async def calls(client):
+        client.remaining_daily, client._quota_checked = 3, True
+        with pytest.raises(QuotaExhausted):
+            await client.get_source(ids)  # 4 batches
+        assert snapshot.calls == []
+        await client.get_source(ids[:60])  # 3 batches
+        return client.remaining_daily
+
+    assert run(url, calls, batch_size=20) == 0
+    assert len(snapshot.calls) == 3
+
+
+@pytest.mark.parametrize("value,expected", [
+    (None, None),
+    ("", None),
+    ("3", 3.0),
+    ("1.5", 1.5),
+    ("-4", 0.0),
+    ("86400", MAX_RETRY_AFTER),
+    ("nan", None),
+    ("soon", None),
+    (formatdate(0, usegmt=True), 0.0),
+])
+def test_retry_after(value, expected):
+    assert _retry_after(value) == expected
+
+
+def test_retry_after_date():
+    delay = _retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 28 <= delay <= 30
+
+
+def test_stale_pooled_connection_is_replaced(records, serve_http, monkeypatch):
+    monkeypatch.setattr(server_module, "IDLE_TIMEOUT", 0.1)
+    snapshot = CountingSnapshot(records)
+    url = serve_http(McpServer(snapshot))
+
+    async def calls(client):
+        await client.search_source("census")
+        await asyncio.sleep(0.3)  # the server closes the pooled connection meanwhile
+        # Not idempotent, so not retried: only resent because the connection was stale.
+        return await client.call_tool("search_source", {"keywords": ["census"]}, idempotent=False)
+
+    assert run(url, calls) == SearchIndex(records).search(["census"])
+    assert len(snapshot.calls) == 2
+
+
+def test_503_is_retried_after_retry_after():
+    received = []
+
+    async def answer(reader, writer):
+        while request_line := await reader.readline():
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            message = json.loads(await reader.readexactly(int(headers["content-length"])))
+            received.append((message.get("method"), time.monotonic()))
+            if message.get("method") == "tools/call" and len(received) == 3:
+                status, extra, payload = "503 Service Unavailable", "Retry-After: 0.3\r\n", b""
+            elif "id" in message:
+                result = {"content": [{"type": "text", "text": "[]"}]}
+                status, extra = "200 OK", "Content-Type: application/json\r\n"
+                payload = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result}).encode()
+            else:
+                status, extra, payload = "202 Accepted", "", b""
+            writer.write(f"HTTP/1.1 {status}\r\n{extra}Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+            await writer.drain()
+        writer.close()
+
+    async def main():
+        listener = await asyncio.start_server(answer, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener, FirstDataClient(f"http://127.0.0.1:{port}/mcp", backoff=0) as client:
+            return await client.search_source("census")
+
+    assert asyncio.run(main()) == []
+    methods = [method for method, _ in received]
+    assert methods == ["initialize", "notifications/initialized", "tools/call", "tools/call"]
+    assert received[3][1] - received[2][1] >= 0.3
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from firstdata.compact import COMPACT_FORMAT, build_compact, expand_grouped, load_grouped_index
+from firstdata.loader import INDEXES_DIR
+
+
+@pytest.mark.parametrize("name", ["by-authority", "by-domain", "by-region"])
+def test_grouped_json_expands_to_the_legacy_index(name):
+    with open(INDEXES_DIR / f"{name}.json", encoding="utf-8") as f:
+        assert load_grouped_index(name) == json.load(f)
+
+
+def test_round_trip_stores_each_entry_once():
+    a = {"id": "a", "file_path": "x/a.json"}
+    b = {"id": "b", "file_path": "x/b.json"}
+    indexes = {
+        "by-domain": {"metadata": {"total_domains": 2}, "domains": {"gdp": [a, b], "trade": [b]}},
+        "by-region": {"metadata": {"total_regions": 1}, "regions": {"CN": [b]}},
+    }
+    compact = build_compact(indexes, {"version": "2.0"})
+
+    assert compact["metadata"] == {"version": "2.0", "format": COMPACT_FORMAT}
+    assert compact["sources"] == [a, b]
+    assert compact["indexes"]["by-domain"]["domains"] == {"gdp": [0, 1], "trade": [1]}
+    for name, index in indexes.items():
+        assert expand_grouped(compact, name) == index
+
+
+def test_duplicate_ids_keep_their_own_entries():
+    first = {"id": "dup", "file_path": "x/a.json", "name": "A"}
+    second = {"id": "dup", "file_path": "y/b.json", "name": "B"}
+    indexes = {"by-domain": {"metadata": {}, "domains": {"gdp": [second], "trade": [first, second]}}}
+    compact = build_compact(indexes, {})
+    assert compact["sources"] == [first, second]
+    assert expand_grouped(compact, "by-domain") == indexes["by-domain"]
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        expand_grouped({"metadata": {"format": "compact-v0"}}, "by-domain")
@@ -0,0 +1,52 @@
+from collections import Counter
+
+import pytest
+
+from firstdata.cube import DIMENSIONS, Cube, build_cube, load_cube
+from firstdata.facets import FacetIndex, build_facets
+
+
+@pytest.fixture(scope="module")
+def cube(records) -> Cube:
+    return Cube(build_cube(records, "now"))
+
+
+@pytest.mark.parametrize("by", [[], ["authority_level"], ["country", "has_api"], DIMENSIONS])
+def test_rollups_match_a_scan(cube, records, by):
+    expected = Counter(tuple(str(r[d]).lower() if d == "has_api" else r.get(d) for d in by) for r in records)
+    assert cube.rollup(by) == dict(expected)
+
+
+def test_slice(cube, records):
+    where = {"authority_level": ["government", "international"], "geographic_scope": "national"}
+    expected = Counter(
+        r.get("update_frequency") for r in records
+        if r["authority_level"] in where["authority_level"] and r.get("geographic_scope") == "national"
+    )
+    assert cube.rollup(["update_frequency"], where) == {(k,): v for k, v in expected.items()}
+    assert cube.count(where) == sum(expected.values())
+
+
+def test_domains_count_each_source_once_per_domain(cube, records):
+    expected = Counter(d for r in records for d in set(r.get("domains", [])))
+    assert cube.rollup(["domain"]) == {(d,): n for d, n in expected.items()}
+    assert cube.count({"domain": "finance"}) == expected["finance"]
+    assert cube.count() == len(records)
+
+
+def test_several_domains_need_grouping(cube):
+    with pytest.raises(ValueError):
+        cube.rollup(["authority_level"], {"domain": ["finance", "economics"]})
+    with pytest.raises(KeyError):
+        cube.rollup(["colour"])
+
+
+def test_has_api_is_spelled_as_in_the_facets(cube, records):
+    facets = FacetIndex.from_json(build_facets(records, "now"))
+    assert cube.values["has_api"] == ["false", "true"]
+    for value in ["true", True, "false", False]:
+        assert cube.count({"has_api": value}) == bin(facets.select({"has_api": value})).count("1")
+
+
+def test_committed_cube_is_current(cube):
+    assert load_cube().rollup(DIMENSIONS) == cube.rollup(DIMENSIONS)
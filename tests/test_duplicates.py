@@ -0,0 +1,78 @@
+import pytest
+
+from firstdata.duplicates import (
+    BINS,
+    THRESHOLD,
+    candidate_pairs,
+    find_near_duplicates,
+    signature,
+    similarity,
+    source_host,
+    source_sets,
+)
+from firstdata.loader import load_catalog
+
+
+@pytest.fixture(scope="module")
+def sources() -> list[dict]:
+    return load_catalog().sources
+
+
+@pytest.mark.parametrize("url,host", [
+    ("https://www.worldbank.org/en", "worldbank.org"),
+    ("http://DATA.stats.gov.cn/", "data.stats.gov.cn"),
+    ("not a url", None),
+    (None, None),
+])
+def test_source_host(url, host):
+    assert source_host(url) == host
+
+
+def test_signature_is_deterministic_and_dense():
+    values = frozenset({"gdp", "inflation", "trade"})
+    assert signature(values) == signature(frozenset(sorted(values, reverse=True)))
+    assert len(signature(values)) == BINS
+    assert len(set(signature(frozenset()))) == 1
+
+
+def test_identical_sets_share_every_band():
+    a = signature(frozenset({"x.org"})) + signature(frozenset({"open", "data", "portal"}))
+    assert candidate_pairs([a, list(a)]) == {(0, 1)}
+
+
+def test_empty_sets_do_not_match():
+    empty = signature(frozenset()) * 2
+    assert candidate_pairs([empty, list(empty)]) == set()
+
+
+def test_lsh_finds_every_pair_an_exhaustive_comparison_finds(sources):
+    sets = [source_sets(s) for s in sources]
+    exhaustive = {
+        (i, j)
+        for i in range(len(sets))
+        for j in range(i + 1, len(sets))
+        if similarity(sets[i], sets[j]) >= THRESHOLD
+    }
+    positions = {s["id"]: i for i, s in enumerate(sources)}
+    found = {
+        tuple(sorted((positions[a], positions[b])))
+        for cluster in find_near_duplicates(sources)
+        for a, b, _ in cluster["pairs"]
+    }
+    assert exhaustive
+    assert found == exhaustive
+
+
+def test_clusters(make_source):
+    description = {"en": "Official statistics portal of the example agency with national accounts and prices"}
+    sources = [
+        make_source("agency-a", website="https://www.example.org", data_url="https://data.example.org", description=description),
+        make_source("agency-b", website="https://example.org/en", data_url="https://data.example.org", description=description),
+        make_source("agency-c", website="https://example.org", data_url="https://data.example.org/x", description=description),
+        make_source("unrelated", website="https://other.net", data_url="https://other.net/d",
+                    description={"en": "Ocean temperature buoys"}),
+    ]
+    clusters = find_near_duplicates(sources)
+    assert [c["ids"] for c in clusters] == [["agency-a", "agency-b", "agency-c"]]
+    assert clusters[0]["similarity"] == 1.0
+    assert len(clusters[0]["pairs"]) == 3
@@ -0,0 +1,46 @@
+from collections import Counter
+
+import pytest
+
+from firstdata.facets import FacetIndex, build_facets, load_facet_index
+
+
+@pytest.fixture(scope="module")
+def index(records) -> FacetIndex:
+    return FacetIndex.from_json(build_facets(records, "now"))
+
+
+def test_committed_facets_match_the_records(records):
+    assert load_facet_index().ids == [r["id"] for r in records]
+
+
+def test_select_matches_a_scan(index, records):
+    result = index.search(
+        include={"authority_level": ["government", "international"], "has_api": True},
+        exclude={"domain": "finance"},
+    )
+    expected = [
+        r["id"] for r in records
+        if r["authority_level"] in ("government", "international")
+        and r["has_api"]
+        and "finance" not in r.get("domains", [])
+    ]
+    assert result.ids == expected
+    assert "authority_level" not in result.counts and "has_api" not in result.counts
+
+    matching = [r for r in records if r["id"] in set(expected)]
+    assert result.counts["geographic_scope"] == dict(
+        Counter(r["geographic_scope"] for r in matching if r.get("geographic_scope"))
+    )
+    assert result.counts["domain"] == dict(Counter(d for r in matching for d in r.get("domains", [])))
+
+
+def test_no_filter_counts_everything(index, records):
+    result = index.search()
+    assert result.ids == [r["id"] for r in records]
+    assert sum(result.counts["authority_level"].values()) == len(records)
+
+
+def test_unknown_facet(index):
+    with pytest.raises(KeyError):
+        index.select({"colour": "blue"})
@@ -0,0 +1,75 @@
+import json
+import shutil
+
+import pytest
+
+from firstdata.image import CatalogImage, build_image
+from firstdata.loader import INDEXES_DIR
+from firstdata.search import SearchIndex
+from firstdata.server import MANIFEST_NAME, Snapshot
+
+
+@pytest.fixture(scope="module")
+def hashes() -> dict[str, str]:
+    with open(INDEXES_DIR / MANIFEST_NAME, encoding="utf-8") as f:
+        return json.load(f)["files"]
+
+
+@pytest.fixture(scope="module")
+def image_dir(tmp_path_factory, records, hashes):
+    indexes_dir = tmp_path_factory.mktemp("indexes")
+    shutil.copy(INDEXES_DIR / MANIFEST_NAME, indexes_dir / MANIFEST_NAME)
+    (indexes_dir / "catalog.img").write_bytes(build_image(records, hashes))
+    return indexes_dir
+
+
+@pytest.fixture(scope="module")
+def image(image_dir) -> CatalogImage:
+    return CatalogImage(image_dir / "catalog.img")
+
+
+def test_records_and_lookup(image, records):
+    assert len(image) == len(records)
+    assert [image.records[i] for i in range(len(records))] == records
+    for i, record in enumerate(records):
+        assert image.position(record["id"]) == i
+        assert image.get(record["id"]) == record
+    assert image.get("no-such-source") is None
+    assert image.get_many([records[1]["id"], "nope", records[1]["id"]]) == {records[1]["id"]: records[1]}
+
+
+@pytest.mark.parametrize("keywords,domain,limit", [
+    (["中国", "GDP"], None, 20),
+    (["census", "人口"], "demograph", 50),
+    ([], "finance", 200),
+    (["m2"], None, 5),
+    (["zzzz-nothing"], None, 20),
+])
+def test_search_matches_the_json_snapshot(image, records, keywords, domain, limit):
+    assert image.search(keywords, domain, limit) == SearchIndex(records).search(keywords, domain, limit)
+
+
+def test_texts_are_not_cached(image):
+    image.search(["statistics", "统计"])
+    assert image.index.keywords._texts is None
+
+
+def test_snapshot_map(image_dir, records):
+    snapshot = Snapshot.map(image_dir)
+    assert snapshot.lookup(records[0]["id"]) == records[0]
+    assert snapshot.generation
+
+
+def test_map_refuses_another_generation(tmp_path, image_dir, records):
+    shutil.copytree(image_dir, tmp_path / "indexes")
+    manifest_path = tmp_path / "indexes" / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest["files"][records[0]["file_path"]] = "0" * 64
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    with pytest.raises(ValueError):
+        Snapshot.map(tmp_path / "indexes")
+
+
+def test_duplicate_ids_are_rejected(records, hashes):
+    with pytest.raises(ValueError, match="duplicate source id"):
+        build_image([records[0], records[0]], hashes)
@@ -0,0 +1,53 @@
+import pytest
+
+from firstdata.ranking import RankedIndex
+
+
+def source(source_id, name, description="", authority_level="government"):
+    return {
+        "id": source_id,
+        "name": {"en": name},
+        "description": {"en": description},
+        "authority_level": authority_level,
+    }
+
+
+SOURCES = [
+    source("aggregator", "Data Portal", "Exchange rates, inflation and more", "commercial"),
+    source("central-bank", "Central Bank Exchange Rates", "Official rates", "government"),
+    source("weather", "Weather Service", "Daily forecasts"),
+    source("stats", "人口统计", "全国人口普查数据"),
+]
+
+
+def test_name_matches_rank_above_description_matches():
+    index = RankedIndex.build(SOURCES)
+    assert [i for i, _ in index.search("exchange rates", prior_weight=0)] == ["central-bank", "aggregator"]
+
+
+def test_only_matching_sources_are_ranked():
+    index = RankedIndex.build(SOURCES)
+    assert [i for i, _ in index.search("forecasts")] == ["weather"]
+    assert [i for i, _ in index.search("人口")] == ["stats"]
+    assert index.search("nothing matches this") == []
+
+
+def test_authority_prior_breaks_ties():
+    twins = [source("market", "Trade Data", authority_level="market"), source("gov", "Trade Data")]
+    index = RankedIndex.build(twins)
+    assert [i for i, _ in index.search("trade")] == ["gov", "market"]
+
+
+def test_serialized_index_scores_the_same(records):
+    index = RankedIndex.build(records)
+    loaded = RankedIndex.from_bytes(index.to_bytes())
+    for query in ["gdp", "exchange rate", "中国 人口", "central bank statistics"]:
+        expected = index.search(query, limit=20)
+        found = loaded.search(query, limit=20)
+        assert [i for i, _ in found] == [i for i, _ in expected]
+        assert [s for _, s in found] == pytest.approx([s for _, s in expected], rel=1e-6)
+
+
+def test_other_files_are_rejected():
+    with pytest.raises(ValueError):
+        RankedIndex.from_bytes(b"\0" * 64)
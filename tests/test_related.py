@@ -0,0 +1,55 @@
+import heapq
+import math
+
+import pytest
+
+from firstdata.related import MIN_SCORE, TOP_K, build_related, feature_vectors, load_related, top_neighbors
+
+
+@pytest.fixture(scope="module")
+def vectors(records) -> list[dict]:
+    return feature_vectors(records)
+
+
+def test_vectors_are_unit_length(vectors):
+    for vector in vectors:
+        if vector:
+            assert math.sqrt(sum(w * w for w in vector.values())) == pytest.approx(1.0)
+
+
+def test_neighbors_match_all_pairs(vectors):
+    """The inverted-index product finds what comparing every pair finds."""
+    neighbors = top_neighbors(vectors)
+    for i in range(0, len(vectors), 7):
+        scores = {
+            j: sum(w * other.get(key, 0.0) for key, w in vectors[i].items())
+            for j, other in enumerate(vectors) if j != i
+        }
+        best = heapq.nlargest(TOP_K, scores.items(), key=lambda item: (item[1], -item[0]))
+        expected = [(j, s) for j, s in best if s >= MIN_SCORE]
+        assert [j for j, _ in neighbors[i]] == [j for j, _ in expected]
+        assert [s for _, s in neighbors[i]] == pytest.approx([s for _, s in expected])
+
+
+def test_scores_are_bounded_and_sorted(vectors):
+    for i, row in enumerate(top_neighbors(vectors)):
+        assert len(row) <= TOP_K
+        assert all(j != i and MIN_SCORE <= s <= 1.0 + 1e-9 for j, s in row)
+        assert [s for _, s in row] == sorted((s for _, s in row), reverse=True)
+
+
+def test_similarity_is_symmetric(vectors):
+    neighbors = [dict(row) for row in top_neighbors(vectors)]
+    for i, row in enumerate(neighbors):
+        for j, score in row.items():
+            if i in neighbors[j]:
+                assert neighbors[j][i] == pytest.approx(score)
+
+
+def test_committed_graph_is_current(records):
+    assert build_related(records, "")["related"] == load_related()
+
+
+def test_graph_does_not_depend_on_tag_order(records):
+    shuffled = [{**s, "tags": list(reversed(s.get("tags", [])))} for s in records]
+    assert build_related(shuffled, "")["related"] == build_related(records, "")["related"]
@@ -0,0 +1,66 @@
+import pytest
+
+from firstdata.loader import load_catalog
+from firstdata.search import SEARCH_FIELDS, NgramIndex, SearchIndex, build_ngram_index, catalog_digest
+from firstdata.text import field_texts
+
+
+def reference_search(sources, keywords, domain=None, limit=20):
+    """search_source as the tool description states it, by brute force."""
+    terms = {k.lower() for k in keywords if k}
+
+    def matches(source):
+        if domain and not any(domain.lower() in d.lower() for d in source.get("domains", [])):
+            return False
+        if not terms:
+            return True
+        texts = [t.lower() for field in SEARCH_FIELDS for t in field_texts(source.get(field))]
+        return any(term in text for term in terms for text in texts)
+
+    return [s for s in sources if matches(s)][:limit]
+
+
+QUERIES = [
+    (["GDP"], None),
+    (["中国"], None),
+    (["gdp", "人口"], None),
+    (["census"], "statistics"),
+    (["EU"], None),
+    (["x"], None),
+    (["central bank"], "finance"),
+    ([], "health"),
+    (["no such keyword anywhere"], None),
+]
+
+
+@pytest.mark.parametrize("keywords,domain", QUERIES)
+def test_catalog_search_matches_the_reference(keywords, domain):
+    catalog = load_catalog()
+    expected = reference_search(catalog.sources, keywords, domain, limit=200)
+    assert catalog.search(keywords, domain, limit=200) == expected
+
+
+def test_persisted_postings_match_a_fresh_build(tmp_path):
+    catalog = load_catalog()
+    path = tmp_path / "ngrams.bin"
+    hashes = {f.file_path: f.content_hash for f in catalog.files}
+    path.write_bytes(build_ngram_index(catalog.sources, hashes))
+
+    persisted = SearchIndex.for_catalog(catalog, path)
+    fresh = SearchIndex(catalog.sources)
+    for keywords, domain in QUERIES:
+        assert persisted.search(keywords, domain, 200) == fresh.search(keywords, domain, 200)
+
+
+def test_stale_postings_are_ignored():
+    index = NgramIndex.build(["gdp", "cpi"])
+    data = index.to_bytes(catalog_digest([("a.json", "1")]))
+    assert NgramIndex.from_bytes(data, catalog_digest([("a.json", "2")]), lambda i: "") is None
+    assert NgramIndex.from_bytes(data, catalog_digest([("a.json", "1")]), lambda i: "") is not None
+
+
+def test_limit_is_validated():
+    with pytest.raises(ValueError):
+        load_catalog().search(["gdp"], limit=0)
+    with pytest.raises(ValueError):
+        load_catalog().search(["gdp"], limit=201)
@@ -0,0 +1,233 @@
+import asyncio
+import http.client
+import json
+import shutil
+import socket
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+from firstdata.loader import INDEXES_DIR
+from firstdata.search import SearchIndex, catalog_digest
+from firstdata import server as server_module
+from firstdata.server import (
+    INTERNAL_ERROR,
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    MANIFEST_NAME,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    PROTOCOL_VERSION,
+    McpServer,
+    Snapshot,
+)
+
+
+@pytest.fixture(scope="module")
+def snapshot() -> Snapshot:
+    return Snapshot.load()
+
+
+@pytest.fixture
+def server(snapshot) -> McpServer:
+    return McpServer(snapshot)
+
+
+def call(server: McpServer, name: str, arguments: dict) -> dict:
+    response = server.handle({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                              "params": {"name": name, "arguments": arguments}})
+    return response["result"]
+
+
+def test_snapshot_matches_the_records(snapshot, records):
+    assert [s["id"] for s in snapshot.sources] == [r["id"] for r in records]
+    assert snapshot.generation
+
+
+@pytest.mark.parametrize("arguments", [
+    {"keywords": ["中国", "GDP"]},
+    {"keywords": ["census"], "domain": "demograph", "limit": 5},
+    {"keywords": [], "domain": "finance", "limit": 200},
+    {"keywords": "Trade"},
+])
+def test_search_source_matches_the_search_index(server, records, arguments):
+    result = call(server, "search_source", arguments)
+    keywords = arguments["keywords"]
+    expected = SearchIndex(records).search(
+        [keywords] if isinstance(keywords, str) else keywords, arguments.get("domain"), arguments.get("limit", 20)
+    )
+    assert result["isError"] is False
+    assert json.loads(result["content"][0]["text"]) == expected
+    assert result["_meta"]["generation"] == server.snapshot.generation
+
+
+def test_get_source(server, records):
+    first = records[0]
+    result = json.loads(call(server, "get_source", {"source_ids": [first["id"], "no-such-source"]})["content"][0]["text"])
+    assert result == [first, {"id": "no-such-source", "error": "Not found"}]
+    result = json.loads(call(server, "get_source", {"source_ids": first["id"], "fields": ["name", "nope"]})["content"][0]["text"])
+    assert result == [{"id": first["id"], "name": first["name"]}]
+
+
+@pytest.mark.parametrize("name,arguments", [
+    ("search_source", {"keywords": [1]}),
+    ("search_source", {"limit": 0}),
+    ("search_source", {"limit": True}),
+    ("search_source", {"domain": 3}),
+    ("get_source", {}),
+    ("get_source", {"source_ids": ["x"], "fields": "name"}),
+])
+def test_invalid_arguments_are_tool_errors(server, name, arguments):
+    result = call(server, name, arguments)
+    assert result["isError"] is True
+    assert result["content"][0]["text"]
+
+
+def test_initialize_negotiates_the_version(server):
+    def initialize(version):
+        return server.handle({"jsonrpc": "2.0", "id": 0, "method": "initialize",
+                              "params": {"protocolVersion": version}})["result"]["protocolVersion"]
+    assert initialize("2024-11-05") == "2024-11-05"
+    assert initialize("1999-01-01") == PROTOCOL_VERSION
+
+
+def test_tools_list(server):
+    tools = server.handle({"jsonrpc": "2.0", "id": 1, "method": "tools/list"})["result"]["tools"]
+    assert [t["name"] for t in tools] == ["search_source", "get_source"]
+
+
+@pytest.mark.parametrize("message,code", [
+    ({"jsonrpc": "2.0", "id": 1, "method": "resources/list"}, METHOD_NOT_FOUND),
+    ({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "ask_agent"}}, INVALID_PARAMS),
+    ({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": []}, INVALID_PARAMS),
+    ({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": ["search_source"]}}, INVALID_PARAMS),
+    ({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": {}}}, INVALID_PARAMS),
+    ({"jsonrpc": "1.0", "id": 1, "method": "ping"}, INVALID_REQUEST),
+])
+def test_rpc_errors(server, message, code):
+    assert server.handle(message)["error"]["code"] == code
+
+
+def test_unexpected_errors_are_internal_errors(server, monkeypatch):
+    def fail(method, params):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(server, "dispatch", fail)
+    assert server.handle({"jsonrpc": "2.0", "id": 3, "method": "ping"}) == {
+        "jsonrpc": "2.0", "id": 3, "error": {"code": INTERNAL_ERROR, "message": "Internal error"},
+    }
+
+
+def test_payloads(server):
+    assert json.loads(server.handle_payload(b"{"))["error"]["code"] == PARSE_ERROR
+    assert json.loads(server.handle_payload(b"[]"))["error"]["code"] == INVALID_REQUEST
+    assert server.handle_payload(b'{"jsonrpc": "2.0", "method": "notifications/initialized"}') is None
+    batch = [
+        {"jsonrpc": "2.0", "id": 1, "method": "ping"},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "ping"},
+    ]
+    assert json.loads(server.handle_payload(json.dumps(batch).encode())) == [
+        {"jsonrpc": "2.0", "id": 1, "result": {}},
+        {"jsonrpc": "2.0", "id": 2, "result": {}},
+    ]
+
+
+def test_http(server, serve_http):
+    url = urlsplit(serve_http(server))
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=5)
+
+    def request(method, path, body=None):
+        connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    ping = json.dumps({"jsonrpc": "2.0", "id": 7, "method": "ping"})
+    assert request("POST", "/mcp", ping) == (200, b'{"jsonrpc":"2.0","id":7,"result":{}}')
+    # The connection is kept alive across requests.
+    assert request("POST", "/mcp", '{"jsonrpc": "2.0", "method": "notifications/initialized"}') == (202, b"")
+    assert request("GET", "/mcp")[0] == 405
+    assert request("POST", "/other", ping)[0] == 404
+    connection.close()
+
+
+@pytest.mark.parametrize("sent", [b"", b"POST /mcp HTTP/1.1\r\nContent-Length: 10\r\n\r\n{"])
+def test_http_closes_stalled_connections(server, serve_http, monkeypatch, sent):
+    monkeypatch.setattr(server_module, "IDLE_TIMEOUT", 0.2)
+    monkeypatch.setattr(server_module, "READ_TIMEOUT", 0.2)
+    url = urlsplit(serve_http(server))
+    with socket.create_connection((url.hostname, url.port), timeout=5) as sock:
+        sock.sendall(sent)
+        assert sock.recv(1024) == b""
+
+
+def copy_generation(target: Path) -> Path:
+    target.mkdir()
+    for name in ("all-sources.json", MANIFEST_NAME):
+        shutil.copy(INDEXES_DIR / name, target / name)
+    return target
+
+
+def republish(indexes_dir: Path, file_path: str, content_hash: str, **changes) -> None:
+    """Write a new generation in which the source of `file_path` has `changes` and `content_hash`."""
+    index = json.loads((indexes_dir / "all-sources.json").read_text(encoding="utf-8"))
+    manifest = json.loads((indexes_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    for source in index["sources"]:
+        if source["file_path"] == file_path:
+            source.update(changes)
+    manifest["files"][file_path] = content_hash
+    index["metadata"]["catalog_digest"] = catalog_digest(manifest["files"].items()).hex()
+    (indexes_dir / "all-sources.json").write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+    (indexes_dir / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+
+
+def test_load_refuses_a_manifest_of_other_contents(tmp_path, records):
+    indexes_dir = copy_generation(tmp_path / "indexes")
+    manifest = json.loads((indexes_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    manifest["files"][records[0]["file_path"]] = "0" * 64  # same files, one edited
+    (indexes_dir / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+    with pytest.raises(ValueError):
+        Snapshot.load(indexes_dir)
+
+
+def test_watch_swaps_in_a_new_generation(tmp_path, records):
+    indexes_dir = copy_generation(tmp_path / "indexes")
+    server = McpServer(Snapshot.load(indexes_dir), indexes_dir)
+    first = server.snapshot
+
+    async def run() -> None:
+        watcher = asyncio.create_task(server.watch(interval=0.01))
+        await asyncio.sleep(0.05)
+        republish(indexes_dir, records[0]["file_path"], "f" * 64, name={"en": "Renamed", "zh": "改名"})
+        for _ in range(500):
+            if server.snapshot is not first:
+                break
+            await asyncio.sleep(0.01)
+        watcher.cancel()
+
+    asyncio.run(run())
+    assert server.snapshot is not first
+    assert server.snapshot.generation != first.generation
+    assert server.snapshot.lookup(records[0]["id"])["name"]["en"] == "Renamed"
+    # Calls made against the old generation still see it whole.
+    assert first.lookup(records[0]["id"]) == records[0]
+
+
+def test_watch_keeps_serving_through_a_partial_update(tmp_path, records):
+    indexes_dir = copy_generation(tmp_path / "indexes")
+    server = McpServer(Snapshot.load(indexes_dir), indexes_dir)
+    first = server.snapshot
+
+    async def run() -> None:
+        watcher = asyncio.create_task(server.watch(interval=0.01))
+        await asyncio.sleep(0.05)
+        # The manifest lands before all-sources.json is copied in.
+        manifest = json.loads((indexes_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+        manifest["files"][records[0]["file_path"]] = "e" * 64
+        (indexes_dir / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+        await asyncio.sleep(0.2)
+        watcher.cancel()
+
+    asyncio.run(run())
+    assert server.snapshot is first
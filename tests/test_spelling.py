@@ -0,0 +1,45 @@
+import pytest
+
+from firstdata.loader import load_catalog
+from firstdata.spelling import SpellingIndex, edit_distance, load_spelling
+
+
+@pytest.fixture(scope="module")
+def spelling() -> SpellingIndex:
+    return load_spelling()
+
+
+@pytest.mark.parametrize("a,b,distance", [
+    ("gdp", "gdp", 0),
+    ("statistics", "statistcs", 1),
+    ("inflation", "inlfation", 1),
+    ("population", "popluation", 1),
+    ("census", "sensus", 1),
+    ("trade", "tread", 2),
+    ("bank", "finance", 3),
+])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 2) == min(distance, 3)
+
+
+@pytest.mark.parametrize("word", ["statistcs", "inlfation", "popultion", "emplyment", "tradde"])
+def test_candidates_match_a_scan(spelling, word):
+    expected = sorted(
+        ((w, d) for w in spelling.words if (d := edit_distance(word, w, 2)) <= 2),
+        key=lambda m: (m[1], -spelling.words[m[0]], m[0]),
+    )
+    assert spelling.candidates(word) == expected
+
+
+def test_suggestions(spelling):
+    assert spelling.suggest("statistcs") == ["statistics"]
+    assert spelling.suggest("statistics") == []
+    assert spelling.suggest("populaton statistcs") == ["population statistics"]
+    assert spelling.suggest("中国") == []
+    assert spelling.suggest("gdq") == []  # too short to correct
+
+
+def test_search_falls_back_to_corrections():
+    catalog = load_catalog()
+    assert catalog.search(["inlfation"]) == []
+    assert catalog.search(["inlfation"], max_edits=1) == catalog.search(["inflation"])
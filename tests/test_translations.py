@@ -0,0 +1,107 @@
+import pytest
+
+from firstdata.search import SearchIndex, keyword_text
+from firstdata.translations import (
+    Translations,
+    align,
+    build_translations,
+    language_runs,
+    load_translations,
+    normalize,
+)
+
+
+@pytest.fixture(scope="module")
+def translations() -> Translations:
+    return load_translations()
+
+
+def test_committed_table_is_current(records, translations):
+    assert build_translations(records, "")["terms"] == translations.terms
+
+
+@pytest.mark.parametrize("term,translation", [
+    ("经济增长", "economic-growth"),
+    ("economic growth", "经济增长"),
+    ("城镇化", "urbanization"),
+    ("gdp", "国内生产总值"),
+    ("国家统计局", "National Bureau of Statistics of China"),
+    ("World Bank", "世界银行"),
+])
+def test_translate(translations, term, translation):
+    assert translation in translations.translate(term)
+
+
+def test_cooccurrence_alone_is_not_a_translation(translations):
+    assert "供应链" not in translations.translate("World Bank")
+    assert "asia" not in translations.translate("亚行")
+
+
+def test_every_translation_matches_a_source(records, translations):
+    texts = [keyword_text(s) for s in records]
+    targets = {t for values in translations.terms.values() for t in values}
+    assert [t for t in targets if not any(t.lower() in text for text in texts)] == []
+
+
+def test_expanded_search_finds_the_translation(records):
+    index = SearchIndex(records)
+    assert index.search(["国家统计局"], limit=200) != []
+    plain = {r["id"] for r in index.search(["National Bureau of Statistics of China"], limit=200)}
+    expanded = {r["id"] for r in index.search(["国家统计局"], translate=True, limit=200)}
+    assert "china-nbs" in plain
+    assert plain <= expanded
+
+
+def test_language_runs():
+    assert language_runs(["gdp", "trade", "国内生产总值", "贸易"]) == [(["gdp", "trade"], ["国内生产总值", "贸易"])]
+    assert language_runs(["城镇化", "urbanization", "住房", "housing", "homes", "统计"]) == [
+        (["urbanization"], ["城镇化"]),
+        (["housing", "homes"], ["住房"]),
+    ]
+
+
+def test_language_runs_follow_the_evidence_past_a_lone_tag():
+    tags = ["家庭调查", "education", "教育", "health", "健康"]
+    known = {("education", "教育"), ("health", "健康")}
+    assert language_runs(tags, lambda pair: float(pair in known)) == [
+        (["education"], ["教育"]),
+        (["health"], ["健康"]),
+    ]
+    # Without evidence the runs pair from the first one.
+    assert language_runs(tags)[0] == (["education"], ["家庭调查"])
+
+
+@pytest.mark.parametrize("english,chinese,wrong", [
+    ("health", "健康", "教育"),
+    ("income", "收入", "健康"),
+    ("child-development", "儿童发展", "家庭动态"),
+    ("cognitive-ability", "认知能力", "儿童发展"),
+    ("family-dynamics", "家庭动态", "代际"),
+])
+def test_lone_leading_tag_does_not_shift_the_pairs(translations, english, chinese, wrong):
+    # china-cfps opens its tags with a Chinese tag, then alternates English/Chinese pairs.
+    assert chinese in translations.translate(english)
+    assert wrong not in translations.translate(english)
+
+
+def test_align_skips_the_extra_alias():
+    english = ["adb", "vietnam", "viet-nam", "inflation", "poverty"]
+    chinese = ["亚行", "越南", "通货膨胀", "贫困"]
+    known = {("adb", "亚行"), ("vietnam", "越南"), ("inflation", "通货膨胀")}
+    assert align(english, chinese, known.__contains__) == [
+        ("adb", "亚行"), ("vietnam", "越南"), ("inflation", "通货膨胀"), ("poverty", "贫困"),
+    ]
+    # Without evidence for where the alias is, only the undisputed pairs remain.
+    assert align(english, chinese, {("adb", "亚行")}.__contains__) == [("adb", "亚行")]
+
+
+def test_values_keep_their_spelling(make_source):
+    sources = [
+        make_source(f"s{i}", tags=["Economic Growth", "经济增长"], name={"en": "Office of Stats", "zh": "统计办公室"})
+        for i in range(3)
+    ]
+    table = Translations.from_sources(sources)
+    assert table.translate("economic_growth") == ["经济增长"]
+    assert table.translate("经济增长") == ["Economic Growth"]
+    assert table.translate("统计办公室") == ["Office of Stats"]
+    assert normalize("Office of Stats") in table.terms
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+from jsonschema import Draft7Validator
+
+from firstdata.loader import SCHEMA_PATH, load_catalog
+from firstdata.validator import UnsupportedSchemaError, generate_source, load_validator
+
+
+@pytest.fixture(scope="module")
+def schema() -> dict:
+    with open(SCHEMA_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def reference_errors(schema: dict, instance) -> list[tuple[str, str]]:
+    return [(e.json_path, e.message) for e in Draft7Validator(schema).iter_errors(instance)]
+
+
+def compiled_errors(instance) -> list[tuple[str, str]]:
+    return [(e.path, e.message) for e in load_validator().iter_errors(instance)]
+
+
+def test_catalog_matches_jsonschema(schema):
+    for source in load_catalog().sources:
+        assert compiled_errors(source) == reference_errors(schema, source), source["id"]
+
+
+@pytest.mark.parametrize("change", [
+    {"authority_level": "rumour"},
+    {"domains": []},
+    {"domains": ["Economics", 3]},
+    {"name": {"en": 1}},
+    {"tags": "gdp"},
+    {"unexpected": True, "another": None},
+    {"id": "Not An Id"},
+    {"country": 7},
+])
+def test_invalid_records_match_jsonschema(schema, make_source, change):
+    source = make_source("sample", **change)
+    errors = compiled_errors(source)
+    assert errors
+    assert errors == reference_errors(schema, source)
+
+
+def test_missing_required_and_wrong_root_type(schema, make_source):
+    source = make_source("sample")
+    del source["name"], source["data_url"]
+    assert compiled_errors(source) == reference_errors(schema, source)
+    assert compiled_errors([]) == reference_errors(schema, [])
+
+
+def test_unsupported_keyword_is_rejected():
+    with pytest.raises(UnsupportedSchemaError):
+        generate_source({"type": "object", "oneOf": [{"type": "object"}]})
@@ -0,0 +1,56 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from firstdata.vectors import VectorIndex, build_vectors  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def files(records) -> dict:
+    return build_vectors(records)
+
+
+@pytest.fixture(scope="module")
+def index(files, tmp_path_factory) -> VectorIndex:
+    directory = tmp_path_factory.mktemp("vectors")
+    paths = []
+    for path, content in files.items():
+        (directory / path.name).write_bytes(content)
+        paths.append(directory / path.name)
+    return VectorIndex.load(*paths)
+
+
+def test_build_is_deterministic(records, files):
+    assert build_vectors(records) == files
+
+
+def test_rows_are_unit_length(index, records):
+    assert index.ids == [r["id"] for r in records]
+    norms = np.linalg.norm(index.vectors, axis=1)
+    assert np.allclose(norms[norms > 0], 1.0, atol=1e-5)
+
+
+def test_a_source_finds_itself(index, records):
+    for record in records[::50]:
+        query = f"{record['name']['en']} {record['description']['en']}"
+        assert record["id"] in [i for i, _ in index.search(query, limit=3)]
+
+
+def test_batch_search_matches_single_queries(index):
+    queries = ["exchange rates", "population census", "气候 变化"]
+    for batched, query in zip(index.search_many(queries, limit=5), queries):
+        single = index.search(query, limit=5)
+        assert [i for i, _ in batched] == [i for i, _ in single]
+        assert [s for _, s in batched] == pytest.approx([s for _, s in single], abs=1e-5)
+    assert index.search_many([]) == []
+
+
+def test_randomized_basis_captures_the_top_singular_values(records):
+    from firstdata.vectors import COMPONENTS, DIMENSIONS, _hashed_tf, source_tokens, top_right_singular_vectors
+
+    matrix = np.array([_hashed_tf(source_tokens(r)) for r in records], dtype=np.float32).reshape(-1, DIMENSIONS)
+    exact = np.linalg.svd(matrix.astype(np.float64), compute_uv=False)[:COMPONENTS]
+    basis = top_right_singular_vectors(matrix, COMPONENTS)
+    assert np.allclose(basis @ basis.T, np.eye(COMPONENTS), atol=1e-4)
+    captured = np.linalg.svd(matrix @ basis.T, compute_uv=False)
+    assert captured == pytest.approx(exact, rel=0.02)